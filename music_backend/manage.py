@@ -33,12 +33,11 @@ import sys
 try:
     import dotenv
     dotenv.load_dotenv()  # Load environment variables from .env file
-    print("✓ Environment variables loaded from .env file")
 except ImportError:
-    # Graceful fallback if dotenv is not installed
-    print("⚠ Warning: python-dotenv is not installed. Environment variables from .env won't be loaded.")
-    print("  Install with: pip install python-dotenv")
-
+    # Graceful fallback if dotenv is not installed; only worth a warning when a .env exists
+    if os.path.exists('.env'):
+        sys.stderr.write("⚠ Warning: python-dotenv is not installed. Environment variables from .env "
+                         "won't be loaded.\n  Install with: pip install python-dotenv\n")
 
 def main():
     """
@@ -2,11 +2,11 @@
 Django Admin Configuration for Moodify Music Application
 
 This module configures the Django admin interface for managing music-related models.
-Provides customized admin views for Profile, Mood, Song, and UserMood models.
+Provides customized admin views for Profile, Mood, Song, UserMood and ImageJob models.
 """
 
 from django.contrib import admin
-from .models import Profile, Mood, Song, UserMood
+from .models import ImageJob, Profile, Mood, Song, UserMood
 
 
 @admin.register(Profile)
@@ -61,3 +61,18 @@ class UserMoodAdmin(admin.ModelAdmin):
     list_filter = ('mood', 'timestamp')
     search_fields = ('user__username',)
     ordering = ('-timestamp',)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for ImageJob model.
+    
+    Shows queued and finished asynchronous image analyses.
+    Filtering by status helps spot stuck or failing jobs.
+    """
+    list_display = ('id', 'status', 'detector', 'created_at', 'finished_at')
+    list_filter = ('status', 'detector')
+    ordering = ('-created_at',)
+    exclude = ('image',)
+    readonly_fields = ('result', 'error', 'started_at', 'finished_at')
@@ -0,0 +1,194 @@
+"""
+Admission Control for Moodify Music Application
+
+Caps how many requests each detection endpoint runs at once and how many may
+wait for a slot. Past both limits the request is shed immediately with a 429
+and a Retry-After header, so bursts of uploads cannot occupy every server
+thread and starve the cheap catalog endpoints. Image inference and text
+scoring cost very different amounts, so each has its own limits (EMOTION_*
+and TEXT_* settings).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+
+from . import metrics
+
+
+class Overloaded(Throttled):
+    """429 raised when a detection endpoint has no free slot or queue space"""
+    default_detail = 'Server is busy analysing other requests.'
+    default_code = 'overloaded'
+
+
+class AdmissionController:
+    """
+    Concurrency limit plus a bounded, time-limited wait queue.
+
+    `max_concurrent <= 0` disables the limit.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int = 0,
+                 queue_timeout: float = 0.0, retry_after: int = 1) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def config(self) -> tuple:
+        return (self.max_concurrent, self.max_queue, self.queue_timeout, self.retry_after)
+
+    def _has_slot(self) -> bool:
+        return self.max_concurrent <= 0 or self.in_flight < self.max_concurrent
+
+    def acquire(self, wait: bool = True) -> bool:
+        """
+        Take a slot, waiting in the queue if there is room; False when shed.
+
+        With `wait=False` only a free slot is taken, never a place in the queue.
+        """
+        started = time.monotonic()
+        with self._cond:
+            # Newcomers only bypass the queue when nobody is already waiting
+            if self.waiting == 0 and self._has_slot():
+                self.in_flight += 1
+                return True
+            if not wait or self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            deadline = started + self.queue_timeout
+            try:
+                while not self._has_slot():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+            finally:
+                self.waiting -= 1
+        metrics.observe(f"admission.{self.name}.queue_wait_ms", (time.monotonic() - started) * 1000)
+        return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        """Hold a slot for the duration of the block, or raise Overloaded"""
+        if not self.acquire():
+            metrics.incr(f"admission.{self.name}.rejected")
+            raise Overloaded(wait=self.retry_after)
+        metrics.incr(f"admission.{self.name}.admitted")
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def admit_async(self) -> AsyncIterator[None]:
+        """`admit` for async views; queueing happens in a thread, not on the event loop"""
+        admitted = self.acquire(wait=False) or await self._acquire_in_thread()
+        if not admitted:
+            metrics.incr(f"admission.{self.name}.rejected")
+            raise Overloaded(wait=self.retry_after)
+        metrics.incr(f"admission.{self.name}.admitted")
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def _acquire_in_thread(self) -> bool:
+        waiter = asyncio.ensure_future(sync_to_async(self.acquire, thread_sensitive=False)())
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The client went away, but the queued thread cannot be interrupted and may
+            # still take a slot; give it back as soon as the thread returns
+            waiter.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, waiter: asyncio.Future) -> None:
+        if not waiter.cancelled() and waiter.exception() is None and waiter.result():
+            self.release()
+            metrics.incr(f"admission.{self.name}.abandoned")
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+            }
+
+
+# Settings prefix and defaults (concurrent, queue, timeout, retry after) per endpoint
+_LIMITS: dict[str, tuple[str, tuple[int, int, float, int]]] = {
+    "image": ("EMOTION", (4, 8, 5.0, 2)),
+    "text": ("TEXT", (16, 32, 2.0, 1)),
+    "text-batch": ("TEXT", (16, 32, 2.0, 1)),
+}
+
+_controllers: dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def admission_controller(name: str) -> AdmissionController:
+    """Return the process-wide controller for endpoint `name`, built from its settings"""
+    prefix, defaults = _LIMITS.get(name, _LIMITS["image"])
+    config = (
+        int(getattr(settings, f"{prefix}_MAX_CONCURRENT", defaults[0])),
+        int(getattr(settings, f"{prefix}_MAX_QUEUE", defaults[1])),
+        float(getattr(settings, f"{prefix}_QUEUE_TIMEOUT", defaults[2])),
+        int(getattr(settings, f"{prefix}_RETRY_AFTER", defaults[3])),
+    )
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None or controller.config != config:
+            controller = AdmissionController(name, *config)
+            _controllers[name] = controller
+        return controller
+
+
+def admission_controlled(name: str) -> Callable:
+    """View decorator (placed under @api_view) that runs the view inside a slot"""
+    def decorator(view: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                async with admission_controller(name).admit_async():
+                    return await view(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with admission_controller(name).admit():
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def admission_stats() -> dict[str, dict[str, Any]]:
+    with _controllers_lock:
+        controllers = dict(_controllers)
+    return {name: controller.stats() for name, controller in controllers.items()}
+
+
+metrics.register_provider("admission", admission_stats)
@@ -0,0 +1,52 @@
+"""
+Image Analysis Pipeline for Moodify Music Application
+
+One function from encoded upload bytes to the image endpoint's response
+payload: decode at working resolution, detect (cached / batched / sidecar),
+map boxes back and summarise. Used by the synchronous view and by the
+background job workers.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from rest_framework import status
+
+
+class ImageAnalysisError(Exception):
+    """A client-facing analysis failure with the HTTP status it maps to"""
+
+    def __init__(self, message: str, status_code: int = status.HTTP_400_BAD_REQUEST) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def analyze_image(data: Any, detector_name: str | None = None, all_faces: bool = False) -> dict[str, Any]:
+    """
+    Detect emotions in one encoded image.
+
+    Returns `{"emotion": ...}` for the first face, plus per-face results and the
+    group mood when `all_faces` is set. Raises ImageAnalysisError for invalid,
+    oversized or face-less images.
+    """
+    # Delayed imports: OpenCV and NumPy load on the first analysis, not with the URLconf
+    from .imaging import ImageTooLarge, decode_image, remap_boxes
+    from .inference import aggregate_emotions, detect_emotions_cached, dominant_emotion
+
+    try:
+        decoded = decode_image(data)
+    except ImageTooLarge as exc:
+        raise ImageAnalysisError(str(exc), status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if decoded is None:
+        raise ImageAnalysisError('Invalid image file.')
+
+    # Shared detector (loaded once per process); repeated uploads hit the result cache
+    results = remap_boxes(detect_emotions_cached(decoded.image, detector_name), decoded.scale)
+    if not results:
+        raise ImageAnalysisError('No face or emotion detected.')
+
+    payload: dict[str, Any] = {"emotion": dominant_emotion(results[0]["emotions"])}
+    if all_faces:
+        payload.update(aggregate_emotions(results))
+    return payload
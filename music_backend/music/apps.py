@@ -5,7 +5,41 @@ This module defines the configuration for the music application within the Djang
 Handles app initialization, signal registration, and module-level settings.
 """
 
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+# Programs that serve HTTP with this project; manage.py and django-admin only via runserver
+SERVER_ENTRY_POINTS = frozenset({'gunicorn', 'uvicorn', 'daphne', 'hypercorn', 'uwsgi', 'mod_wsgi'})
+
+
+def serves_requests():
+    """
+    Tell web server processes apart from maintenance commands and scripts.
+
+    The program is taken from sys.argv[0], or from its package directory
+    under 'python -m' (e.g. python -m gunicorn). Anything not on the
+    allow-list, including pytest and standalone scripts, is not a server.
+
+    Returns:
+        bool: True under the SERVER_ENTRY_POINTS programs and the serving
+            runserver process, False for migrate, test, shell and others
+    """
+    if not sys.argv or not sys.argv[0]:
+        return False
+    program = os.path.basename(sys.argv[0])
+    if program == '__main__.py':
+        program = os.path.basename(os.path.dirname(sys.argv[0]))
+    program = os.path.splitext(program)[0]
+    if program in SERVER_ENTRY_POINTS:
+        return True
+    if program in ('manage', 'django', 'django-admin') and sys.argv[1:2] == ['runserver']:
+        # The autoreloader parent only watches files; its child serves requests
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv
+    return False
 
 
 class MusicConfig(AppConfig):
@@ -29,6 +63,17 @@ class MusicConfig(AppConfig):
         Called when the app is loaded and ready.
         
         Used to register signal handlers and perform any startup initialization.
-        Imports the signals module to ensure signal handlers are registered.
+        Imports the signals module to ensure signal handlers are registered and,
+        when EMOTION_WARMUP is enabled in a server process, arranges for each
+        worker to start loading the models with its first request, so
+        /api/health/ready/ can hold traffic until they are warm. Nothing starts
+        here: under gunicorn --preload this runs in the master, whose threads
+        the forked workers would not inherit.
         """
         import music.signals  # noqa: F401
+
+        if getattr(settings, 'EMOTION_WARMUP', False) and serves_requests():
+            from django.core.signals import request_started
+
+            from music.warmup import warm_on_request
+            request_started.connect(warm_on_request, dispatch_uid='music.warmup')
@@ -0,0 +1,227 @@
+"""
+Native Async Views for Moodify Music Application
+
+ASGI implementations of the catalog and detection endpoints, selected in
+music/urls.py when ASYNC_VIEWS is enabled. Database access uses Django's async
+ORM and CPU-bound work (sentiment scoring, image decoding and emotion detection) runs in
+a bounded thread pool, so a slow upload or a long inference never holds the
+event loop. Request parameters, responses and error shapes match the DRF views
+in music/views.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+
+from . import catalog
+from .admission import admission_controlled
+from .analysis import ImageAnalysisError, analyze_image
+from .models import ImageJob, Mood
+from .pagination import InvalidPageRequest, next_page_headers, page_size, song_page_queryset, split_page
+from .sentiment import TextTooLong, analyze_text
+from .serializers import MoodSerializer, SongListSerializer
+from .uploads import BoundedMemoryUploadHandler, UploadTooLarge, upload_buffer
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def inference_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by all async views for CPU-bound work"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(getattr(settings, "ASYNC_INFERENCE_WORKERS", 4)),
+                thread_name_prefix="moodify-inference",
+            )
+        return _executor
+
+
+async def run_in_executor(func: Callable, *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor(), functools.partial(func, *args))
+
+
+def async_api_view(methods: list[str]) -> Callable:
+    """
+    Async counterpart of @api_view for plain Django coroutine views.
+
+    Restricts the HTTP methods, exempts the view from CSRF as DRF does, and turns
+    DRF API exceptions (429 from admission control, 413 from upload limits) into
+    the same JSON bodies and headers DRF would send.
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        async def wrapper(request: HttpRequest, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({"detail": f'Method "{request.method}" not allowed.'},
+                                    status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                headers = {"Retry-After": "%d" % exc.wait} if getattr(exc, "wait", None) else None
+                return JsonResponse({"detail": exc.detail}, status=exc.status_code, headers=headers)
+
+        # django.views.decorators.csrf.csrf_exempt wraps coroutines as sync views on Django 4.2
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def _request_data(request: HttpRequest) -> Any:
+    """Form fields, or the decoded body for JSON requests"""
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+    return request.POST
+
+
+def _request_param(data: Any, request: HttpRequest, name: str) -> str:
+    value = data.get(name) or request.GET.get(name) or ""
+    return str(value).strip().lower()
+
+
+@async_api_view(["GET"])
+async def get_moods(request: HttpRequest) -> HttpResponse:
+    """Return all available mood labels"""
+    entry, slot = await sync_to_async(catalog.lookup, thread_sensitive=False)(
+        [catalog.MOODS, catalog.MOOD_LIST], ("moods",))
+    if entry is None:
+        if catalog.is_conditional(request):
+            unchanged = catalog.not_modified(request, *await sync_to_async(catalog.mood_list_validators)())
+            if unchanged is not None:
+                return unchanged
+        moods = [mood async for mood in Mood.objects.all()]
+        entry = (JSONRenderer().render(MoodSerializer(moods, many=True).data), *catalog.mood_list_validators(moods))
+        await sync_to_async(catalog.store, thread_sensitive=False)(slot, entry)
+
+    body, etag, modified = entry
+    return catalog.not_modified(request, etag, modified) or catalog.json_response(body, etag, modified)
+
+
+@async_api_view(["GET"])
+async def get_songs_by_mood(request: HttpRequest) -> HttpResponse:
+    """Return corresponding song list based on mood name"""
+    mood_name = request.GET.get("mood", "").strip()
+    if not mood_name:
+        return JsonResponse({"error": "Missing 'mood' query parameter."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = page_size(request)
+        scopes = (catalog.MOODS, catalog.songs_scope(mood_name))
+        key = ("songs", mood_name.lower(), request.GET.get("cursor", ""), limit)
+        # Cache lookups may go to a shared backend; keep them off the event loop
+        entry, slot = await sync_to_async(catalog.lookup, thread_sensitive=False)(scopes, key)
+        if entry is None:
+            mood = await Mood.objects.by_name(mood_name).afirst()
+            if not mood:
+                return JsonResponse({"error": "Mood not found."},
+                                    status=status.HTTP_404_NOT_FOUND)
+            etag, modified = catalog.song_list_validators(mood, request.GET.get("cursor"), limit)
+            unchanged = catalog.not_modified(request, etag, modified)
+            if unchanged is not None:
+                return unchanged
+            songs, cursor = split_page(
+                [song async for song in song_page_queryset(mood, request.GET.get("cursor"), limit)], limit)
+            entry = (JSONRenderer().render(SongListSerializer(songs, many=True).data), cursor, etag, modified)
+            await sync_to_async(catalog.store, thread_sensitive=False)(slot, entry)
+    except InvalidPageRequest as exc:
+        return JsonResponse({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    body, cursor, etag, modified = entry
+    return (catalog.not_modified(request, etag, modified)
+            or catalog.json_response(body, etag, modified, next_page_headers(request, cursor)))
+
+
+@async_api_view(["POST"])
+@admission_controlled("text")
+async def detect_mood_from_text(request: HttpRequest) -> JsonResponse:
+    """Use TextBlob to analyze text sentiment"""
+    data = _request_data(request)
+    user_text = str(data.get("text", "")).strip()
+    if not user_text:
+        return JsonResponse({"error": "No text provided."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    include_chunks = _request_param(data, request, "chunks") in ("1", "true")
+    try:
+        return JsonResponse(await run_in_executor(analyze_text, user_text, include_chunks))
+    except TextTooLong as exc:
+        return JsonResponse({"error": str(exc)},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as exc:
+        return JsonResponse({"error": str(exc)},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _parse_image_request(request: HttpRequest) -> tuple[Any, Any]:
+    # Same bounded, single-buffer upload handling as the DRF parser
+    request.upload_handlers = [BoundedMemoryUploadHandler(request)]
+    return _request_data(request), request.FILES
+
+
+@async_api_view(["POST"])
+@admission_controlled("image")  # Checked before the upload is parsed
+async def detect_mood_from_image(request: HttpRequest) -> JsonResponse:
+    """Use FER to analyze emotions in uploaded images"""
+    # Multipart parsing is synchronous; keep it off the event loop
+    try:
+        data, files = await sync_to_async(_parse_image_request, thread_sensitive=False)(request)
+    except UploadTooLarge as exc:
+        return JsonResponse({'error': str(exc.detail)},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    image_file = files.get("image")
+    if image_file is None:
+        return JsonResponse({'error': 'No image uploaded.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    from .inference import resolve_detector  # Delayed import: loads OpenCV and NumPy
+
+    try:
+        detector_name = resolve_detector(_request_param(data, request, 'mode'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    all_faces = _request_param(data, request, 'faces') in ('all', '1', 'true')
+
+    if _request_param(data, request, 'async') in ('1', 'true'):
+        job = await ImageJob.objects.acreate(
+            detector=detector_name,
+            all_faces=all_faces,
+            image=image_file.read(),
+        )
+        return JsonResponse({
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': reverse('get_image_job', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    try:
+        with upload_buffer(image_file) as buffer:
+            payload = await run_in_executor(analyze_image, buffer, detector_name, all_faces)
+        return JsonResponse(payload)
+    except ImageAnalysisError as e:
+        return JsonResponse({'error': str(e)}, status=e.status_code)
+    except Exception as e:
+        logger.exception("Image emotion detection failed")
+        return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,119 @@
+"""
+In-process Caches for Moodify Music Application
+
+A small thread-safe LRU cache with optional per-entry TTL. Hit/miss counters
+are published through music.metrics so every cache shows up on /api/metrics/.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from . import metrics
+
+_MISSING = object()
+
+_caches: dict[str, "LRUCache"] = {}
+_caches_lock = threading.Lock()
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used mapping.
+
+    Entries older than `ttl` seconds (when given) are treated as misses and
+    dropped on access. A `maxsize` of 0 stores nothing.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float | None = None) -> None:
+        self.name = name
+        self.maxsize = max(int(maxsize), 0)
+        self.ttl = ttl if ttl else None
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with _caches_lock:
+            _caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None,
+            match: Callable[[Hashable], bool] | None = None) -> Any:
+        """
+        Return the value stored under `key`.
+
+        When the exact key is absent and `match` is given, the most recently used
+        live entry whose key satisfies `match` is returned instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is _MISSING and match is not None:
+                for candidate in reversed(list(self._data)):
+                    if match(candidate):
+                        entry = self._live_entry(candidate, now)
+                        if entry is not _MISSING:
+                            key = candidate
+                            break
+            if entry is _MISSING:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        metrics.incr(f"cache.{self.name}.{'misses' if entry is _MISSING else 'hits'}")
+        return default if entry is _MISSING else entry[1]
+
+    def _live_entry(self, key: Hashable, now: float) -> Any:
+        # Caller holds the lock
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING and self.ttl is not None and now - entry[0] > self.ttl:
+            del self._data[key]
+            return _MISSING
+        return entry
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    with _caches_lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+metrics.register_provider("caches", cache_stats)
@@ -0,0 +1,223 @@
+"""
+Catalog Response Cache for Moodify Music Application
+
+Rendered JSON for the read-mostly catalog endpoints (/api/moods/ and
+/api/songs/), kept per process in an LRU and optionally in a shared Django
+cache (CATALOG_SHARED_CACHE). Entries are keyed on the request and on version
+counters of the data they were built from: "moods" for any Mood change and
+"songs:<mood name>" for one mood's songs. music/signals.py bumps the counters
+when a post_save/post_delete write commits, so a write retires exactly the
+responses it affects, and no request can cache pre-commit rows under the new
+version.
+
+With a shared cache the counters live there as well and a write in one worker
+is seen by every worker; without one, other worker processes may serve the
+previous response for up to CATALOG_CACHE_TTL seconds. Bulk writes that skip
+model signals (QuerySet.update, bulk_create) must call `invalidate` themselves,
+from transaction.on_commit.
+
+Conditional GETs use validators kept in the database rather than a hash of the
+payload: every Mood carries a revision counter and an updated_at time, bumped
+by the signals whenever the mood or one of its songs changes (`touch_moods`).
+A song listing's ETag is the mood's (revision, updated_at) pair plus the page
+(mood, decoded cursor position and page size), so a matching If-None-Match is
+answered with 304 after the one-row mood lookup, or straight from the cache
+entry, without running the song query, and never with another page's validator. The mood list's ETag
+sums those revisions, so `touch_moods` also retires the cached mood list
+("moods:list") to keep its cached and freshly aggregated validators equal.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any, Hashable, Sequence
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import metrics
+from .caching import LRUCache
+from .models import Mood
+from .pagination import decode_cursor
+
+MOODS = "moods"
+# The mood list alone: its validators also move when songs change a mood's revision
+MOOD_LIST = "moods:list"
+
+
+def songs_scope(mood_name: str) -> str:
+    """Version scope of the song listings for a mood name (case-insensitive, like the lookup)"""
+    return f"songs:{mood_name.strip().lower()}"
+
+
+_cache: LRUCache | None = None
+_cache_lock = threading.Lock()
+_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+
+def catalog_cache() -> LRUCache | None:
+    """Return the process-wide catalog response cache, or None when disabled"""
+    global _cache
+    size = int(getattr(settings, "CATALOG_CACHE_SIZE", 256))
+    if size <= 0:
+        return None
+    ttl = float(getattr(settings, "CATALOG_CACHE_TTL", 60)) or None
+    with _cache_lock:
+        if _cache is None or (_cache.maxsize, _cache.ttl) != (size, ttl):
+            _cache = LRUCache("catalog", maxsize=size, ttl=ttl)
+        return _cache
+
+
+def _shared_cache():
+    alias = getattr(settings, "CATALOG_SHARED_CACHE", "")
+    if not alias:
+        return None
+    from django.core.cache import caches
+
+    return caches[alias]
+
+
+def _version_key(scope: str) -> str:
+    # Hashed: mood names may hold characters some cache backends reject in keys
+    return f"moodify:catalog:version:{hashlib.sha1(scope.encode()).hexdigest()}"
+
+
+def versions(scopes: Sequence[str]) -> tuple[int, ...]:
+    """Current version of each scope (from the shared cache when configured)"""
+    shared = _shared_cache()
+    if shared is not None:
+        found = shared.get_many([_version_key(scope) for scope in scopes])
+        return tuple(found.get(_version_key(scope), 0) for scope in scopes)
+    with _versions_lock:
+        return tuple(_versions.get(scope, 0) for scope in scopes)
+
+
+def invalidate(*scopes: str) -> None:
+    """Retire every cached response built from `scopes`"""
+    with _versions_lock:
+        for scope in scopes:
+            _versions[scope] = _versions.get(scope, 0) + 1
+    shared = _shared_cache()
+    if shared is not None:
+        for scope in scopes:
+            key = _version_key(scope)
+            shared.add(key, 0, timeout=None)  # No-op when the counter exists
+            shared.incr(key)
+    metrics.incr("cache.catalog.invalidations", len(scopes))
+
+
+def lookup(scopes: Sequence[str], key: tuple) -> tuple[Any, Hashable | None]:
+    """
+    Find a cached response for `key` built at the current versions of `scopes`.
+
+    Returns (entry or None, slot); pass the slot to `store` after rendering a
+    miss. Versions are read before rendering, so a write racing the render
+    only ever retires the new entry early.
+    """
+    local, shared = catalog_cache(), _shared_cache()
+    if local is None and shared is None:
+        return None, None
+
+    slot = (*key, versions(scopes))
+    entry = local.get(slot) if local is not None else None
+    if entry is None and shared is not None:
+        entry = shared.get(_entry_key(slot))
+        metrics.incr(f"cache.catalog.shared_{'misses' if entry is None else 'hits'}")
+        if entry is not None and local is not None:
+            local.set(slot, entry)
+    return entry, slot
+
+
+def store(slot: Hashable | None, entry: Any) -> None:
+    if slot is None or entry is None:
+        return
+    local, shared = catalog_cache(), _shared_cache()
+    if local is not None:
+        local.set(slot, entry)
+    if shared is not None:
+        shared.set(_entry_key(slot), entry, timeout=getattr(settings, "CATALOG_CACHE_TTL", 60) or None)
+
+
+def _entry_key(slot: Hashable) -> str:
+    return f"moodify:catalog:{hashlib.sha1(repr(slot).encode()).hexdigest()}"
+
+
+def touch_moods(mood_ids: Sequence[int]) -> None:
+    """Bump the revision and updated_at of moods whose song listings changed"""
+    ids = {pk for pk in mood_ids if pk is not None}
+    if ids:
+        # F() keeps concurrent bumps from losing increments; no Mood signals fire
+        Mood.objects.filter(pk__in=ids).update(revision=F("revision") + 1, updated_at=timezone.now())
+        # The cached mood list carries validators built from these revisions
+        transaction.on_commit(lambda: invalidate(MOOD_LIST))
+
+
+def _validators(tag: str, revision: int, updated_at) -> tuple[str, int]:
+    # updated_at guards against a stale in-memory revision being saved back
+    return f'"{tag}-{revision}-{int(updated_at.timestamp() * 1_000_000):x}"', int(updated_at.timestamp())
+
+
+def song_list_validators(mood: Mood, cursor: str | None, limit: int) -> tuple[str, int]:
+    """
+    (ETag, Last-Modified timestamp) of the song listing page of `mood` at `cursor`.
+
+    The cursor enters decoded, so two encodings of one position share an ETag;
+    a malformed cursor raises InvalidPageRequest as the page query would.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    page = hashlib.sha1(repr(position).encode()).hexdigest()[:12]
+    return _validators(f"songs-{mood.pk}-{limit}-{page}", mood.revision, mood.updated_at)
+
+
+def mood_list_validators(moods: Sequence[Mood] | None = None) -> tuple[str | None, int | None]:
+    """
+    (ETag, Last-Modified timestamp) of the mood list, or (None, None) when empty.
+
+    Built from the number of moods, their revision sum and the newest
+    updated_at: taken from already fetched `moods`, or else from one aggregate
+    query that reads no mood rows.
+    """
+    if moods is None:
+        found = Mood.objects.aggregate(count=Count("id"), revisions=Sum("revision"), latest=Max("updated_at"))
+        count, revisions, latest = found["count"], found["revisions"], found["latest"]
+    else:
+        count = len(moods)
+        revisions = sum(mood.revision for mood in moods)
+        latest = max((mood.updated_at for mood in moods), default=None)
+    if latest is None:
+        return None, None
+    return _validators(f"moods-{count}", revisions, latest)
+
+
+def is_conditional(request: HttpRequest) -> bool:
+    return "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+
+
+def not_modified(request: HttpRequest, etag: str | None, last_modified: int | None) -> HttpResponse | None:
+    """304 (or 412) response when the request's conditional headers match, else None"""
+    if etag is None:
+        return None
+    validators = _with_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=validators)
+    return None if response is validators else response
+
+
+def json_response(body: bytes, etag: str | None, last_modified: int | None,
+                  headers: dict[str, Any] | None = None) -> HttpResponse:
+    """Rendered catalog JSON with its ETag and Last-Modified headers"""
+    return _with_validators(HttpResponse(body, content_type="application/json", headers=headers),
+                            etag, last_modified)
+
+
+def _with_validators(response: HttpResponse, etag: str | None, last_modified: int | None) -> HttpResponse:
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+    return response
@@ -0,0 +1,109 @@
+"""
+Emotion Classifier Engines for Moodify Music Application
+
+The face detectors in music.inference hand 64x64 grayscale face crops (scaled
+to [-1, 1], as FER prepares them) to an emotion classifier. Two engines exist:
+
+- "fer": FER's own TensorFlow/TFLite classifier (imports TensorFlow)
+- "onnx": the same mini-XCEPTION network exported to ONNX (see the
+  `export_emotion_model` command) and run with onnxruntime when installed, or
+  OpenCV DNN otherwise, so CPU-only workers never import TensorFlow
+
+Both return scores in FER's label order, so API responses keep the same
+`emotion` values the frontend maps to moods.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Callable
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("fer", "onnx")
+
+
+def default_engine() -> str:
+    return getattr(settings, "EMOTION_ENGINE", "fer")
+
+
+def onnx_model_path() -> str:
+    return str(getattr(settings, "EMOTION_ONNX_MODEL", ""))
+
+
+class OnnxEmotionClassifier:
+    """
+    Runs the exported emotion model on (faces, 64, 64) float32 crops.
+
+    `runner` maps an NHWC batch to (faces, 7) scores; it is built from
+    `model_path` when not given.
+    """
+
+    def __init__(self, model_path: str | None = None,
+                 runner: Callable[[np.ndarray], np.ndarray] | None = None) -> None:
+        self.model_path = model_path or onnx_model_path()
+        self.backend = "custom"
+        if runner is None:
+            runner = self._load_runner(self.model_path)
+        self.runner = runner
+
+    def _load_runner(self, model_path: str) -> Callable[[np.ndarray], np.ndarray]:
+        if not model_path or not os.path.exists(model_path):
+            raise ImportError(
+                f"ONNX emotion model not found at '{model_path}'. "
+                "Create it with: python manage.py export_emotion_model"
+            )
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            ort = None
+
+        if ort is not None:
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = int(getattr(settings, "EMOTION_ENGINE_THREADS", 1))
+            session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+            input_name = session.get_inputs()[0].name
+            self.backend = "onnxruntime"
+            return lambda batch: session.run(None, {input_name: batch})[0]
+
+        import cv2
+
+        net = cv2.dnn.readNetFromONNX(model_path)
+        self.backend = "opencv-dnn"
+
+        def run(batch: np.ndarray) -> np.ndarray:
+            net.setInput(batch)
+            return net.forward()
+
+        return run
+
+    def classify(self, gray_faces: np.ndarray) -> np.ndarray:
+        """Score a (faces, 64, 64) batch; returns (faces, 7) in FER label order"""
+        batch = np.ascontiguousarray(gray_faces, dtype=np.float32)[..., np.newaxis]
+        return np.asarray(self.runner(batch)).reshape(len(gray_faces), -1)
+
+
+def build_emotion_classifier(engine: str | None = None) -> Any:
+    """Build the emotion classifier for `engine` (defaults to EMOTION_ENGINE)"""
+    engine = engine or default_engine()
+    if engine == "onnx":
+        classifier = OnnxEmotionClassifier()
+        logger.info("Emotion engine: ONNX via %s (%s)", classifier.backend, classifier.model_path)
+        return classifier
+    if engine == "fer":
+        from fer import FER  # Delayed import: pulls in TensorFlow
+
+        return FER()
+    raise ValueError(f"Unknown emotion engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+
+
+def classify_faces(classifier: Any, gray_faces: np.ndarray) -> np.ndarray:
+    """Score face crops with either engine"""
+    if hasattr(classifier, "classify"):
+        return classifier.classify(gray_faces)
+    # FER's classifier wrapper is semi-private but is its only batched entry point
+    return classifier._classify_emotions(gray_faces)
@@ -0,0 +1,147 @@
+"""
+Image Preprocessing Pipeline for Moodify Music Application
+
+Decodes uploaded photos straight to a working resolution before face detection.
+JPEGs are decoded with libjpeg's reduced-scale DCT (1/2, 1/4, 1/8) when the
+original is much larger than needed, and every frame is capped at a configurable
+longest edge. Face boxes found on the small frame are mapped back to the
+coordinates of the original upload. A difference hash (dHash) of the working
+frame identifies repeated or near-identical uploads.
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Any
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+JPEG_MAGIC = b"\xff\xd8"
+
+# Bytes handed to the header probe; enough for EXIF blocks ahead of the JPEG frame header
+PROBE_BYTES = 256 * 1024
+
+# Reduced JPEG decodes may end up this fraction of the requested edge (e.g. 4032/4 = 1008 for 1024)
+REDUCED_DECODE_TOLERANCE = 0.75
+
+# (scale factor, cv2 flag) from most to least aggressive
+_REDUCED_JPEG_FLAGS: tuple[tuple[int, int], ...] = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image's pixel count exceeds the configured limit"""
+
+
+@dataclass
+class DecodedImage:
+    """A decoded BGR frame plus the factor that maps it back to the upload"""
+
+    image: np.ndarray
+    original_size: tuple[int, int]  # (width, height) of the upload
+    scale: float  # original pixels per working-frame pixel
+
+    @property
+    def downscaled(self) -> bool:
+        return self.scale != 1.0
+
+
+def max_image_edge() -> int:
+    return int(getattr(settings, "EMOTION_MAX_IMAGE_EDGE", 1024))
+
+
+def max_image_pixels() -> int:
+    return int(getattr(settings, "EMOTION_UPLOAD_MAX_PIXELS", 64_000_000))
+
+
+def probe_size(data: Any) -> tuple[int, int] | None:
+    """Read (width, height) from the image header without decoding pixels"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        # Only the leading bytes are copied; headers never need the pixel data
+        with Image.open(io.BytesIO(bytes(data[:PROBE_BYTES]))) as probe:
+            return probe.size
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+
+
+def decode_image(data: Any, max_edge: int | None = None,
+                 max_pixels: int | None = None) -> DecodedImage | None:
+    """
+    Decode encoded image bytes to a BGR frame no longer than `max_edge` pixels.
+
+    `data` may be bytes or a memoryview; it is decoded in place without copying.
+    Returns None when the data is empty or cannot be decoded and raises ImageTooLarge when
+    the image has more than `max_pixels` pixels, checked from the header before
+    decoding whenever the format allows. A `max_edge` of 0 disables downscaling.
+    """
+    max_edge = max_image_edge() if max_edge is None else max_edge
+    max_pixels = max_image_pixels() if max_pixels is None else max_pixels
+    buffer = np.frombuffer(data, np.uint8)
+    if not buffer.size:
+        return None  # cv2.imdecode asserts on an empty buffer
+    size = probe_size(data) if (max_edge or max_pixels) else None
+    if size and max_pixels and size[0] * size[1] > max_pixels:
+        raise ImageTooLarge(f"Image has {size[0] * size[1]} pixels (limit {max_pixels})")
+
+    flag = cv2.IMREAD_COLOR
+    if size and max_edge and bytes(buffer[:2]) == JPEG_MAGIC:
+        longest = max(size)
+        for factor, reduced_flag in _REDUCED_JPEG_FLAGS:
+            # Accept a DCT scale landing slightly under the cap; the resize below handles the rest
+            if longest / factor >= max_edge * REDUCED_DECODE_TOLERANCE:
+                flag = reduced_flag
+                break
+
+    try:
+        img = cv2.imdecode(buffer, flag)
+    except cv2.error:
+        img = None  # Malformed headers can trip OpenCV assertions instead of failing the decode
+    del buffer  # Drop the view on the upload as early as possible
+    if img is None:
+        return None
+
+    height, width = img.shape[:2]
+    if size is None and max_pixels and width * height > max_pixels:
+        raise ImageTooLarge(f"Image has {width * height} pixels (limit {max_pixels})")
+    if max_edge and max(width, height) > max_edge:
+        ratio = max_edge / max(width, height)
+        img = cv2.resize(img, (max(int(width * ratio), 1), max(int(height * ratio), 1)),
+                         interpolation=cv2.INTER_AREA)
+
+    if size is None:
+        size = (width, height)
+    # Longest-edge ratio is unaffected by EXIF rotation applied during decode
+    scale = max(size) / max(img.shape[:2])
+    return DecodedImage(image=img, original_size=size, scale=scale)
+
+
+def remap_boxes(results: list[dict], scale: float) -> list[dict]:
+    """Scale detector `box` entries from working-frame to original coordinates"""
+    if scale == 1.0:
+        return results
+    return [
+        {**face, "box": [int(round(v * scale)) for v in face["box"]]} if "box" in face else face
+        for face in results
+    ]
+
+
+def dhash(img: np.ndarray, hash_size: int = 16) -> int:
+    """
+    Perceptual difference hash of a BGR or grayscale frame.
+
+    The frame is shrunk to (hash_size + 1) x hash_size and each bit records
+    whether a pixel is brighter than its right-hand neighbour, so re-encodes,
+    rescales and small compression changes map to the same value.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
@@ -0,0 +1,532 @@
+"""
+Emotion Inference Helpers for Moodify Music Application
+
+Keeps the heavy face/emotion detectors (FER + TensorFlow weights) loaded once per
+process and hands the shared instances out to request handlers. Concurrent
+requests can optionally be grouped into micro-batches so the emotion CNN sees
+several faces per forward pass, and results for repeated uploads are served
+from a perceptual-hash keyed cache.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Sequence
+
+import cv2
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+from .caching import LRUCache
+from .engines import build_emotion_classifier, classify_faces
+from .imaging import dhash
+
+logger = logging.getLogger(__name__)
+
+DetectorFactory = Callable[[], Any]
+
+# FER label order for the mini-XCEPTION emotion classifier output
+EMOTION_LABELS: tuple[str, ...] = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+# FER face crop geometry: boxes are squared, grown by the offsets and cut from a padded frame
+FACE_OFFSETS: tuple[int, int] = (10, 10)
+FACE_PADDING = 40
+FACE_TARGET_SIZE: tuple[int, int] = (64, 64)
+
+
+def _build_fer_mtcnn() -> Any:
+    """Build the FER detector with the MTCNN face finder"""
+    from fer import FER  # Delayed import: pulls in TensorFlow
+
+    return FER(mtcnn=True)
+
+
+class HaarEmotionDetector:
+    """
+    OpenCV Haar cascade face finder in front of the configured emotion engine.
+
+    Faces are searched on a grayscale copy shrunk to `detect_edge` pixels (0 keeps
+    the full frame) and boxes are scaled back before classification. The
+    classifier is only built on the first classification, so face finding works
+    (and can be benchmarked) without it; with EMOTION_ENGINE=onnx this detector
+    never imports TensorFlow.
+    """
+
+    def __init__(self, classifier_factory: DetectorFactory = build_emotion_classifier,
+                 detect_edge: int = 0, scale_factor: float = 1.1,
+                 min_neighbors: int = 5, min_face_size: int = 50) -> None:
+        self.classifier_factory = classifier_factory
+        self.detect_edge = detect_edge
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_face_size = min_face_size
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise ImportError("Haar face detection needs OpenCV 4.x (CascadeClassifier is not in OpenCV 5 core)")
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        self._classifier: Any = None
+
+    @property
+    def classifier(self) -> Any:
+        if self._classifier is None:
+            self._classifier = self.classifier_factory()
+        return self._classifier
+
+    def find_faces(self, img: np.ndarray, bgr: bool = True) -> list[list[int]]:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if bgr else img
+        ratio = 1.0
+        if self.detect_edge and max(gray.shape[:2]) > self.detect_edge:
+            ratio = self.detect_edge / max(gray.shape[:2])
+            gray = cv2.resize(gray, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+        min_size = max(int(self.min_face_size * ratio), 1)
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            flags=cv2.CASCADE_SCALE_IMAGE,
+            minSize=(min_size, min_size),
+        )
+        return [[int(round(v / ratio)) for v in face] for face in faces]
+
+    def _classify_emotions(self, gray_faces: np.ndarray) -> np.ndarray:
+        return classify_faces(self.classifier, gray_faces)
+
+    def detect_emotions(self, img: np.ndarray) -> list[dict]:
+        return batch_detect_emotions(self, [img])[0]
+
+
+def _build_haar_fast() -> HaarEmotionDetector:
+    """Coarse Haar search on a 320px frame: cheapest, misses small/turned faces"""
+    return HaarEmotionDetector(detect_edge=320, scale_factor=1.2, min_neighbors=4, min_face_size=40)
+
+
+def _build_fer_cascade() -> HaarEmotionDetector:
+    """FER's default Haar cascade settings on the full working frame"""
+    return HaarEmotionDetector()
+
+
+class DetectorRegistry:
+    """
+    Process-wide registry of emotion detectors.
+
+    Each registered factory is called at most once per process; later callers
+    receive the same instance. Loading one detector does not block callers of
+    another, and inference on a shared instance is serialized by a per-detector
+    lock because the FER/Keras objects are not safe for concurrent use.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._factories: dict[str, DetectorFactory] = {}
+        self._detectors: dict[str, Any] = {}
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._use_locks: dict[str, threading.Lock] = {}
+        self._stats: dict[str, dict[str, float]] = {}
+
+    def register(self, name: str, factory: DetectorFactory) -> None:
+        """Register (or replace) the factory used to build detector `name`"""
+        with self._lock:
+            self._factories[name] = factory
+            self._detectors.pop(name, None)
+            self._load_locks.setdefault(name, threading.Lock())
+            self._use_locks.setdefault(name, threading.Lock())
+            self._stats[name] = {"loads": 0, "load_seconds": 0.0, "uses": 0}
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return list(self._factories)
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._detectors
+
+    def get(self, name: str | None = None) -> Any:
+        """Return the shared detector `name`, building it on first use"""
+        name = name or default_detector_name()
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"Unknown emotion detector: {name}")
+            detector = self._detectors.get(name)
+            if detector is not None:
+                return detector
+            load_lock = self._load_locks[name]
+            factory = self._factories[name]
+
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                detector = self._detectors.get(name)
+            if detector is not None:
+                return detector
+
+            started = time.perf_counter()
+            detector = factory()
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self._detectors[name] = detector
+                self._stats[name]["loads"] += 1
+                self._stats[name]["load_seconds"] += elapsed
+            metrics.observe(f"detector.{name}.load_seconds", elapsed)
+            logger.info("Loaded emotion detector %s in %.2fs", name, elapsed)
+            return detector
+
+    @contextmanager
+    def use(self, name: str | None = None) -> Iterator[Any]:
+        """Lease the shared detector `name` for one inference call"""
+        name = name or default_detector_name()
+        detector = self.get(name)
+        with self._lock:
+            use_lock = self._use_locks[name]
+            self._stats[name]["uses"] += 1
+        metrics.incr(f"detector.{name}.uses")
+        with use_lock:
+            yield detector
+
+    def unload(self, name: str | None = None) -> None:
+        """Drop loaded instances so the next call rebuilds them"""
+        with self._lock:
+            if name is None:
+                self._detectors.clear()
+            else:
+                self._detectors.pop(name, None)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-detector load time, load count and reuse count"""
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "loaded": name in self._detectors,
+                    "reuses": max(stats["uses"] - stats["loads"], 0),
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+# Latency/accuracy modes accepted by the image endpoint, mapped to registry names
+DETECTOR_MODES: dict[str, str] = {
+    "fast": "haar-fast",
+    "balanced": "fer-cascade",
+    "accurate": "fer-mtcnn",
+}
+
+
+def default_detector_name() -> str:
+    configured = getattr(settings, "EMOTION_DETECTOR", "fer-mtcnn")
+    return DETECTOR_MODES.get(configured, configured)
+
+
+def resolve_detector(mode: str | None) -> str:
+    """Map a request `mode` (or registry name) to a detector name; None means the default"""
+    if not mode:
+        return default_detector_name()
+    mode = mode.strip().lower()
+    if mode in DETECTOR_MODES:
+        return DETECTOR_MODES[mode]
+    if mode in detector_registry.names():
+        return mode
+    raise ValueError(f"Unknown mode '{mode}'. Choose one of: {', '.join(DETECTOR_MODES)}")
+
+
+detector_registry = DetectorRegistry()
+detector_registry.register("haar-fast", _build_haar_fast)
+detector_registry.register("fer-cascade", _build_fer_cascade)
+detector_registry.register("fer-mtcnn", _build_fer_mtcnn)
+metrics.register_provider("detectors", detector_registry.stats)
+
+
+# ---------------------------------------------------------------------------
+# Batched emotion classification
+# ---------------------------------------------------------------------------
+
+def prepare_face(padded_gray: np.ndarray, box: Sequence[int]) -> np.ndarray | None:
+    """Cut one face out of a FER-padded grayscale frame and scale it to [-1, 1]"""
+    x, y, w, h = (int(v) for v in box)
+    # Square the box around its centre, as FER does
+    side = max(w, h)
+    x -= (side - w) // 2
+    y -= (side - h) // 2
+    x1 = max(x - FACE_OFFSETS[0] + FACE_PADDING, 0)
+    y1 = max(y - FACE_OFFSETS[1] + FACE_PADDING, 0)
+    x2 = x + side + FACE_OFFSETS[0] + FACE_PADDING
+    y2 = y + side + FACE_OFFSETS[1] + FACE_PADDING
+    face = padded_gray[y1:y2, x1:x2]
+    if face.size == 0:
+        return None
+    face = cv2.resize(face, FACE_TARGET_SIZE).astype(np.float32)
+    return (face / 255.0 - 0.5) * 2.0
+
+
+def batch_detect_emotions(detector: Any, images: Sequence[np.ndarray]) -> list[list[dict]]:
+    """
+    Run emotion detection for several BGR images with one classifier call.
+
+    Detectors may implement `detect_emotions_batch` themselves. FER instances are
+    split into per-image face finding followed by a single CNN forward pass over
+    every face crop; anything else falls back to one `detect_emotions` per image.
+    """
+    if hasattr(detector, "detect_emotions_batch"):
+        return detector.detect_emotions_batch(list(images))
+    if not (hasattr(detector, "find_faces") and hasattr(detector, "_classify_emotions")):
+        return [detector.detect_emotions(img) for img in images]
+
+    boxes_per_image: list[list[Sequence[int]]] = []
+    crops: list[np.ndarray] = []
+    for img in images:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        padded = cv2.copyMakeBorder(gray, FACE_PADDING, FACE_PADDING, FACE_PADDING,
+                                    FACE_PADDING, cv2.BORDER_CONSTANT)
+        kept = []
+        for box in detector.find_faces(img, bgr=True):
+            face = prepare_face(padded, box)
+            if face is not None:
+                kept.append(box)
+                crops.append(face)
+        boxes_per_image.append(kept)
+
+    if not crops:
+        return [[] for _ in images]
+
+    # FER's classifier wrapper is semi-private but is the only batched entry point;
+    # it takes (faces, height, width) and adds the channel axis itself
+    predictions = detector._classify_emotions(np.stack(crops))
+
+    results: list[list[dict]] = []
+    offset = 0
+    for boxes in boxes_per_image:
+        faces = []
+        for box in boxes:
+            scores = predictions[offset]
+            offset += 1
+            faces.append({
+                "box": [int(v) for v in box],
+                "emotions": {label: round(float(score), 2)
+                             for label, score in zip(EMOTION_LABELS, scores)},
+            })
+        results.append(faces)
+    return results
+
+
+class _PendingItem:
+    """One caller waiting on a micro-batch result"""
+
+    __slots__ = ("item", "enqueued", "done", "result", "error")
+
+    def __init__(self, item: Any) -> None:
+        self.item = item
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class MicroBatcher:
+    """
+    Collects concurrent calls into batches for a single worker thread.
+
+    A batch is dispatched once it holds `max_batch_size` items or the oldest item
+    has waited `max_wait_ms`. `run_batch` receives the list of items and must
+    return one result per item, in order; an exception fails the whole batch.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[list], list],
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0) -> None:
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self._queue: queue.Queue[_PendingItem] = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._worker_pid: int | None = None
+
+    def submit(self, item: Any, timeout: float | None = None) -> Any:
+        """Queue `item` and block until its batch has been processed"""
+        pending = _PendingItem(item)
+        self._ensure_worker()
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"{self.name} batch did not complete in {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork(), so pre-forking servers get one worker per process
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def _collect(self) -> list[_PendingItem]:
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            metrics.incr(f"batch.{self.name}.batches")
+            metrics.observe(f"batch.{self.name}.size", len(batch))
+            for pending in batch:
+                metrics.observe(f"batch.{self.name}.queue_wait_ms", (started - pending.enqueued) * 1000)
+            try:
+                results = self.run_batch([pending.item for pending in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as exc:  # Propagate to every caller in the batch
+                logger.exception("%s batch of %d failed", self.name, len(batch))
+                for pending in batch:
+                    pending.error = exc
+            finally:
+                metrics.observe(f"batch.{self.name}.run_ms", (time.perf_counter() - started) * 1000)
+                for pending in batch:
+                    pending.done.set()
+
+
+_batchers: dict[str, MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def emotion_batcher(name: str | None = None) -> MicroBatcher | None:
+    """Return the micro-batcher for detector `name`, or None when batching is disabled"""
+    max_batch_size = int(getattr(settings, "EMOTION_BATCH_MAX_SIZE", 1))
+    if max_batch_size <= 1:
+        return None
+    name = name or default_detector_name()
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            def run_batch(images: list, _name: str = name) -> list:
+                with detector_registry.use(_name) as detector:
+                    return batch_detect_emotions(detector, images)
+
+            batcher = MicroBatcher(
+                f"emotion.{name}",
+                run_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=float(getattr(settings, "EMOTION_BATCH_MAX_WAIT_MS", 5)),
+            )
+            _batchers[name] = batcher
+        return batcher
+
+
+def detect_emotions(img: np.ndarray, detector_name: str | None = None,
+                    use_sidecar: bool = True) -> list[dict]:
+    """
+    Detect faces and emotions in one BGR image.
+
+    Uses the shared inference sidecar when one is configured and running, and
+    otherwise the in-process detector (micro-batched with other callers when
+    enabled).
+    """
+    if use_sidecar:
+        from .sidecar import SidecarUnavailable, remote_detect_emotions, sidecar_socket_path
+
+        if sidecar_socket_path():
+            try:
+                results = remote_detect_emotions(img, detector_name)
+                metrics.incr("sidecar.client.requests")
+                return results
+            except SidecarUnavailable:
+                metrics.incr("sidecar.client.fallbacks")
+                logger.debug("Inference sidecar unavailable, using in-process detector")
+
+    batcher = emotion_batcher(detector_name)
+    if batcher is not None:
+        return batcher.submit(img, timeout=getattr(settings, "EMOTION_BATCH_TIMEOUT", 30))
+    with detector_registry.use(detector_name) as detector:
+        return detector.detect_emotions(img)
+
+
+def dominant_emotion(emotions: dict[str, float]) -> str:
+    return max(emotions, key=emotions.get)
+
+
+def aggregate_emotions(results: list[dict]) -> dict[str, Any]:
+    """
+    Combine per-face results from one detector pass into a group mood.
+
+    Every face counts equally: the group scores are the mean of the per-face
+    scores and the group emotion is their highest-scoring label.
+    """
+    faces = [
+        {"box": face.get("box"), "emotions": face["emotions"], "emotion": dominant_emotion(face["emotions"])}
+        for face in results
+    ]
+    totals: dict[str, float] = {}
+    for face in faces:
+        for label, score in face["emotions"].items():
+            totals[label] = totals.get(label, 0.0) + float(score)
+    group_scores = {label: round(total / len(faces), 3) for label, total in totals.items()} if faces else {}
+    return {
+        "face_count": len(faces),
+        "faces": faces,
+        "group_emotion": dominant_emotion(group_scores) if group_scores else None,
+        "group_emotions": group_scores,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Result cache for repeated uploads
+# ---------------------------------------------------------------------------
+
+_result_cache: LRUCache | None = None
+_result_cache_lock = threading.Lock()
+
+
+def image_result_cache() -> LRUCache | None:
+    """Return the process-wide image result cache, or None when disabled"""
+    global _result_cache
+    size = int(getattr(settings, "EMOTION_RESULT_CACHE_SIZE", 512))
+    if size <= 0:
+        return None
+    ttl = float(getattr(settings, "EMOTION_RESULT_CACHE_TTL", 300)) or None
+    with _result_cache_lock:
+        if _result_cache is None or (_result_cache.maxsize, _result_cache.ttl) != (size, ttl):
+            _result_cache = LRUCache("image_results", maxsize=size, ttl=ttl)
+        return _result_cache
+
+
+def detect_emotions_cached(img: np.ndarray, detector_name: str | None = None) -> list[dict]:
+    """`detect_emotions` behind a cache keyed on the frame's perceptual hash"""
+    cache = image_result_cache()
+    if cache is None:
+        return detect_emotions(img, detector_name)
+
+    detector_name = detector_name or default_detector_name()
+    frame_hash = dhash(img)
+    key = (detector_name, img.shape[:2], frame_hash)
+
+    # Near-identical re-uploads (re-encoded, re-compressed) differ in a few hash bits
+    max_distance = int(getattr(settings, "EMOTION_RESULT_CACHE_MAX_DISTANCE", 10))
+
+    def similar(candidate: tuple) -> bool:
+        return (candidate[:2] == key[:2]
+                and bin(candidate[2] ^ frame_hash).count("1") <= max_distance)
+
+    results = cache.get(key, match=similar if max_distance > 0 else None)
+    if results is None:
+        results = detect_emotions(img, detector_name)
+        cache.set(key, results)
+    return results
@@ -0,0 +1,95 @@
+"""
+Image Job Queue for Moodify Music Application
+
+Asynchronous image analyses are rows in the ImageJob table. Workers (the
+`run_image_jobs` management command) claim pending rows with a conditional
+UPDATE, so any number of worker processes can share the queue on SQLite or
+PostgreSQL without a separate broker.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import metrics
+from .analysis import ImageAnalysisError, analyze_image
+from .models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+# Pending rows looked at per claim attempt; others may be taken concurrently
+CLAIM_CANDIDATES = 10
+
+
+def claim_next_job() -> ImageJob | None:
+    """Atomically move the oldest pending job to running and return it"""
+    candidates = (ImageJob.objects.filter(status=ImageJob.STATUS_PENDING)
+                  .order_by('created_at').values_list('id', flat=True)[:CLAIM_CANDIDATES])
+    for job_id in list(candidates):
+        claimed = ImageJob.objects.filter(id=job_id, status=ImageJob.STATUS_PENDING).update(
+            status=ImageJob.STATUS_RUNNING, started_at=timezone.now())
+        if claimed:
+            return ImageJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job: ImageJob) -> ImageJob:
+    """Analyse a claimed job's image and store the result or error"""
+    started = time.perf_counter()
+    try:
+        job.result = analyze_image(bytes(job.image or b''), job.detector or None, job.all_faces)
+        job.status = ImageJob.STATUS_DONE
+    except ImageAnalysisError as exc:
+        job.error = str(exc)
+        job.status = ImageJob.STATUS_FAILED
+    except Exception as exc:
+        logger.exception("Image job %s failed", job.id)
+        job.error = str(exc)
+        job.status = ImageJob.STATUS_FAILED
+
+    job.image = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'image', 'finished_at'])
+
+    metrics.incr(f"jobs.{job.status}")
+    metrics.observe("jobs.run_seconds", time.perf_counter() - started)
+    if job.started_at:
+        metrics.observe("jobs.queue_seconds", (job.started_at - job.created_at).total_seconds())
+    return job
+
+
+def requeue_stale_jobs(older_than_seconds: float) -> int:
+    """Return jobs left running by a dead worker to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+    return ImageJob.objects.filter(status=ImageJob.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=ImageJob.STATUS_PENDING, started_at=None)
+
+
+def purge_finished_jobs(older_than_seconds: float) -> int:
+    """Delete finished jobs whose results are older than the retention window"""
+    cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+    deleted, _ = ImageJob.objects.filter(
+        status__in=[ImageJob.STATUS_DONE, ImageJob.STATUS_FAILED], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(poll_interval: float = 0.5, once: bool = False) -> int:
+    """
+    Process jobs until stopped; with `once`, drain the queue and return.
+
+    Returns the number of jobs processed.
+    """
+    processed = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
@@ -0,0 +1,170 @@
+"""
+Precompiled Sentiment Lexicon for Moodify Music Application
+
+A compact re-implementation of the polarity half of TextBlob's pattern
+analyzer. The lexicon (about 2,900 adjectives plus derived "-ly" adverbs) is
+compiled once into a flat hash table of (polarity, intensity, is_modifier)
+tuples, emoticons into a single lookup table, and text is tokenized and scored
+in one pass without TextBlob's per-call objects, sentence splitting and
+subjectivity bookkeeping.
+
+Tokenization and scoring follow pattern's rules (contractions, punctuation
+splitting, abbreviations, emoticons, "(!)", negation, modifiers, "!" boosts),
+so polarity matches `TextBlob(text).sentiment.polarity`; music.tests checks the
+agreement on a mixed corpus.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+
+# Pattern's tokenizer constants (textblob._text)
+PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+LEADING_PUNCTUATION = tuple(PUNCTUATION.replace(".", ""))
+TRAILING_PUNCTUATION = LEADING_PUNCTUATION + (".",)
+NEGATIONS = frozenset(("no", "not", "n't", "never"))
+QUOTES = (("“", " “ "), ("”", " ” "), ("‘", " ‘ "), ("’", " ’ "), ("'", " ' "), ('"', ' " '))
+
+RE_ABBR1 = re.compile(r"^[A-Za-z]\.$")
+RE_ABBR2 = re.compile(r"^([A-Za-z]\.)+$")
+RE_ABBR3 = re.compile("^[A-Z][" + "|".join("bcdfghjklmnpqrstvwxz") + "]+.$")
+RE_SARCASM = re.compile(r"\( ?\! ?\)")
+
+
+class LexiconSentiment:
+    """
+    Flat, precompiled copy of TextBlob's English sentiment lexicon.
+
+    `words` maps a lowercase word to (polarity, intensity, is_modifier);
+    `emoticons` maps a lowercase emoticon to its polarity.
+    """
+
+    def __init__(self, words: dict[str, tuple[float, float, bool]],
+                 emoticons: dict[str, float], abbreviations: frozenset[str],
+                 emoticon_pattern: re.Pattern) -> None:
+        self.words = words
+        self.emoticons = emoticons
+        self.abbreviations = abbreviations
+        self.emoticon_pattern = emoticon_pattern
+
+    @classmethod
+    def from_textblob(cls) -> "LexiconSentiment":
+        """Compile the tables from TextBlob's bundled lexicon (read once)"""
+        from textblob import _text
+        from textblob.en import sentiment
+
+        sentiment.load()
+        words = {}
+        for word, senses in dict.items(sentiment):
+            polarity, _subjectivity, intensity = senses[None]
+            words[word] = (polarity, intensity, "RB" in senses)
+
+        emoticons: dict[str, float] = {}
+        for (_type, polarity), faces in _text.EMOTICONS.items():
+            for face in faces:
+                emoticons.setdefault(face.lower(), polarity)
+        return cls(words, emoticons, frozenset(_text.ABBREVIATIONS), _text.RE_EMOTICONS)
+
+    def tokenize(self, text: str) -> list[str]:
+        """Lowercase tokens as pattern's find_tokens produces them"""
+        text = text.replace("n't", " n't")
+        for quote, spaced in QUOTES:
+            if quote in text:
+                text = text.replace(quote, spaced)
+
+        tokens: list[str] = []
+        append = tokens.append
+        for token in text.split():
+            if token.isalpha():
+                append(token)
+                continue
+            tail = []
+            while token.startswith(LEADING_PUNCTUATION):
+                append(token[0])
+                token = token[1:]
+            while token.endswith(TRAILING_PUNCTUATION):
+                if token.endswith(LEADING_PUNCTUATION):
+                    tail.append(token[-1])
+                    token = token[:-1]
+                if token.endswith("..."):
+                    tail.append("...")
+                    token = token[:-3].rstrip(".")
+                if token.endswith("."):
+                    if (token in self.abbreviations or RE_ABBR1.match(token)
+                            or RE_ABBR2.match(token) or RE_ABBR3.match(token)):
+                        break
+                    tail.append(".")
+                    token = token[:-1]
+            if token:
+                append(token)
+            tokens.extend(reversed(tail))
+
+        joined = " ".join(tokens)
+        # Re-join emoticons and "(!)" that punctuation splitting broke apart
+        if "(" in joined and "!" in joined:
+            joined = RE_SARCASM.sub("(!)", joined)
+        joined = self.emoticon_pattern.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+        return joined.lower().split()
+
+    def polarity(self, text: str) -> float:
+        """Polarity in [-1, 1] of `text`; 0.0 when no sentiment word occurs"""
+        words = self.words
+        assessed: list[list] = []  # [polarity, intensity, negated]
+        modifier = None  # Preceding known modifier word ("very good")
+        negation = None  # Preceding negation ("not good")
+
+        for word in self.tokenize(text):
+            entry = words.get(word)
+            if entry is not None:
+                polarity, intensity, is_modifier = entry
+                if modifier is None:
+                    assessed.append([polarity, intensity, False])
+                else:
+                    last = assessed[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    assessed[-1][1] = 1.0 / assessed[-1][1]
+                    assessed[-1][2] = True
+                modifier = word if is_modifier else None
+                negation = word if word in NEGATIONS else None
+                continue
+
+            if word in NEGATIONS:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                negation = None
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                # "really not good"
+                assessed[-1][2] = True
+                negation = None
+            elif modifier and len(word) > 2:
+                modifier = None
+            if word == "!" and assessed:
+                assessed[-1][0] = max(-1.0, min(assessed[-1][0] * 1.25, 1.0))
+            if word == "(!)":
+                assessed.append([0.0, 1.0, False])
+            if len(word) <= 5 and not word.isalpha() and word not in PUNCTUATION:
+                face = self.emoticons.get(word)
+                if face is not None:
+                    assessed.append([face, 1.0, False])
+
+        if not assessed:
+            return 0.0
+        return sum(-0.5 * p if negated else p for p, _, negated in assessed) / len(assessed)
+
+
+_lexicon: LexiconSentiment | None = None
+_lexicon_lock = threading.Lock()
+
+
+def lexicon() -> LexiconSentiment:
+    """Return the process-wide compiled lexicon, building it on first use"""
+    global _lexicon
+    if _lexicon is not None:
+        return _lexicon
+    with _lexicon_lock:
+        if _lexicon is None:
+            _lexicon = LexiconSentiment.from_textblob()
+        return _lexicon
@@ -0,0 +1,239 @@
+"""
+Django Management Command for Image Inference Benchmarks
+
+Measures decode and face/emotion detection time for large uploads, comparing a
+full-resolution decode against the reduced-scale preprocessing pipeline, and
+the per-request latency of each detector mode (fast / balanced / accurate) and
+the load time, memory and latency of each emotion classifier engine.
+Can be run using 'python manage.py benchmark_inference'.
+"""
+
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from music.imaging import decode_image, max_image_edge
+from music.engines import ENGINES, build_emotion_classifier, classify_faces
+from music.inference import DETECTOR_MODES, default_detector_name, detector_registry
+
+
+def synthetic_photo(width, height):
+    """
+    Build a phone-sized JPEG with smooth gradients and some texture.
+
+    Args:
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+
+    Returns:
+        bytes: JPEG-encoded image
+    """
+    rng = np.random.default_rng(0)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    ys = np.linspace(0, 255, height, dtype=np.float32)
+    img = np.empty((height, width, 3), dtype=np.float32)
+    img[..., 0] = xs[None, :]
+    img[..., 1] = ys[:, None]
+    img[..., 2] = 128
+    img += rng.normal(0, 4, img.shape).astype(np.float32)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    cv2.circle(img, (width // 2, height // 2), min(width, height) // 5, (180, 160, 150), -1)
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+class Command(BaseCommand):
+    """
+    Django management command to benchmark the image inference path.
+
+    Each input is decoded and (optionally) run through the configured detector
+    several times per variant; median timings are reported in milliseconds.
+
+    Usage:
+        python manage.py benchmark_inference [--image PATH ...] [--size 4032x3024]
+                                             [--repeat 5] [--no-detect]
+                                             [--mode fast --mode balanced --mode accurate]
+                                             [--engine fer|onnx]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Benchmark image decode + emotion detection before/after early downscaling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--image', action='append', dest='images',
+                            help='Image file to benchmark (repeatable); defaults to a synthetic photo')
+        parser.add_argument('--size', default='4032x3024',
+                            help='Synthetic photo size as WIDTHxHEIGHT (default 12MP)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per variant')
+        parser.add_argument('--max-edge', type=int, default=None,
+                            help='Longest edge for the fast path (defaults to EMOTION_MAX_IMAGE_EDGE)')
+        parser.add_argument('--detector', default=None, help='Detector name (defaults to EMOTION_DETECTOR)')
+        parser.add_argument('--no-detect', action='store_true', help='Only time decoding')
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(DETECTOR_MODES),
+                            help='Compare detector modes on the fast-path frame instead (repeatable)')
+        parser.add_argument('--engine', choices=ENGINES,
+                            help='Measure one emotion classifier engine (run once per engine: '
+                                 'memory is per process)')
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        if options['engine']:
+            self._run_engine(options['engine'], options['repeat'])
+            return
+
+        inputs = self._load_inputs(options)
+        max_edge = options['max_edge'] if options['max_edge'] is not None else max_image_edge()
+
+        if options['modes']:
+            for label, data in inputs:
+                self.stdout.write(self.style.SUCCESS(f'{label} ({len(data) / 1e6:.1f} MB)'))
+                decode_image(data, max_edge=max_edge)  # Warm-up
+                decode_ms = []
+                for _ in range(max(options['repeat'], 1)):
+                    started = time.perf_counter()
+                    decoded = decode_image(data, max_edge=max_edge)
+                    decode_ms.append((time.perf_counter() - started) * 1000)
+                if decoded is None:
+                    raise CommandError('Image could not be decoded')
+                decode = statistics.median(decode_ms)
+                height, width = decoded.image.shape[:2]
+                self.stdout.write(f'  decode to {width}x{height}: {decode:8.1f} ms')
+                for mode in options['modes']:
+                    self._run_mode(mode, decoded.image, options['repeat'], decode)
+            return
+
+        detector = None
+        detector_name = options['detector'] or default_detector_name()
+        if not options['no_detect']:
+            try:
+                detector = detector_registry.get(detector_name)
+            except ImportError as exc:
+                self.stdout.write(self.style.WARNING(
+                    f'Detector {detector_name} unavailable ({exc}); timing decode only'
+                ))
+
+        variants = [('full decode', 0), (f'fast path (max edge {max_edge})', max_edge)]
+        for label, data in inputs:
+            self.stdout.write(self.style.SUCCESS(f'{label} ({len(data) / 1e6:.1f} MB)'))
+            for variant, edge in variants:
+                self._run_variant(variant, data, edge, detector, options['repeat'])
+
+    def _load_inputs(self, options):
+        if options['images']:
+            inputs = []
+            for path in options['images']:
+                try:
+                    with open(path, 'rb') as handle:
+                        inputs.append((path, handle.read()))
+                except OSError as exc:
+                    raise CommandError(f'Cannot read {path}: {exc}')
+            return inputs
+        try:
+            width, height = (int(v) for v in options['size'].lower().split('x'))
+        except ValueError:
+            raise CommandError('--size must look like 4032x3024')
+        return [(f'synthetic {width}x{height} JPEG', synthetic_photo(width, height))]
+
+    def _run_variant(self, variant, data, max_edge, detector, repeat):
+        decode_ms, detect_ms = [], []
+        decode_image(data, max_edge=max_edge)  # Warm-up: lazy imports and allocator
+        decoded = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            decoded = decode_image(data, max_edge=max_edge)
+            decode_ms.append((time.perf_counter() - started) * 1000)
+            if decoded is None:
+                raise CommandError('Image could not be decoded')
+            if detector is not None:
+                started = time.perf_counter()
+                detector.detect_emotions(decoded.image)
+                detect_ms.append((time.perf_counter() - started) * 1000)
+
+        height, width = decoded.image.shape[:2]
+        decode = statistics.median(decode_ms)
+        line = f'  {variant:<28} frame {width}x{height:<6} decode {decode:8.1f} ms'
+        if detect_ms:
+            detect = statistics.median(detect_ms)
+            line += f'  detect {detect:8.1f} ms  total {decode + detect:8.1f} ms'
+        self.stdout.write(line)
+
+    def _run_mode(self, mode, image, repeat, decode_ms):
+        name = DETECTOR_MODES[mode]
+        try:
+            detector = detector_registry.get(name)
+        except Exception as exc:  # FER reports a missing MTCNN backend with a bare Exception
+            self.stdout.write(self.style.WARNING(f'  {mode:<9} ({name}) unavailable: {exc}'))
+            return
+
+        line = f'  {mode:<9} ({name:<11})'
+        if hasattr(detector, 'find_faces'):
+            detector.find_faces(image)  # Warm-up
+            faces_ms = []
+            for _ in range(max(repeat, 1)):
+                started = time.perf_counter()
+                faces = detector.find_faces(image)
+                faces_ms.append((time.perf_counter() - started) * 1000)
+            line += f' find faces {statistics.median(faces_ms):8.1f} ms ({len(faces)} found)'
+
+        try:
+            detector.detect_emotions(image)  # Warm-up, builds lazy classifiers
+        except ImportError as exc:
+            self.stdout.write(line + f'  classify unavailable: {exc}')
+            return
+        detect_ms = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            detector.detect_emotions(image)
+            detect_ms.append((time.perf_counter() - started) * 1000)
+        detect = statistics.median(detect_ms)
+        self.stdout.write(line + f'  detect {detect:8.1f} ms  full request {decode_ms + detect:8.1f} ms')
+
+    def _run_engine(self, engine, repeat):
+        rss_before = _max_rss_mb()
+        started = time.perf_counter()
+        try:
+            classifier = build_emotion_classifier(engine)
+        except ImportError as exc:
+            raise CommandError(f'Engine {engine} unavailable: {exc}')
+        load_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(
+            f'engine {engine}: load {load_ms:.0f} ms, peak RSS {_max_rss_mb():.0f} MB '
+            f'(+{_max_rss_mb() - rss_before:.0f} MB)'
+        ))
+
+        rng = np.random.default_rng(0)
+        for batch_size in (1, 8, 32):
+            faces = rng.uniform(-1, 1, (batch_size, 64, 64)).astype(np.float32)
+            classify_faces(classifier, faces)  # Warm-up
+            timings = []
+            for _ in range(max(repeat, 1)):
+                started = time.perf_counter()
+                classify_faces(classifier, faces)
+                timings.append((time.perf_counter() - started) * 1000)
+            median = statistics.median(timings)
+            self.stdout.write(f'  batch {batch_size:>2}: {median:8.2f} ms ({median / batch_size:6.2f} ms/face)')
+
+
+def _max_rss_mb():
+    """Peak resident set size of this process in MB (0 where unsupported)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,143 @@
+"""
+Django Management Command for Hot Query Plans
+
+Prints the database query plans of the request-path lookups (mood by name,
+song listing pages, a user's mood history) so index regressions show up in
+review and CI. Supports SQLite (EXPLAIN QUERY PLAN) and PostgreSQL (EXPLAIN,
+optionally ANALYZE). Can be run using 'python manage.py explain_hot_queries'.
+"""
+
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+# Full table scans: SQLite "SCAN <table>" without an index, PostgreSQL "Seq Scan on <table>"
+FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b.*\bINDEX\b)(?:TABLE )?(\w+)|Seq Scan on (\w+)')
+
+
+def _seek(index, sqlite_condition, postgresql_condition):
+    """Plan patterns of a search on `index` constrained by the given condition, per backend"""
+    return {
+        'sqlite': rf'USING (?:COVERING )?INDEX {index} \([^)]*{sqlite_condition}',
+        'postgresql': rf'(?s)Index (?:Only )?Scan using {index} on \w+.*?Index Cond: [^\n]*{postgresql_condition}',
+    }
+
+
+def hot_queries(mood_name, user_id):
+    """
+    The queries behind the hot endpoints, built exactly as the views build them.
+
+    Returns:
+        list[tuple[str, QuerySet, dict]]: (label, queryset, required seek pattern per backend)
+    """
+    from music.models import Mood, UserMood
+    from music.pagination import encode_cursor, song_page_queryset
+
+    # Plans do not depend on the row found; fall back to an id that matches nothing
+    mood = Mood.objects.by_name(mood_name).first() or Mood(pk=0, name=mood_name)
+    limit = min(int(getattr(settings, 'SONGS_PAGE_SIZE', 50)), int(getattr(settings, 'SONGS_MAX_PAGE_SIZE', 200)))
+    return [
+        ('mood by name (/api/songs/)', Mood.objects.by_name(mood_name)[:1],
+         _seek('music_mood_name_ci_idx', r'<expr>=\?', r'lower')),
+        ('song listing, first page', song_page_queryset(mood, None, limit),
+         _seek('music_song_mood_title_idx', r'mood_id=\?', r'mood_id =')),
+        # A next page must seek to the cursor's title, not read the mood's earlier rows
+        ('song listing, next page', song_page_queryset(mood, encode_cursor('M', 0), limit),
+         _seek('music_song_mood_title_idx', r'mood_id=\? AND title>\?', r'mood_id = .*title\)?(?:::text)? >=')),
+        ('mood history of a user', UserMood.objects.filter(user_id=user_id)[:20],
+         _seek('music_usermood_user_ts_idx', r'user_id=\?', r'user_id =')),
+    ]
+
+
+def full_scans(plan):
+    """Tables read with a full scan according to an EXPLAIN output"""
+    return sorted({first or second for first, second in FULL_SCAN.findall(plan)})
+
+
+def missing_seek(plan, expected, vendor):
+    """The required seek pattern when `plan` does not contain it, else None"""
+    pattern = expected[vendor]
+    return None if re.search(pattern, plan) else pattern
+
+
+class Command(BaseCommand):
+    """
+    Django management command to print the query plans of the hot lookups.
+
+    Each query is printed with its SQL and the plan from QuerySet.explain().
+    Tables read with a full scan are listed per query, and so is a plan that
+    lacks the index seek the query is built for (e.g. a song page searched on
+    mood_id alone instead of mood_id and title); --fail-on-scan turns either
+    into an error for CI. PostgreSQL prefers sequential scans on small
+    tables whatever the indexes, so --prefer-index plans with
+    enable_seqscan off (inside a rolled-back transaction) to show whether a
+    usable index exists at all.
+
+    Usage:
+        python manage.py explain_hot_queries [--mood Happy] [--user 1] [--analyze]
+                                             [--prefer-index] [--fail-on-scan]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Print query plans of the hot catalog and history lookups (SQLite and PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mood', default='Happy', help='Mood name used in the lookups')
+        parser.add_argument('--user', type=int, default=1, help='User id used for the mood history')
+        parser.add_argument('--analyze', action='store_true',
+                            help='PostgreSQL: run the queries and report actual rows and timings')
+        parser.add_argument('--prefer-index', action='store_true',
+                            help='PostgreSQL: plan with enable_seqscan off, as for large tables')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit with an error if any query scans a whole table or misses its index seek')
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plans are supported on SQLite and PostgreSQL, not {vendor}')
+        explain_options = {'analyze': True} if options['analyze'] and vendor == 'postgresql' else {}
+
+        problems = {}
+        with transaction.atomic():
+            if options['prefer_index'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for label, queryset, expected in hot_queries(options['mood'], options['user']):
+                plan = queryset.explain(**explain_options)
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(f'  SQL: {queryset.query}')
+                for line in plan.splitlines():
+                    self.stdout.write(f'  {line}')
+                found = []
+                tables = full_scans(plan)
+                if tables:
+                    found.append(f"full scan of {', '.join(tables)}")
+                pattern = missing_seek(plan, expected, vendor)
+                if pattern:
+                    found.append(f'no index seek matching {pattern}')
+                if found:
+                    problems[label] = found
+                    for problem in found:
+                        self.stdout.write(self.style.WARNING(f'  {problem[0].upper()}{problem[1:]}'))
+                self.stdout.write('')
+            # ANALYZE executes the queries; leave nothing behind either way
+            transaction.set_rollback(True)
+
+        if options['fail_on_scan'] and problems:
+            raise CommandError('Query plan regressions in: ' + '; '.join(
+                f"{label} ({', '.join(found)})" for label, found in problems.items()))
+        self.stdout.write(self.style.SUCCESS(f'{vendor}: all hot queries use their index seeks' if not problems else
+                                             f'{vendor}: {len(problems)} queries with plan problems'))
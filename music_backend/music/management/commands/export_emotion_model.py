@@ -0,0 +1,134 @@
+"""
+Django Management Command for Exporting the Emotion Model to ONNX
+
+Converts FER's bundled Keras emotion classifier into an ONNX file for the
+lightweight "onnx" emotion engine. Run once on a machine with TensorFlow,
+fer and tf2onnx installed; serving nodes then only need onnxruntime or OpenCV.
+Can be run using 'python manage.py export_emotion_model'.
+"""
+
+import os
+from importlib import resources
+
+import numpy as np
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PARITY_CROPS = 32
+
+
+def parity_crops(count=PARITY_CROPS, seed=0):
+    """
+    Synthetic 64x64 grayscale crops, from sharp noise to smooth blobs.
+
+    No face photos ship with the repo; the range of textures still drives the
+    classifier to different labels and confidences.
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (count, 64, 64), dtype=np.uint8)
+    return np.stack([cv2.GaussianBlur(crop, (0, 0), sigma)
+                     for crop, sigma in zip(noise, np.linspace(0.5, 4, count))])
+
+
+def fer_input(crops):
+    """uint8 crops scaled to [-1, 1], as FER prepares faces for its classifier"""
+    return (crops.astype(np.float32) / 255.0 - 0.5) * 2.0
+
+
+def flatten_squeeze(model):
+    """
+    Replace the Squeeze after global average pooling with an equivalent Flatten.
+
+    OpenCV DNN (4.14) squeezes (faces, 7, 1, 1) to (faces, 1, 7), so the
+    following Softmax runs over a single value and every score comes out 1.0.
+    Flatten gives the same (faces, 7) in onnxruntime and OpenCV.
+    """
+    from onnx import helper
+
+    for index, node in enumerate(model.graph.node):
+        if node.op_type == 'Squeeze':
+            flatten = helper.make_node('Flatten', [node.input[0]], list(node.output), name=node.name, axis=1)
+            model.graph.node[index].CopyFrom(flatten)
+            unused = set(node.input[1:])
+            kept = [init for init in model.graph.initializer if init.name not in unused]
+            del model.graph.initializer[:]
+            model.graph.initializer.extend(kept)
+    return model
+
+
+class Command(BaseCommand):
+    """
+    Django management command to export FER's emotion CNN to ONNX.
+
+    The exported graph keeps FER's input layout (faces, 64, 64, 1) with a
+    dynamic batch axis, so crops prepared for FER can be fed to it directly.
+    --parity-fixture also records FER's scores on fixed synthetic crops;
+    the tests compare the committed model against them without fer.
+
+    Usage:
+        python manage.py export_emotion_model [--output PATH] [--opset 13]
+                                              [--parity-fixture music/testdata/emotion_parity.npz]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = "Export FER's emotion classifier to ONNX for EMOTION_ENGINE=onnx"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=getattr(settings, 'EMOTION_ONNX_MODEL', ''),
+                            help='Destination .onnx path (defaults to EMOTION_ONNX_MODEL, '
+                                 'music/ml_models/emotion_model.onnx)')
+        parser.add_argument('--opset', type=int, default=13, help='ONNX opset version')
+        parser.add_argument('--parity-fixture',
+                            help="Also save FER's scores on synthetic crops to this .npz for the parity test")
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        output = options['output']
+        if not output:
+            raise CommandError('No output path; pass --output or set EMOTION_ONNX_MODEL')
+
+        try:
+            import onnx
+            import tensorflow as tf
+            import tf2onnx
+        except ImportError as exc:
+            raise CommandError(f'Export needs tensorflow and tf2onnx installed ({exc})')
+
+        try:
+            source = resources.files('fer') / 'data' / 'emotion_model.hdf5'
+        except ModuleNotFoundError:
+            raise CommandError('fer is not installed; it ships the source Keras model')
+
+        with resources.as_file(source) as model_path:
+            model = tf.keras.models.load_model(str(model_path), compile=False)
+
+        spec = (tf.TensorSpec((None, 64, 64, 1), tf.float32, name='faces'),)
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        exported, _ = tf2onnx.convert.from_keras(model, input_signature=spec, opset=options['opset'])
+        onnx.save(flatten_squeeze(exported), output)
+
+        size_kb = os.path.getsize(output) / 1024
+        self.stdout.write(self.style.SUCCESS(f'Exported emotion model to {output} ({size_kb:.0f} KB)'))
+
+        if options['parity_fixture']:
+            from fer import FER
+
+            crops = parity_crops()
+            scores = np.asarray(FER()._classify_emotions(fer_input(crops)), dtype=np.float32)
+            os.makedirs(os.path.dirname(os.path.abspath(options['parity_fixture'])), exist_ok=True)
+            np.savez_compressed(options['parity_fixture'], crops=crops, fer_scores=scores)
+            self.stdout.write(self.style.SUCCESS(
+                f"Recorded FER scores for {len(crops)} crops to {options['parity_fixture']}"))
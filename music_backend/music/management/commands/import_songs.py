@@ -0,0 +1,248 @@
+"""
+Django Management Command for Bulk Song Catalog Import
+
+Streams a CSV or JSONL song catalog (or stdin) into the database with batched
+upserts on the (title, artist) natural key, in constant memory, for loading
+catalogs far larger than the get_or_create seeders handle. Can be run using
+'python manage.py import_songs catalog.csv --create-moods'.
+"""
+
+import csv
+import json
+import sys
+import time
+from collections import defaultdict
+from functools import lru_cache
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+SONG_FIELDS = ('title', 'artist', 'album', 'mood', 'spotify_url', 'preview_url', 'cover_image_url')
+# Columns an import may overwrite on existing songs; only with non-blank input values
+UPDATE_FIELDS = ['album', 'mood', 'spotify_url', 'preview_url', 'cover_image_url']
+MAX_REPORTED_ERRORS = 50
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (record number, row dict, error) per input record, lazily.
+
+    CSV needs a header row; JSONL lines must be objects. Unreadable lines
+    yield an error instead of stopping the import.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        missing = {'title', 'artist'} - set(reader.fieldnames or [])
+        if missing:
+            raise CommandError(f"CSV input has no {', '.join(sorted(missing))} column")
+        for number, row in enumerate(reader, start=1):
+            yield number, row, None
+        return
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f'Invalid JSON: {exc}'
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, 'Expected a JSON object.'
+
+
+@lru_cache(maxsize=None)
+def _max_length(field):
+    from music.models import Song
+
+    return Song._meta.get_field(field).max_length if field != 'mood' else None
+
+
+def clean_row(row):
+    """
+    Normalize one input row to Song field values.
+
+    Returns:
+        tuple[dict | None, str | None]: (values with 'mood' as a name or None, error)
+    """
+    values = {}
+    for field in SONG_FIELDS:
+        value = row.get(field)
+        value = str(value).strip() if value is not None else ''
+        max_length = _max_length(field)
+        if max_length and len(value) > max_length:
+            return None, f'{field} is longer than {max_length} characters.'
+        values[field] = value or None
+    if not values['title'] or not values['artist']:
+        return None, 'title and artist are required.'
+    return values, None
+
+
+class Command(BaseCommand):
+    """
+    Django management command to import a song catalog in bulk.
+
+    Input is read in chunks of --chunk-size records. Each chunk is written in
+    one transaction with bulk_create upserts of --batch-size rows: new
+    (title, artist) pairs are inserted and existing songs get the album, mood
+    and URLs the input gives them. Missing or blank columns leave the stored
+    values alone, so a title,artist-only file never clears moods or links.
+    The last occurrence wins when a chunk repeats a song. Mood names resolve
+    case-insensitively through a map loaded once; unknown moods are row
+    errors unless --create-moods is given, and new moods are inserted in the
+    transaction of the chunk that first names them. --dry-run reads and
+    validates everything without writing.
+
+    bulk_create sends no model signals, so after each chunk commits the
+    command bumps every mood's revision and retires the cached catalog
+    responses itself. An upsert can move a song out of a mood the input
+    never names.
+
+    Usage:
+        python manage.py import_songs INPUT|- [--format csv|jsonl] [--batch-size 1000]
+                                      [--chunk-size 10000] [--create-moods] [--dry-run]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Stream a CSV/JSONL song catalog into the database with batched upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="CSV or JSONL file, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (default: from the file extension, jsonl for stdin)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk upsert statement')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per transaction')
+        parser.add_argument('--create-moods', action='store_true',
+                            help='Create moods named in the input that do not exist yet')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the input without writing')
+        parser.add_argument('--progress-every', type=float, default=5,
+                            help='Seconds between progress reports on stderr (0 disables)')
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        if options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--batch-size and --chunk-size must be at least 1')
+
+        fmt = options['format'] or ('csv' if options['input'].lower().endswith('.csv') else 'jsonl')
+        if options['input'] == '-':
+            source = sys.stdin
+        else:
+            try:
+                source = open(options['input'], newline='', encoding='utf-8')
+            except OSError as exc:
+                raise CommandError(f"Cannot read {options['input']}: {exc}")
+        try:
+            self._run(read_rows(source, fmt), options)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+    def _run(self, records, options):
+        from music import catalog
+        from music.models import Mood, Song
+
+        dry_run = options['dry_run']
+        moods = {mood.name.lower(): mood for mood in Mood.objects.all()}
+        stats = {'rows': 0, 'imported': 0, 'merged': 0, 'errors': 0, 'moods_created': 0}
+
+        def error(number, message):
+            stats['errors'] += 1
+            if stats['errors'] <= MAX_REPORTED_ERRORS:
+                self.stderr.write(f'record {number}: {message}')
+
+        new_moods = []  # Created by the current chunk, saved in its transaction
+
+        def resolve(name):
+            key = name.lower()
+            if key not in moods and options['create_moods']:
+                moods[key] = Mood(name=name)
+                new_moods.append(moods[key])
+                stats['moods_created'] += 1
+            return moods.get(key)
+
+        started = last_report = time.monotonic()
+        while True:
+            chunk = list(islice(records, options['chunk_size']))
+            if not chunk:
+                break
+            stats['rows'] += len(chunk)
+            songs = {}  # (title, artist) -> Song; repeats within a chunk collapse to the last
+            for number, row, problem in chunk:
+                values, problem = clean_row(row) if problem is None else (None, problem)
+                if problem is None and values['mood']:
+                    values['mood'] = resolve(values['mood'])
+                    if values['mood'] is None:
+                        problem = f"Unknown mood: {row.get('mood')!r} (use --create-moods)"
+                if problem is not None:
+                    error(number, problem)
+                    continue
+                key = (values['title'], values['artist'])
+                stats['merged'] += key in songs
+                songs[key] = Song(**values)
+
+            if not dry_run and (songs or new_moods):
+                try:
+                    with transaction.atomic():
+                        # Songs pick up the new moods' primary keys when they are saved
+                        Mood.objects.bulk_create(new_moods)
+                        self._upsert(songs.values(), options['batch_size'])
+                        # Stands in for the post_save signals bulk_create skips
+                        catalog.touch_moods([mood.pk for mood in moods.values()])
+                        transaction.on_commit(lambda: catalog.invalidate(catalog.MOODS))
+                except Exception:
+                    for mood in new_moods:
+                        moods.pop(mood.name.lower(), None)
+                    raise
+            new_moods.clear()
+            stats['imported'] += len(songs)
+
+            if options['progress_every'] and time.monotonic() - last_report >= options['progress_every']:
+                last_report = time.monotonic()
+                self._report(stats, started, dry_run)
+        self._report(stats, started, dry_run, final=True)
+
+    def _upsert(self, songs, batch_size):
+        """
+        Insert or update songs, overwriting only the columns each row has values for.
+
+        Rows are grouped by their set of non-blank UPDATE_FIELDS, one upsert
+        per group; rows with none of them only insert new songs.
+        """
+        from music.models import Song
+
+        groups = defaultdict(list)
+        for song in songs:
+            present = tuple(field for field in UPDATE_FIELDS if getattr(song, field) is not None)
+            groups[present].append(song)
+        for present, rows in groups.items():
+            if present:
+                Song.objects.bulk_create(rows, batch_size=batch_size, update_conflicts=True,
+                                         unique_fields=['title', 'artist'], update_fields=list(present))
+            else:
+                Song.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+
+    def _report(self, stats, started, dry_run, final=False):
+        elapsed = time.monotonic() - started
+        rate = stats['rows'] / elapsed if elapsed else 0.0
+        line = (f"{stats['rows']} rows read, {stats['imported']} songs "
+                f"{'validated' if dry_run else 'upserted'} ({stats['merged']} repeats merged, "
+                f"{stats['errors']} errors, {stats['moods_created']} moods "
+                f"{'to create' if dry_run else 'created'}) in {elapsed:.1f}s, {rate:.0f} rows/s")
+        if final and stats['errors'] > MAX_REPORTED_ERRORS:
+            self.stderr.write(f"({stats['errors'] - MAX_REPORTED_ERRORS} more errors not shown)")
+        self.stderr.write(self.style.SUCCESS(line) if final else line)
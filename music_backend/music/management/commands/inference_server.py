@@ -0,0 +1,78 @@
+"""
+Django Management Command for the Local Inference Sidecar
+
+Starts a daemon that loads the emotion detectors once and serves every Django
+worker on the host over a Unix socket. Can be run using
+'python manage.py inference_server --socket /run/moodify/inference.sock'.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from music.inference import default_detector_name, detector_registry
+from music.sidecar import InferenceServer
+
+
+class Command(BaseCommand):
+    """
+    Django management command to run the shared inference daemon.
+
+    Workers use the daemon when EMOTION_SIDECAR_SOCKET points at the same socket
+    path, and fall back to in-process inference whenever it is not running.
+
+    Usage:
+        python manage.py inference_server [--socket PATH] [--detector NAME ...]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Run the local emotion inference daemon shared by all Django workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=getattr(settings, 'EMOTION_SIDECAR_SOCKET', ''),
+            help='Unix socket path to listen on (defaults to EMOTION_SIDECAR_SOCKET)',
+        )
+        parser.add_argument(
+            '--detector',
+            action='append',
+            dest='detectors',
+            help='Detector to preload before accepting connections (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Preloads the requested detectors so the first worker request does not
+        pay for model loading, then serves until interrupted.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        socket_path = options['socket']
+        if not socket_path:
+            raise CommandError('No socket path given; pass --socket or set EMOTION_SIDECAR_SOCKET')
+
+        for name in options['detectors'] or [default_detector_name()]:
+            if name not in detector_registry.names():
+                raise CommandError(f'Unknown detector: {name}')
+            detector_registry.get(name)
+            stats = detector_registry.stats()[name]
+            self.stdout.write(self.style.SUCCESS(
+                f'Loaded detector {name} in {stats["load_seconds"]:.2f}s'
+            ))
+
+        server = InferenceServer(socket_path)
+        self.stdout.write(self.style.SUCCESS(f'Inference sidecar listening on {socket_path}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Shutting down inference sidecar')
+        finally:
+            server.server_close()
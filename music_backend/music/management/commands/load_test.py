@@ -0,0 +1,165 @@
+"""
+Django Management Command for Load Testing the API
+
+Sends concurrent requests to a running Moodify server and reports throughput,
+latency percentiles and status codes, e.g. to compare the sync (WSGI) and
+native async (ASGI, ASYNC_VIEWS=True) deployments. Can be run using
+'python manage.py load_test --url http://127.0.0.1:8000 --endpoint image --concurrency 16'.
+"""
+
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = {
+    'moods': ('GET', '/api/moods/'),
+    'songs': ('GET', '/api/songs/?mood=Happy'),
+    'text': ('POST', '/api/detect-text-mood/'),
+    'image': ('POST', '/api/detect-image-emotion/'),
+}
+
+
+def multipart_body(fields, files):
+    """Encode form fields and (name, filename, bytes) files as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, data in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class Command(BaseCommand):
+    """
+    Django management command to load test a running API server.
+
+    Image requests upload --image or a synthetic photo; --vary-image prepares a
+    slightly different copy per request so the server's result cache never hits.
+
+    Usage:
+        python manage.py load_test [--url URL] [--endpoint moods|songs|text|image]
+                                   [--concurrency 16] [--requests 200] [--image PATH]
+                                   [--mode fast] [--vary-image]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Send concurrent requests to a running server and report throughput and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='moods')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=200, help='Total requests to send')
+        parser.add_argument('--image', help='Image to upload for --endpoint image')
+        parser.add_argument('--mode', default='', help='Detector mode for image requests')
+        parser.add_argument('--text', default='I am feeling awesome today!', help='Text for --endpoint text')
+        parser.add_argument('--vary-image', action='store_true',
+                            help='Upload a different copy per request so the result cache never hits')
+        parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout (seconds)')
+
+    def _images(self, options):
+        """Encoded upload(s), prepared before timing starts"""
+        import cv2
+        import numpy as np
+
+        from music.management.commands.benchmark_inference import synthetic_photo
+
+        if options['image']:
+            with open(options['image'], 'rb') as handle:
+                data = handle.read()
+        else:
+            data = synthetic_photo(1280, 960)
+        if not options['vary_image']:
+            return [data]
+
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        height, width = img.shape[:2]
+        images = []
+        for index in range(options['requests']):
+            variant = img.copy()
+            # A bright block in a different place changes the perceptual hash
+            x, y = (index * 37) % max(1, width - 64), (index * 53) % max(1, height - 64)
+            variant[y:y + 64, x:x + 64] = 255
+            ok, encoded = cv2.imencode('.jpg', variant)
+            images.append(encoded.tobytes())
+        return images
+
+    def _build_request(self, options, images, index):
+        method, path = ENDPOINTS[options['endpoint']]
+        url = options['url'].rstrip('/') + path
+        if options['endpoint'] == 'text':
+            body = json.dumps({'text': options['text']}).encode()
+            return urllib.request.Request(url, body, {'Content-Type': 'application/json'}, method=method)
+        if options['endpoint'] == 'image':
+            image = images[index % len(images)]
+            fields = {'mode': options['mode']} if options['mode'] else {}
+            body, content_type = multipart_body(fields, [('image', 'load.jpg', image)])
+            return urllib.request.Request(url, body, {'Content-Type': content_type}, method=method)
+        return urllib.request.Request(url, method=method)
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency and --requests must be at least 1')
+
+        images = self._images(options) if options['endpoint'] == 'image' else []
+        latencies = []
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def send(index):
+            request = self._build_request(options, images, index)
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                    response.read()
+                    code = response.status
+            except urllib.error.HTTPError as exc:
+                code = exc.code
+            except (urllib.error.URLError, OSError) as exc:
+                code = type(exc).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[code] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(send, range(options['requests'])))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{options['endpoint']}: {options['requests']} requests, concurrency {options['concurrency']}, "
+            f"{wall:.2f}s"
+        )
+        self.stdout.write(
+            f"  throughput {options['requests'] / wall:.1f} req/s   latency p50 "
+            f"{statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms"
+        )
+        self.stdout.write('  status codes: ' + ', '.join(f'{code}: {count}' for code, count in sorted(
+            statuses.items(), key=lambda item: str(item[0]))))
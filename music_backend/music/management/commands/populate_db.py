@@ -57,10 +57,11 @@ class Command(BaseCommand):
 
         for song_data in songs:
             mood = Mood.objects.get(name=song_data['mood'])
+            # (title, artist) is unique; an existing song keeps its current mood
             song, created = Song.objects.get_or_create(
                 title=song_data['title'],
                 artist=song_data['artist'],
-                mood=mood
+                defaults={'mood': mood}
             )
             if created:
                 self.stdout.write(
@@ -0,0 +1,121 @@
+"""
+Django Management Command for Asynchronous Image Jobs
+
+Runs a pool of worker processes that take queued image analyses (uploads sent
+with async=1) from the database and store their results for polling at
+/api/image-jobs/<id>/. Can be run using 'python manage.py run_image_jobs --workers 4'.
+"""
+
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _worker_main(poll_interval, detectors):
+    """Entry point of each spawned worker; loads its detectors once, then polls"""
+    import django
+
+    django.setup()
+    from django.db import connections
+
+    from music.inference import detector_registry
+    from music.jobs import work
+
+    for name in detectors:
+        detector_registry.get(name)
+    try:
+        work(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """
+    Django management command to process queued image analysis jobs.
+
+    Each worker is a separate process with its own detector, so analyses run in
+    parallel on multi-core hosts. Jobs left running by a worker that died are
+    requeued at startup, and old results can be purged at the same time.
+
+    Usage:
+        python manage.py run_image_jobs [--workers 2] [--poll-interval 0.5] [--once]
+                                        [--stale-after 600] [--purge-after 86400]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Process asynchronous image emotion jobs with a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes to run')
+        parser.add_argument('--poll-interval', type=float, default=0.5,
+                            help='Seconds to wait before checking an empty queue again')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue in this process and exit')
+        parser.add_argument('--stale-after', type=float, default=600,
+                            help='Requeue jobs that have been running longer than this (seconds)')
+        parser.add_argument('--purge-after', type=float, default=0,
+                            help='Delete finished jobs older than this (seconds, 0 keeps them)')
+        parser.add_argument('--detector', action='append', dest='detectors',
+                            help='Detector each worker preloads before polling (repeatable)')
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        from django.db import connections
+
+        from music import jobs
+        from music.inference import default_detector_name, detector_registry
+
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        detectors = options['detectors'] or [default_detector_name()]
+        for name in detectors:
+            if name not in detector_registry.names():
+                raise CommandError(f'Unknown detector: {name}')
+
+        requeued = jobs.requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+        if options['purge_after'] > 0:
+            purged = jobs.purge_finished_jobs(options['purge_after'])
+            self.stdout.write(f'Purged {purged} finished job(s)')
+
+        if options['once']:
+            processed = jobs.work(once=True)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
+            return
+
+        # Spawned (not forked) children: each opens its own DB connection and model
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(target=_worker_main, args=(options['poll_interval'], detectors),
+                            name=f'image-job-worker-{index}', daemon=True)
+            for index in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(
+            f'Started {len(workers)} image job worker(s) for {", ".join(detectors)}'
+        ))
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Shutting down image job workers')
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
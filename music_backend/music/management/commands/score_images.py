@@ -0,0 +1,271 @@
+"""
+Django Management Command for Bulk Image Emotion Scoring
+
+Runs the image endpoint's detection over a directory tree or a manifest of
+image paths without going through HTTP, for offline evaluation, and streams
+one CSV or JSONL row per image. Can be run using
+'python manage.py score_images photos/ --output emotions.csv --workers 4'.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+CSV_FIELDS = ['path', 'width', 'height', 'face_count', 'emotion', 'group_emotion', 'error']
+
+_detector = None  # Per worker process, loaded once by _init_worker
+
+
+def _init_worker(detector_name):
+    """Pool initializer: set up Django and load the detector once per process"""
+    import django
+
+    django.setup()
+    global _detector
+    _detector = _load_detector(detector_name)
+
+
+def _load_detector(detector_name):
+    from music.inference import detector_registry
+    from music.warmup import warm_detector
+
+    # Haar detectors build their classifier lazily; warming fails fast on a missing model
+    warm_detector(detector_name)
+    return detector_registry.get(detector_name)
+
+
+def _detect_batch(images):
+    """Runs in pool workers: (face results per image, seconds spent)"""
+    from music.inference import batch_detect_emotions
+
+    started = time.perf_counter()
+    results = batch_detect_emotions(_detector, images)
+    return results, time.perf_counter() - started
+
+
+def iter_image_paths(source, manifest=False):
+    """
+    Yield image paths under a directory (sorted, recursive) or listed in a manifest.
+
+    Manifest lines are paths relative to the manifest's directory; blank lines
+    and lines starting with '#' are skipped.
+    """
+    if manifest:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding='utf-8') as handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield os.path.join(base, line)
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def read_image(path):
+    """Runs in reader threads: (path, DecodedImage or None, error, seconds)"""
+    from music.imaging import ImageTooLarge, decode_image
+
+    started = time.perf_counter()
+    try:
+        with open(path, 'rb') as handle:
+            decoded = decode_image(handle.read())
+        error = None if decoded is not None else 'Invalid image file.'
+    except (OSError, ImageTooLarge) as exc:
+        decoded, error = None, str(exc)
+    return path, decoded, error, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    """
+    Django management command to score a folder of images offline.
+
+    Reader threads read and decode images at the working resolution
+    (EMOTION_MAX_IMAGE_EDGE), since OpenCV releases the GIL while decoding.
+    Decoded frames go to worker processes in batches of --batch-size, so each
+    batch shares one classifier call. Every worker loads the detector once at
+    startup. A bounded number of reads and batches is in flight at any time,
+    and rows are written in input order as batches finish. Face boxes are
+    reported in original image coordinates, as the endpoint reports them.
+
+    Usage:
+        python manage.py score_images DIRECTORY | --manifest FILE [--output PATH]
+                                      [--format csv|jsonl] [--mode fast|balanced|accurate]
+                                      [--workers N] [--readers 4] [--batch-size 8]
+                                      [--all-faces]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Score emotions for a directory or manifest of images with reader threads and worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory to walk, or a manifest file with --manifest')
+        parser.add_argument('--manifest', action='store_true',
+                            help='Treat SOURCE as a file listing one image path per line')
+        parser.add_argument('--output', default='-', help="Output file (default '-': stdout)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Output format (default: from the output extension, jsonl for stdout)')
+        parser.add_argument('--mode', default='', help='Detector mode or name (default EMOTION_DETECTOR)')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Inference processes (default: one per CPU core; 1 runs in-process)')
+        parser.add_argument('--readers', type=int, default=4, help='Reader/decoder threads')
+        parser.add_argument('--batch-size', type=int, default=8, help='Images per inference task')
+        parser.add_argument('--all-faces', action='store_true',
+                            help='Include every face and the group mood (JSONL: full per-face results)')
+        parser.add_argument('--progress-every', type=float, default=10,
+                            help='Seconds between progress reports on stderr (0 disables)')
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        from music.inference import resolve_detector
+
+        if options['readers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--readers and --batch-size must be at least 1')
+        if options['manifest'] and not os.path.isfile(options['source']):
+            raise CommandError(f"Manifest not found: {options['source']}")
+        if not options['manifest'] and not os.path.isdir(options['source']):
+            raise CommandError(f"Not a directory: {options['source']} (use --manifest for a file list)")
+        try:
+            detector_name = resolve_detector(options['mode'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        output_format = options['format'] or ('csv' if options['output'].lower().endswith('.csv') else 'jsonl')
+        workers = options['workers'] or os.cpu_count() or 1
+
+        pool = None
+        try:
+            if workers > 1:
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=_init_worker, initargs=(detector_name,))
+            else:
+                global _detector
+                _detector = _load_detector(detector_name)
+        except Exception as exc:
+            raise CommandError(f'Cannot load detector {detector_name}: {exc}')
+
+        sink = self.stdout if options['output'] == '-' else open(options['output'], 'w', newline='',
+                                                                   encoding='utf-8')
+        try:
+            self._run(iter_image_paths(options['source'], options['manifest']), sink, output_format,
+                      pool, workers, detector_name, options)
+        except BrokenProcessPool as exc:
+            # Usually the initializer failing to load the detector in a worker
+            raise CommandError(f'Worker processes failed ({detector_name}): {exc}')
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if sink is not self.stdout:
+                sink.close()
+
+    def _decoded(self, paths, readers):
+        """read_image results in input order, with at most 2 * readers reads in flight"""
+        with ThreadPoolExecutor(max_workers=readers, thread_name_prefix='score-images-reader') as pool:
+            pending = deque(pool.submit(read_image, path) for path in islice(paths, 2 * readers))
+            while pending:
+                yield pending.popleft().result()
+                for path in islice(paths, 1):
+                    pending.append(pool.submit(read_image, path))
+
+    def _run(self, paths, sink, output_format, pool, workers, detector_name, options):
+        from music.imaging import remap_boxes
+        from music.inference import aggregate_emotions, dominant_emotion
+
+        writer = csv.DictWriter(sink, CSV_FIELDS, extrasaction='ignore') if output_format == 'csv' else None
+        if writer is not None:
+            writer.writeheader()
+
+        stats = {'images': 0, 'errors': 0, 'faces': 0, 'decode': 0.0, 'detect': 0.0}
+
+        def write(batch, results, seconds):
+            stats['detect'] += seconds
+            detected = iter(results)
+            for path, decoded, error in batch:
+                row = {'path': path}
+                faces = []
+                if decoded is not None:
+                    row['width'], row['height'] = decoded.original_size
+                    faces = remap_boxes(next(detected), decoded.scale)
+                    if not faces:
+                        error = 'No face or emotion detected.'
+                if error:
+                    row['error'] = error
+                    stats['errors'] += 1
+                else:
+                    row['emotion'] = dominant_emotion(faces[0]['emotions'])
+                    row['face_count'] = len(faces)
+                    if options['all_faces']:
+                        row.update(aggregate_emotions(faces))
+                stats['images'] += 1
+                stats['faces'] += len(faces)
+                if writer is not None:
+                    writer.writerow(row)
+                else:
+                    sink.write(json.dumps(row) + '\n')
+            sink.flush()
+
+        started = last_report = time.perf_counter()
+        pending = deque()  # (batch, future) in input order
+        batch = []
+
+        def submit(batch):
+            images = [decoded.image for _, decoded, _ in batch if decoded is not None]
+            if pool is None:
+                write(batch, *_detect_batch(images))
+                return
+            pending.append((batch, pool.submit(_detect_batch, images)))
+            while len(pending) >= 2 * workers:
+                done, future = pending.popleft()
+                write(done, *future.result())
+
+        for path, decoded, error, seconds in self._decoded(paths, options['readers']):
+            stats['decode'] += seconds
+            batch.append((path, decoded, error))
+            if len(batch) == options['batch_size']:
+                submit(batch)
+                batch = []
+            if options['progress_every'] and time.perf_counter() - last_report >= options['progress_every']:
+                last_report = time.perf_counter()
+                self.stderr.write(f"{stats['images']} images scored, "
+                                  f"{stats['images'] / (last_report - started):.1f} images/s")
+        if batch:
+            submit(batch)
+        while pending:
+            done, future = pending.popleft()
+            write(done, *future.result())
+
+        wall = time.perf_counter() - started
+        images = stats['images']
+        self.stderr.write(self.style.SUCCESS(
+            f"{images} images ({stats['errors']} errors, {stats['faces']} faces) with {detector_name} "
+            f"in {wall:.1f}s: {images / wall if wall else 0:.1f} images/s"
+        ))
+        if images:
+            self.stderr.write(
+                f"  read+decode {stats['decode'] / images * 1000:.1f} ms/image across {options['readers']} "
+                f"reader(s), detection {stats['detect'] / images * 1000:.1f} ms/image across "
+                f"{workers if pool else 1} worker(s)"
+            )
@@ -0,0 +1,158 @@
+"""
+Django Management Command for Startup Import Profiling
+
+Starts a fresh interpreter with `python -X importtime`, runs django.setup()
+and imports the URLconf (or other modules), and reports where the cold-start
+time goes: per phase, per top-level package and per module. Can fail when
+heavy libraries load at startup or a time budget is exceeded, so CI catches
+cold-start regressions. Can be run using 'python manage.py startup_profile'.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that only the inference and sentiment code paths should load
+HEAVY_MODULES = ('numpy', 'cv2', 'PIL', 'textblob', 'nltk', 'tensorflow', 'fer', 'onnxruntime')
+
+PROFILE_SCRIPT = """
+import importlib, json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+phases = {"django.setup()": time.perf_counter() - started}
+for name in sys.argv[1:]:
+    mark = time.perf_counter()
+    importlib.import_module(name)
+    phases["import " + name] = time.perf_counter() - mark
+print(json.dumps({"phases": phases, "modules": sorted(sys.modules)}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse `-X importtime` lines into (module, self_us, cumulative_us, depth) tuples.
+
+    Depth 0 entries are imports made directly by the profiled code; their
+    cumulative times add up to the total import time.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+class Command(BaseCommand):
+    """
+    Django management command to profile process startup imports.
+
+    The profile runs in a subprocess, so modules already imported by this
+    command do not hide their cost. Reports the time spent in django.setup()
+    and each requested import, the self time of every top-level package, the
+    slowest modules, and which HEAVY_MODULES were loaded.
+
+    Usage:
+        python manage.py startup_profile [--module music.urls ...] [--top 15]
+                                         [--fail-on-heavy] [--budget-ms 500] [--json]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Report an import-time breakdown of process startup (django.setup() + URLconf)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', action='append', dest='modules',
+                            help='Module to import after django.setup() (repeatable, default ROOT_URLCONF)')
+        parser.add_argument('--top', type=int, default=15, help='Packages and modules to list')
+        parser.add_argument('--fail-on-heavy', action='store_true',
+                            help=f'Exit with an error if any of {", ".join(HEAVY_MODULES)} is imported')
+        parser.add_argument('--budget-ms', type=float, default=0,
+                            help='Exit with an error if total import time exceeds this (0 = no budget)')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def profile(self, modules):
+        """
+        Run the profile script in a fresh interpreter.
+
+        Args:
+            modules (list[str]): Modules to import after django.setup()
+
+        Returns:
+            dict: phases (seconds), loaded modules and parsed importtime entries
+        """
+        from django.conf import settings
+
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE))
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT, *modules],
+            capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR),
+        )
+        if completed.returncode != 0:
+            raise CommandError(f'Profiled startup failed:\n{completed.stderr[-2000:]}')
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['entries'] = parse_importtime(completed.stderr)
+        return result
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        from django.conf import settings
+
+        modules = options['modules'] or [settings.ROOT_URLCONF]
+        result = self.profile(modules)
+        entries = result['entries']
+
+        total_ms = sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+        packages = defaultdict(int)
+        for name, self_us, _, _ in entries:
+            packages[name.split('.')[0]] += self_us
+        loaded = set(result['modules'])
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+        slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:options['top']]
+
+        report = {
+            'total_ms': round(total_ms, 1),
+            'phases_ms': {phase: round(seconds * 1000, 1) for phase, seconds in result['phases'].items()},
+            'modules_imported': len(entries),
+            'heavy_modules': heavy,
+            'packages_ms': {name: round(us / 1000, 1) for name, us in
+                            sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options['top']]},
+            'slowest_modules_ms': {name: round(self_us / 1000, 1) for name, self_us, _, _ in slowest},
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(f"Startup imports: {report['total_ms']:.1f} ms across "
+                              f"{report['modules_imported']} modules")
+            for phase, ms in report['phases_ms'].items():
+                self.stdout.write(f'  {phase:<40} {ms:8.1f} ms')
+            self.stdout.write('Self time by top-level package:')
+            for name, ms in report['packages_ms'].items():
+                self.stdout.write(f'  {name:<40} {ms:8.1f} ms')
+            self.stdout.write('Slowest modules (self time):')
+            for name, ms in report['slowest_modules_ms'].items():
+                self.stdout.write(f'  {name:<40} {ms:8.1f} ms')
+            self.stdout.write('Heavy modules loaded: ' + (', '.join(heavy) or 'none'))
+
+        if options['fail_on_heavy'] and heavy:
+            raise CommandError(f"Heavy modules imported at startup: {', '.join(heavy)}")
+        if options['budget_ms'] and total_ms > options['budget_ms']:
+            raise CommandError(f"Startup imports took {total_ms:.1f} ms (budget {options['budget_ms']:.0f} ms)")
@@ -0,0 +1,232 @@
+"""
+Django Management Command for Bulk Text Mood Tagging
+
+Streams a JSONL or CSV corpus (or stdin) through the text mood pipeline and
+writes one result per record as it goes, for backfilling mood labels without
+the HTTP endpoint. Can be run using
+'python manage.py tag_text_moods notes.jsonl --output moods.jsonl --checkpoint moods.ckpt'.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+OUTPUT_FIELDS = ['id', 'mood', 'polarity', 'error']
+
+
+def read_records(stream, fmt, text_field, id_field):
+    """
+    Yield (id, text, error) per input record, lazily.
+
+    JSONL lines are objects or bare strings; records without `id_field` are
+    identified by their 1-based record number. Unreadable lines yield an error
+    instead of stopping the run.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        if text_field not in (reader.fieldnames or []):
+            raise CommandError(f"CSV input has no '{text_field}' column")
+        for number, row in enumerate(reader, start=1):
+            yield row.get(id_field) or number, row[text_field] or '', None
+        return
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, '', f'Invalid JSON: {exc}'
+            continue
+        if isinstance(record, dict):
+            text = record.get(text_field)
+            yield record.get(id_field, number), text if isinstance(text, str) else '', None
+        else:
+            yield number, record if isinstance(record, str) else '', None
+
+
+def load_checkpoint(path):
+    """Number of input records already written, 0 without a checkpoint"""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as handle:
+        return int(json.load(handle)['offset'])
+
+
+def save_checkpoint(path, offset):
+    # Written beside the target and renamed, so a crash never leaves a torn file
+    temp = f'{path}.tmp'
+    with open(temp, 'w') as handle:
+        json.dump({'offset': offset}, handle)
+    os.replace(temp, path)
+
+
+class Command(BaseCommand):
+    """
+    Django management command to tag a text corpus with moods.
+
+    Records are read and scored in chunks: at most two chunks per worker
+    process are in flight, and results are written in input order as each
+    chunk finishes, so memory stays constant however large the input is.
+    Texts are scored whole with TEXT_SENTIMENT_ENGINE and labelled with
+    polarity_to_mood, as the batch text endpoint does.
+
+    With --checkpoint, the number of records written is saved after every
+    chunk; a rerun with the same checkpoint skips them and appends to
+    --output. A crash between writing a chunk and saving the checkpoint can
+    repeat that chunk's records on resume.
+
+    Usage:
+        python manage.py tag_text_moods INPUT|- [--format jsonl|csv] [--output PATH]
+                                        [--text-field text] [--id-field id]
+                                        [--workers N] [--chunk-size 1000]
+                                        [--checkpoint PATH] [--offset N]
+
+    Attributes:
+        help (str): Description shown in Django management command help
+    """
+    help = 'Stream a JSONL/CSV text corpus through the mood pipeline with a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="JSONL or CSV file, or '-' for stdin")
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help='Input format (default: from the file extension, jsonl for stdin)')
+        parser.add_argument('--output', default='-', help="Output file (default '-': stdout)")
+        parser.add_argument('--output-format', choices=['jsonl', 'csv'],
+                            help='Output format (default: the input format)')
+        parser.add_argument('--text-field', default='text', help='Field or column holding the text')
+        parser.add_argument('--id-field', default='id', help='Field or column holding the record id')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Scoring processes (default TEXT_BATCH_WORKERS; 1 scores in-process)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Records per scoring task')
+        parser.add_argument('--checkpoint', help='File recording progress, used to resume')
+        parser.add_argument('--offset', type=int,
+                            help='Skip this many input records (overrides the checkpoint)')
+        parser.add_argument('--progress-every', type=float, default=5,
+                            help='Seconds between progress reports on stderr (0 disables)')
+
+    def handle(self, *args, **options):
+        """
+        Main execution method for the management command.
+
+        Args:
+            *args: Positional arguments (unused)
+            **options: Keyword arguments from command line options
+
+        Returns:
+            None
+        """
+        from music.sentiment import batch_workers, sentiment_engine
+
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        try:
+            engine = sentiment_engine()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        fmt = options['format'] or ('csv' if options['input'].lower().endswith('.csv') else 'jsonl')
+        output_format = options['output_format'] or fmt
+        offset = options['offset'] if options['offset'] is not None else load_checkpoint(options['checkpoint'])
+        workers = options['workers'] or batch_workers()
+
+        if options['input'] == '-':
+            source = sys.stdin
+        else:
+            try:
+                source = open(options['input'], newline='', encoding='utf-8')
+            except OSError as exc:
+                raise CommandError(f"Cannot read {options['input']}: {exc}")
+        if options['output'] == '-':
+            sink = self.stdout
+        else:
+            # Appending on resume keeps the records written before the checkpoint
+            sink = open(options['output'], 'a' if offset else 'w', newline='', encoding='utf-8')
+
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            self._run(read_records(source, fmt, options['text_field'], options['id_field']),
+                      sink, output_format, engine, pool, workers, offset, options)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if source is not sys.stdin:
+                source.close()
+            if sink is not self.stdout:
+                sink.close()
+
+    def _run(self, records, sink, output_format, engine, pool, workers, offset, options):
+        from music.sentiment import polarity_to_mood, score_chunk
+
+        writer = None
+        if output_format == 'csv':
+            writer = csv.DictWriter(sink, OUTPUT_FIELDS)
+            if not offset:
+                writer.writeheader()
+
+        def write(chunk, polarities):
+            scored = iter(polarities)
+            for record_id, text, error in chunk:
+                result = {'id': record_id}
+                if error or not text.strip():
+                    result['error'] = error or 'No text provided.'
+                else:
+                    polarity = next(scored)
+                    result.update(mood=polarity_to_mood(polarity), polarity=polarity)
+                if writer is not None:
+                    writer.writerow(result)
+                else:
+                    sink.write(json.dumps(result) + '\n')
+            sink.flush()
+
+        # Resume: records before the offset are read and dropped, never scored
+        records = islice(records, offset, None)
+        done = offset
+        started = last_report = time.monotonic()
+        pending = deque()  # (chunk, future) in input order
+
+        def commit(chunk, polarities):
+            nonlocal done
+            write(chunk, polarities)
+            done += len(chunk)
+            if options['checkpoint']:
+                save_checkpoint(options['checkpoint'], done)
+
+        while True:
+            chunk = list(islice(records, options['chunk_size']))
+            if not chunk:
+                break
+            texts = [text.strip() for _, text, error in chunk if not error and text.strip()]
+            if pool is None:
+                commit(chunk, score_chunk(texts, engine))
+            else:
+                pending.append((chunk, pool.submit(score_chunk, texts, engine)))
+                while len(pending) >= 2 * workers:
+                    chunk, future = pending.popleft()
+                    commit(chunk, future.result())
+            if options['progress_every'] and time.monotonic() - last_report >= options['progress_every']:
+                last_report = time.monotonic()
+                self._report(done, offset, started)
+        while pending:
+            chunk, future = pending.popleft()
+            commit(chunk, future.result())
+        self._report(done, offset, started, final=True)
+
+    def _report(self, done, offset, started, final=False):
+        elapsed = time.monotonic() - started
+        rate = (done - offset) / elapsed if elapsed else 0.0
+        line = f'{done - offset} records tagged ({done} total) in {elapsed:.1f}s, {rate:.0f} records/s'
+        self.stderr.write(self.style.SUCCESS(line) if final else line)
+
@@ -0,0 +1,71 @@
+"""
+In-process Metrics for Moodify Music Application
+
+Thread-safe counters and timing summaries shared by the inference, caching and
+admission layers. Values live in the worker process and are exposed as JSON
+through the /api/metrics/ endpoint.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_summaries: dict[str, dict[str, float]] = {}
+_providers: dict[str, Callable[[], Any]] = {}
+
+
+def incr(name: str, amount: float = 1) -> None:
+    """Increase the counter `name` by `amount`"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def set_value(name: str, value: float) -> None:
+    """Store an absolute value (gauge) under `name`"""
+    with _lock:
+        _counters[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """Record one sample in the count/sum/min/max summary `name`"""
+    with _lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            _summaries[name] = {"count": 1, "sum": value, "min": value, "max": value}
+            return
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["min"] = min(summary["min"], value)
+        summary["max"] = max(summary["max"], value)
+
+
+def register_provider(name: str, provider: Callable[[], Any]) -> None:
+    """Attach a callable whose return value is included in every snapshot"""
+    with _lock:
+        _providers[name] = provider
+
+
+def snapshot() -> dict[str, Any]:
+    """Return a JSON-serializable copy of all counters, summaries and providers"""
+    with _lock:
+        counters = dict(_counters)
+        summaries = {
+            name: {**summary, "avg": summary["sum"] / summary["count"]}
+            for name, summary in _summaries.items()
+        }
+        providers = dict(_providers)
+
+    data: dict[str, Any] = {"counters": counters, "summaries": summaries}
+    for name, provider in providers.items():
+        data[name] = provider()
+    return data
+
+
+def reset() -> None:
+    """Clear counters and summaries (providers stay registered)"""
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:34
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0004_mood_revision'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mood',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='music_mood_name_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['mood', 'title', 'id'], name='music_song_mood_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermood',
+            index=models.Index(fields=['user', '-timestamp'], name='music_usermood_user_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:35
+
+from django.db import migrations, models
+
+
+def check_duplicate_songs(apps, schema_editor):
+    # Fail with the offending rows rather than a bare IntegrityError; merging
+    # duplicates is left to the operator
+    Song = apps.get_model('music', 'Song')
+    duplicates = list(
+        Song.objects.values('title', 'artist').annotate(copies=models.Count('id'))
+        .filter(copies__gt=1).values_list('title', 'artist')[:10]
+    )
+    if duplicates:
+        listed = '; '.join(f'{title!r} by {artist!r}' for title, artist in duplicates)
+        raise RuntimeError(f'Songs must be unique on (title, artist) before this migration: {listed}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_songs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='song',
+            constraint=models.UniqueConstraint(fields=('title', 'artist'), name='music_song_title_artist_uniq'),
+        ),
+    ]
@@ -3,8 +3,22 @@ Django Models for Moodify Music Recommendation System
 Defines database structure for moods, songs, user profiles, and mood logging
 """
 
+import uuid
+
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class MoodQuerySet(models.QuerySet):
+    """Mood lookups shaped to use the case-insensitive name index"""
+
+    def by_name(self, name: str) -> "MoodQuerySet":
+        # LOWER(name) = LOWER(%s) matches the expression index on both SQLite and
+        # PostgreSQL; name__iexact compiles to LIKE / UPPER() and scans instead
+        return self.alias(name_lower=Lower("name")).filter(name_lower=Lower(Value(name.strip())))
 
 
 class Mood(models.Model):
@@ -14,11 +28,20 @@ class Mood(models.Model):
     """
     name: str = models.CharField(max_length=50, unique=True)
     description: str = models.TextField(blank=True, null=True)
+    # Bumped with updated_at whenever the mood or its songs change; the catalog
+    # views derive ETag/Last-Modified from them (see music/catalog.py)
+    revision: int = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = MoodQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Mood"
         verbose_name_plural = "Moods"
         ordering = ['name']
+        indexes = [
+            models.Index(Lower("name"), name="music_mood_name_ci_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -50,6 +73,14 @@ class Song(models.Model):
         verbose_name = "Song"
         verbose_name_plural = "Songs"
         ordering = ['title']
+        indexes = [
+            # Song listings filter on mood and page on (title, id)
+            models.Index(fields=["mood", "title", "id"], name="music_song_mood_title_idx"),
+        ]
+        constraints = [
+            # Natural key of catalog imports (import_songs upserts on it)
+            models.UniqueConstraint(fields=["title", "artist"], name="music_song_title_artist_uniq"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} by {self.artist}"
@@ -90,6 +121,49 @@ class UserMood(models.Model):
         verbose_name = "User Mood Log"
         verbose_name_plural = "User Mood Logs"
         ordering = ['-timestamp']  # Most recent first
+        indexes = [
+            models.Index(fields=["user", "-timestamp"], name="music_usermood_user_ts_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} was {self.mood.name} on {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ImageJob(models.Model):
+    """
+    Queued image emotion analysis (detect-image-emotion with async=1)
+    Holds the upload until a run_image_jobs worker claims it, then the result
+    """
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status: str = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    detector: str = models.CharField(max_length=50)
+    all_faces: bool = models.BooleanField(default=False)
+
+    # Encoded upload; cleared once the job has run
+    image = models.BinaryField(null=True)
+    result = models.JSONField(null=True, blank=True)
+    error: str = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Image Job"
+        verbose_name_plural = "Image Jobs"
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self) -> str:
+        return f"Image job {self.id} ({self.status})"
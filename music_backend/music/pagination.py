@@ -0,0 +1,94 @@
+"""
+Keyset Pagination for Moodify Music Application
+
+Song listings are paged on (title, id) instead of OFFSET: each page is one
+range query that seeks the (mood, title, id) index to the last row of the
+previous page instead of counting past the rows before it, and rows
+inserted meanwhile never shift a page. The position travels as an opaque cursor; the next page's URL is
+sent in a `Link: <...>; rel="next"` header so the response body stays a
+plain list.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Sequence
+
+from django.conf import settings
+from django.db.models import F, Q, QuerySet
+from django.http import HttpRequest
+
+from .models import Mood, Song
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed cursor or page size"""
+
+
+def encode_cursor(title: str, pk: int) -> str:
+    raw = json.dumps([title, pk], ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        title, pk = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest("Invalid cursor.")
+    if not isinstance(title, str) or not isinstance(pk, int):
+        raise InvalidPageRequest("Invalid cursor.")
+    return title, pk
+
+
+def page_size(request: HttpRequest) -> int:
+    """`limit` query parameter, defaulting to SONGS_PAGE_SIZE and capped at SONGS_MAX_PAGE_SIZE"""
+    default = int(getattr(settings, "SONGS_PAGE_SIZE", 50))
+    cap = int(getattr(settings, "SONGS_MAX_PAGE_SIZE", 200))
+    value = request.GET.get("limit", "").strip()
+    if not value:
+        return min(default, cap)
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidPageRequest("'limit' must be a positive integer.")
+    if limit < 1:
+        raise InvalidPageRequest("'limit' must be a positive integer.")
+    return min(limit, cap)
+
+
+def song_page_queryset(mood: Mood, cursor: str | None, limit: int) -> QuerySet:
+    """
+    One page of `mood`'s songs plus one look-ahead row, in a single query.
+
+    Rows carry a `mood_name` annotation (joined in the same query) for
+    SongListSerializer; the extra row only tells whether a next page exists.
+    """
+    songs = (Song.objects.filter(mood=mood)
+             .annotate(mood_name=F("mood__name"))
+             .order_by("title", "id"))
+    if cursor:
+        title, pk = decode_cursor(cursor)
+        # title__gte bounds the index range so the database seeks to the cursor; the OR
+        # alone is only applied as a filter after a search on mood_id
+        songs = songs.filter(Q(title__gt=title) | Q(title=title, id__gt=pk), title__gte=title)
+    return songs[:limit + 1]
+
+
+def split_page(rows: Sequence[Song], limit: int) -> tuple[Sequence[Song], str | None]:
+    """(page rows, cursor of the next page or None on the last page)"""
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.title, last.pk)
+
+
+def next_page_headers(request: HttpRequest, cursor: str | None) -> dict[str, Any]:
+    """`Link` header pointing at the next page, or no headers on the last page"""
+    if cursor is None:
+        return {}
+    query = request.GET.copy()
+    query["cursor"] = cursor
+    url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+    return {"Link": f'<{url}>; rel="next"'}
@@ -0,0 +1,288 @@
+"""
+Text Sentiment Scoring for Moodify Music Application
+
+Polarity scoring shared by the single and batch text mood endpoints, with two
+engines selected by TEXT_SENTIMENT_ENGINE:
+
+- "textblob": TextBlob's pattern analyzer, called directly (the analyzer
+  `TextBlob(text).sentiment` uses) without building a TextBlob per text
+- "lexicon": the precompiled lexicon in music.lexicon, several times faster
+  and matching TextBlob's polarity within a tested tolerance
+
+Single texts go through a polarity cache keyed on normalized text (local LRU,
+optionally backed by a shared Django cache); large batches, and long texts split
+into sentence chunks, are spread across a pool of worker processes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+from django.conf import settings
+
+from . import metrics
+from .caching import LRUCache
+
+MOOD_MAP: list[tuple[float, str]] = [
+    (0.3, "Happy"),
+    (0.1, "Energetic"),
+    (0.0, "Calm"),
+    (-0.1, "Sad"),
+]
+
+
+def polarity_to_mood(polarity: float) -> str:
+    for threshold, label in MOOD_MAP:
+        if polarity >= threshold:
+            return label
+    return "Party"
+
+
+SENTIMENT_ENGINES = ("textblob", "lexicon")
+
+
+def sentiment_engine() -> str:
+    engine = getattr(settings, "TEXT_SENTIMENT_ENGINE", "textblob")
+    if engine not in SENTIMENT_ENGINES:
+        raise ValueError(f"Unknown sentiment engine '{engine}'. Choose one of: {', '.join(SENTIMENT_ENGINES)}")
+    return engine
+
+
+def _textblob_polarity(text: str) -> float:
+    from textblob.en import sentiment  # Delayed import: loads the pattern lexicon
+
+    return sentiment(text)[0]
+
+
+def _lexicon_polarity(text: str) -> float:
+    from .lexicon import lexicon
+
+    return lexicon().polarity(text)
+
+
+_SCORERS = {"textblob": _textblob_polarity, "lexicon": _lexicon_polarity}
+
+
+def text_polarity(text: str, engine: str | None = None) -> float:
+    """Polarity in [-1, 1] with `engine` (defaults to TEXT_SENTIMENT_ENGINE)"""
+    return _SCORERS[engine or sentiment_engine()](text)
+
+
+def score_chunk(texts: list[str], engine: str) -> list[float]:
+    """
+    Polarity of each text with the named `engine` ("textblob" or "lexicon").
+
+    Picklable and settings-free, so it is the unit of work for process pools
+    (score_texts, tag_text_moods); each worker keeps its own analyzer state.
+    """
+    score = _SCORERS[engine]
+    return [score(text) for text in texts]
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def batch_workers() -> int:
+    return int(getattr(settings, "TEXT_BATCH_WORKERS", 0)) or (os.cpu_count() or 1)
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A pool inherited through fork belongs to the parent; start a fresh one
+        if _pool is None or _pool_pid != os.getpid():
+            import multiprocessing
+
+            _pool = ProcessPoolExecutor(max_workers=batch_workers(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def score_texts(texts: Iterable[str], parallel_min: int | None = None) -> list[float]:
+    """
+    Score many texts with shared analyzer state.
+
+    Batches of at least `parallel_min` texts (default TEXT_BATCH_PARALLEL_MIN) are
+    split into one chunk per worker process; smaller batches are scored in the
+    calling thread.
+    """
+    texts = list(texts)
+    engine = sentiment_engine()
+    workers = batch_workers()
+    if parallel_min is None:
+        parallel_min = int(getattr(settings, "TEXT_BATCH_PARALLEL_MIN", 2000))
+    if workers <= 1 or len(texts) < parallel_min:
+        return score_chunk(texts, engine)
+
+    size = -(-len(texts) // workers)
+    chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+    polarities: list[float] = []
+    for chunk_result in _process_pool().map(score_chunk, chunks, [engine] * len(chunks)):
+        polarities.extend(chunk_result)
+    return polarities
+
+
+# Folded without changing polarity: runs of whitespace and a single period ending the
+# text ("..." and "!" do change the score). Case and quotes and ,;? at word edges are
+# folded only in text without any other period: TextBlob tokenizes abbreviations by
+# case ("very Mr. nice" scores 0.4, "very mr. nice" 0.78)
+_FINAL_PERIOD = re.compile(r"(?<![.])\.$")
+_EDGE_PUNCTUATION = re.compile(r"""(?:^|(?<=\s))["'“”‘’]+|["'“”‘’,;?]+(?=\s|$)""")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key form of `text`: "I'm  Happy." and "i'm happy" normalize alike"""
+    text = _FINAL_PERIOD.sub("", " ".join(text.split()))
+    if "." in text:
+        return text
+    return " ".join(_EDGE_PUNCTUATION.sub("", text.lower()).split())
+
+
+_polarity_cache: LRUCache | None = None
+_polarity_cache_lock = threading.Lock()
+
+
+def polarity_cache() -> LRUCache | None:
+    """Return the process-wide text polarity cache, or None when disabled"""
+    global _polarity_cache
+    size = int(getattr(settings, "TEXT_POLARITY_CACHE_SIZE", 4096))
+    if size <= 0:
+        return None
+    ttl = float(getattr(settings, "TEXT_POLARITY_CACHE_TTL", 3600)) or None
+    with _polarity_cache_lock:
+        if _polarity_cache is None or (_polarity_cache.maxsize, _polarity_cache.ttl) != (size, ttl):
+            _polarity_cache = LRUCache("text_polarity", maxsize=size, ttl=ttl)
+        return _polarity_cache
+
+
+def _shared_cache():
+    alias = getattr(settings, "TEXT_POLARITY_SHARED_CACHE", "")
+    if not alias:
+        return None
+    from django.core.cache import caches
+
+    return caches[alias]
+
+
+def cached_text_polarity(text: str) -> float:
+    """
+    `text_polarity` behind the normalized-text cache.
+
+    Looks in the local LRU first, then in the shared Django cache named by
+    TEXT_POLARITY_SHARED_CACHE (when set), and fills both on a miss.
+    """
+    engine = sentiment_engine()
+    local, shared = polarity_cache(), _shared_cache()
+    if local is None and shared is None:
+        return text_polarity(text, engine)
+
+    normalized = normalize_text(text)
+    polarity = local.get((engine, normalized)) if local is not None else None
+    if polarity is not None:
+        return polarity
+
+    if shared is not None:
+        shared_key = f"moodify:polarity:{engine}:{hashlib.sha1(normalized.encode()).hexdigest()}"
+        polarity = shared.get(shared_key)
+        metrics.incr(f"cache.text_polarity.shared_{'misses' if polarity is None else 'hits'}")
+    if polarity is None:
+        polarity = text_polarity(text, engine)
+        if shared is not None:
+            shared.set(shared_key, polarity, timeout=getattr(settings, "TEXT_POLARITY_CACHE_TTL", 3600) or None)
+    if local is not None:
+        local.set((engine, normalized), polarity)
+    return polarity
+
+
+class TextTooLong(ValueError):
+    """Input exceeds TEXT_MAX_LENGTH characters"""
+
+
+def max_text_length() -> int:
+    return int(getattr(settings, "TEXT_MAX_LENGTH", 20000))
+
+
+def check_text_length(text: str) -> None:
+    limit = max_text_length()
+    if limit > 0 and len(text) > limit:
+        raise TextTooLong(f"Text is longer than {limit} characters.")
+
+
+# Whitespace after sentence-final punctuation (optionally closed by a quote or
+# bracket), and line breaks
+_SENTENCE_BREAK = re.compile(r"""(?:(?<=[.!?…])|(?<=[.!?…]["'”’)\]]))\s+|\s*\n\s*""")
+
+
+def split_chunks(text: str, size: int) -> list[tuple[int, int]]:
+    """
+    (start, end) offsets of consecutive sentences in `text`, packed into chunks
+    of at most `size` characters. A sentence longer than `size` is cut at the
+    last space that fits, or at `size` when it has none.
+    """
+    sentences: list[tuple[int, int]] = []
+    start = 0
+    for match in [*_SENTENCE_BREAK.finditer(text), None]:
+        end = match.start() if match else len(text)
+        while end - start > size:
+            cut = text.rfind(" ", start + 1, start + size + 1)
+            if cut <= start:
+                cut = start + size
+            sentences.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+        if end > start:
+            sentences.append((start, end))
+        if match:
+            start = match.end()
+
+    chunks: list[tuple[int, int]] = []
+    for start, end in sentences:
+        if chunks and end - chunks[-1][0] <= size:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+
+def analyze_text(text: str, include_chunks: bool = False) -> dict:
+    """
+    Mood and polarity of `text` as returned by the text mood endpoint.
+
+    Texts longer than TEXT_CHUNK_SIZE characters are split at sentence
+    boundaries into chunks of at most that size, scored (in the worker pool once
+    there are TEXT_CHUNK_PARALLEL_MIN chunks) and combined into a polarity
+    weighted by chunk length; shorter texts are scored whole through the
+    polarity cache. With `include_chunks` the payload lists every chunk's
+    offsets, mood and polarity. Raises TextTooLong above TEXT_MAX_LENGTH.
+    """
+    check_text_length(text)
+    size = int(getattr(settings, "TEXT_CHUNK_SIZE", 1000))
+    if size <= 0 or len(text) <= size:
+        polarity = cached_text_polarity(text)
+        chunks = [(0, len(text), polarity)]
+    else:
+        spans = split_chunks(text, size)
+        parallel_min = int(getattr(settings, "TEXT_CHUNK_PARALLEL_MIN", 8))
+        polarities = score_texts((text[start:end] for start, end in spans), parallel_min)
+        chunks = [(start, end, p) for (start, end), p in zip(spans, polarities)]
+        polarity = (sum((end - start) * p for start, end, p in chunks)
+                    / sum(end - start for start, end, _ in chunks))
+        metrics.incr("text.chunked")
+        metrics.observe("text.chunks", len(chunks))
+
+    payload = {"mood": polarity_to_mood(polarity), "polarity": polarity}
+    if include_chunks:
+        payload["chunks"] = [
+            {"start": start, "end": end, "mood": polarity_to_mood(p), "polarity": p}
+            for start, end, p in chunks
+        ]
+    return payload
@@ -14,7 +14,7 @@ class MoodSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Mood
-        fields: str = '__all__'
+        fields: list = ['id', 'name', 'description']
 
 
 class SongSerializer(serializers.ModelSerializer):
@@ -28,3 +28,11 @@ class SongSerializer(serializers.ModelSerializer):
     class Meta:
         model = Song
         fields: str = '__all__'
+
+
+class SongListSerializer(SongSerializer):
+    """
+    Song listing serializer reading the mood name from a `mood_name` annotation
+    Same output as SongSerializer without a Mood lookup per row
+    """
+    mood = serializers.CharField(source='mood_name', read_only=True, allow_null=True)
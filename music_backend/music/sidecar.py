@@ -0,0 +1,172 @@
+"""
+Local Inference Sidecar for Moodify Music Application
+
+A small daemon (started with `python manage.py inference_server`) holds the
+emotion models once per host and serves decoded images to every Django worker
+over a Unix domain socket. Workers fall back to in-process inference when the
+socket is not configured or the daemon is not running.
+
+Wire format (both directions): a 4-byte big-endian length, a JSON header of that
+length, then `header["nbytes"]` bytes of raw payload (the image pixels for
+requests, nothing for responses).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+from typing import Any
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class SidecarUnavailable(Exception):
+    """Raised when the inference daemon cannot be reached"""
+
+
+def _json_default(value: Any) -> Any:
+    # FER hands back numpy scalars and arrays inside its result dicts
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        chunk = sock.recv_into(view[received:], size - received)
+        if not chunk:
+            raise ConnectionError("Inference sidecar connection closed mid-message")
+        received += chunk
+    return buffer
+
+
+def send_message(sock: socket.socket, header: dict[str, Any], payload: memoryview | bytes = b"") -> None:
+    header = {**header, "nbytes": len(payload)}
+    encoded = json.dumps(header, default=_json_default).encode("utf-8")
+    sock.sendall(_LENGTH.pack(len(encoded)) + encoded)
+    if len(payload):
+        sock.sendall(payload)
+
+
+def recv_message(sock: socket.socket) -> tuple[dict[str, Any], bytearray]:
+    (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Inference sidecar header too large: {length} bytes")
+    header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    payload = _recv_exact(sock, int(header.get("nbytes", 0)))
+    return header, payload
+
+
+# ---------------------------------------------------------------------------
+# Client side (Django workers)
+# ---------------------------------------------------------------------------
+
+def sidecar_socket_path() -> str:
+    return getattr(settings, "EMOTION_SIDECAR_SOCKET", "") or ""
+
+
+def remote_detect_emotions(img: np.ndarray, detector_name: str | None = None,
+                           socket_path: str | None = None) -> list[dict]:
+    """Send one decoded BGR image to the sidecar and return its detection results"""
+    socket_path = socket_path or sidecar_socket_path()
+    if not socket_path or not hasattr(socket, "AF_UNIX"):
+        raise SidecarUnavailable("Inference sidecar is not configured")
+
+    img = np.ascontiguousarray(img)
+    header = {"op": "detect", "detector": detector_name, "shape": list(img.shape), "dtype": str(img.dtype)}
+    timeout = float(getattr(settings, "EMOTION_SIDECAR_TIMEOUT", 30))
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except OSError as exc:  # Missing socket file or no listener
+            raise SidecarUnavailable(str(exc)) from exc
+        try:
+            send_message(sock, header, memoryview(img).cast("B"))
+            response, _ = recv_message(sock)
+        except (OSError, ValueError) as exc:  # Daemon died, hung past the timeout or sent garbage
+            raise SidecarUnavailable(f"Inference sidecar exchange failed: {exc}") from exc
+
+    if "error" in response:
+        raise RuntimeError(f"Inference sidecar error: {response['error']}")
+    return response["results"]
+
+
+# ---------------------------------------------------------------------------
+# Server side (inference daemon)
+# ---------------------------------------------------------------------------
+
+class _InferenceHandler(socketserver.BaseRequestHandler):
+    """Serves detect requests on one client connection until it closes"""
+
+    def handle(self) -> None:
+        from .inference import detect_emotions
+
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, ValueError):
+                return
+            try:
+                if header.get("op") == "ping":
+                    send_message(self.request, {"ok": True})
+                    continue
+                img = np.frombuffer(payload, dtype=np.dtype(header["dtype"])).reshape(header["shape"])
+                results = detect_emotions(img, header.get("detector"), use_sidecar=False)
+                metrics.incr("sidecar.server.requests")
+                send_message(self.request, {"results": results})
+            except Exception as exc:  # Report to the worker instead of dropping the connection
+                logger.exception("Inference sidecar request failed")
+                send_message(self.request, {"error": str(exc)})
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server; concurrent requests share the process-wide detectors"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str) -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Stale socket from a previous run
+        super().__init__(socket_path, _InferenceHandler)
+        os.chmod(socket_path, 0o660)
+        self.socket_path = socket_path
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def ping(socket_path: str | None = None) -> bool:
+    """Return True when a sidecar is listening on the configured socket"""
+    socket_path = socket_path or sidecar_socket_path()
+    if not socket_path or not hasattr(socket, "AF_UNIX"):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1)
+            sock.connect(socket_path)
+            send_message(sock, {"op": "ping"})
+            response, _ = recv_message(sock)
+            return bool(response.get("ok"))
+    except (OSError, ValueError):
+        return False
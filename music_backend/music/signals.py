@@ -2,13 +2,17 @@
 Django Signal Handlers for Moodify Music Application
 
 This module contains signal handlers that automatically respond to Django model events.
-Manages user profile creation and updates when User model instances are saved.
+Manages user profile creation and updates when User model instances are saved, and
+retires cached catalog responses and bumps mood revisions when Mood and Song rows change.
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from django.utils import timezone
+from . import catalog
+from .models import Mood, Profile, Song
 
 
 @receiver(post_save, sender=User)
@@ -44,3 +48,81 @@ def save_user_profile(sender, instance, **kwargs):
         **kwargs: Additional keyword arguments from the signal
     """
     instance.profile.save()
+
+
+@receiver(pre_save, sender=Mood)
+def bump_mood_revision(sender, instance, **kwargs):
+    """
+    Advance a Mood's revision and updated_at as it is saved.
+
+    Args:
+        sender (Model): The model class that sent the signal (Mood)
+        instance (Mood): The Mood instance being saved
+        **kwargs: Additional keyword arguments from the signal
+    """
+    instance.revision += 1
+    instance.updated_at = timezone.now()
+
+
+@receiver(post_save, sender=Mood)
+@receiver(post_delete, sender=Mood)
+def invalidate_mood_catalog(sender, instance, **kwargs):
+    """
+    Retire cached catalog responses when a Mood changes.
+
+    Song listings embed the mood name and resolve moods by name, so every
+    cached listing is retired along with the mood list.
+
+    The cache versions are bumped once the write commits: bumped earlier, a
+    concurrent request could cache the pre-commit rows under the new version.
+
+    Args:
+        sender (Model): The model class that sent the signal (Mood)
+        instance (Mood): The Mood instance saved or deleted
+        **kwargs: Additional keyword arguments from the signal
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "revision" not in update_fields:
+        # save(update_fields=...) skipped the bump made in pre_save
+        catalog.touch_moods([instance.pk])
+    transaction.on_commit(lambda: catalog.invalidate(catalog.MOODS))
+
+
+@receiver(pre_save, sender=Song)
+def remember_song_mood(sender, instance, **kwargs):
+    """
+    Record the stored mood of a Song about to be updated.
+
+    A song moved to another mood must also leave the old mood's listings.
+
+    Args:
+        sender (Model): The model class that sent the signal (Song)
+        instance (Song): The Song instance being saved
+        **kwargs: Additional keyword arguments from the signal
+    """
+    if instance.pk is not None:
+        instance._stored_mood = (
+            Song.objects.filter(pk=instance.pk).values_list("mood_id", "mood__name").first()
+        )
+
+
+@receiver(post_save, sender=Song)
+@receiver(post_delete, sender=Song)
+def invalidate_song_catalog(sender, instance, **kwargs):
+    """
+    Retire the cached song listings of the moods a Song belongs (or belonged) to,
+    and bump those moods' revisions so conditional requests see the change.
+
+    Args:
+        sender (Model): The model class that sent the signal (Song)
+        instance (Song): The Song instance saved or deleted
+        **kwargs: Additional keyword arguments from the signal
+    """
+    moods = {getattr(instance, "_stored_mood", None) or (None, None)}
+    if instance.mood_id is not None:
+        moods.add((instance.mood_id, instance.mood.name))
+    # The revision UPDATE commits (or rolls back) with the song itself; the
+    # cache versions are only bumped once the rows are visible to readers
+    catalog.touch_moods([pk for pk, _ in moods])
+    scopes = [catalog.songs_scope(name) for _, name in moods if name]
+    transaction.on_commit(lambda: catalog.invalidate(*scopes))
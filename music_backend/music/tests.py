@@ -3,10 +3,103 @@ Django Test Suite for Moodify Music API
 Comprehensive tests for mood detection and music recommendation endpoints
 """
 
+import asyncio
+import csv
+import importlib.util
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+import uuid
+from datetime import timedelta
+
+import cv2
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core.cache import cache as django_cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncRequestFactory, SimpleTestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Mood, Song
+from textblob import TextBlob
+from . import async_views, catalog, jobs, metrics, warmup
+from .admission import AdmissionController, admission_controller
+from .apps import serves_requests
+from .caching import LRUCache
+from .engines import OnnxEmotionClassifier, build_emotion_classifier, onnx_model_path
+from .imaging import decode_image, dhash, remap_boxes
+from .inference import (
+    DetectorRegistry,
+    HaarEmotionDetector,
+    MicroBatcher,
+    aggregate_emotions,
+    batch_detect_emotions,
+    detect_emotions,
+    detector_registry,
+    image_result_cache,
+    resolve_detector,
+)
+from .lexicon import lexicon
+from .models import ImageJob, Mood, Song
+from .pagination import encode_cursor, song_page_queryset
+from .sentiment import (
+    analyze_text,
+    cached_text_polarity,
+    normalize_text,
+    polarity_cache,
+    polarity_to_mood,
+    score_texts,
+    sentiment_engine,
+    split_chunks,
+    text_polarity,
+)
+from .sidecar import InferenceServer, SidecarUnavailable, remote_detect_emotions
+from .uploads import BoundedMemoryUploadHandler, UploadTooLarge
+
+# FER scores on fixed crops, recorded next to the committed ONNX export
+PARITY_FIXTURE = os.path.join(os.path.dirname(__file__), "testdata", "emotion_parity.npz")
+
+
+class FakeDetector:
+    """
+    Stand-in for FER used by the image endpoint tests
+    Returns a fixed emotion for every detected face
+    """
+
+    def __init__(self, emotion="happy", faces=1):
+        self.emotion = emotion
+        self.faces = faces
+        self.calls = 0
+
+    def detect_emotions(self, img):
+        self.calls += 1
+        scores = {"angry": 0.0, "happy": 0.0, "neutral": 0.0, "sad": 0.0}
+        scores[self.emotion] = 0.9
+        return [{"box": [0, 0, 10, 10], "emotions": dict(scores)} for _ in range(self.faces)]
+
+
+def make_image_upload(width=64, height=48, name="face.jpg", ext=".jpg"):
+    """Encode a synthetic image as an uploaded file"""
+    img = np.full((height, width, 3), 127, dtype=np.uint8)
+    ok, encoded = cv2.imencode(ext, img)
+    return SimpleUploadedFile(name, encoded.tobytes(), content_type="image/jpeg")
+
+
+def clear_catalog_cache():
+    """Drop cached catalog responses left behind by earlier tests"""
+    cache = catalog.catalog_cache()
+    if cache is not None:
+        cache.clear()
 
 
 class MoodifyAPITests(APITestCase):
@@ -20,6 +113,7 @@ class MoodifyAPITests(APITestCase):
         Set up test data before each test method
         Creates sample moods and songs for testing
         """
+        clear_catalog_cache()
         self.happy_mood = Mood.objects.create(name="Happy")
         self.sad_mood = Mood.objects.create(name="Sad")
         Song.objects.create(title="Happy Song", artist="Artist1", mood=self.happy_mood)
@@ -33,8 +127,8 @@ class MoodifyAPITests(APITestCase):
         url = reverse("get_moods")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]["name"], "Happy")
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(response.json()[0]["name"], "Happy")
 
     def test_get_songs_by_mood_valid(self):
         """
@@ -44,8 +138,8 @@ class MoodifyAPITests(APITestCase):
         url = reverse("get_songs_by_mood")
         response = self.client.get(url, {"mood": "happy"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Happy Song")
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(response.json()[0]["title"], "Happy Song")
 
     def test_get_songs_by_mood_invalid(self):
         """
@@ -65,3 +159,1516 @@ class MoodifyAPITests(APITestCase):
         response = self.client.post(url, {"text": "I am feeling awesome today!"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("mood", response.data)
+
+
+class DetectorRegistryTests(SimpleTestCase):
+    """
+    Test suite for the process-wide emotion detector registry
+    Verifies detectors are built once and reused across requests
+    """
+
+    def test_factory_called_once_across_threads(self):
+        registry = DetectorRegistry()
+        builds = []
+        registry.register("fake", lambda: builds.append(1) or FakeDetector())
+
+        threads = [threading.Thread(target=registry.get, args=("fake",)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with registry.use("fake") as detector:
+            detector.detect_emotions(None)
+        self.assertEqual(len(builds), 1)
+        stats = registry.stats()["fake"]
+        self.assertEqual(stats["loads"], 1)
+        self.assertTrue(stats["loaded"])
+        self.assertGreaterEqual(stats["load_seconds"], 0)
+
+    def test_aggregate_emotions_averages_faces(self):
+        results = [
+            {"box": [0, 0, 10, 10], "emotions": {"happy": 0.9, "sad": 0.1}},
+            {"box": [20, 0, 10, 10], "emotions": {"happy": 0.2, "sad": 0.8}},
+            {"box": [40, 0, 10, 10], "emotions": {"happy": 0.1, "sad": 0.9}},
+        ]
+        group = aggregate_emotions(results)
+        self.assertEqual(group["group_emotion"], "sad")
+        self.assertAlmostEqual(group["group_emotions"]["happy"], 0.4, places=3)
+        self.assertEqual([face["emotion"] for face in group["faces"]], ["happy", "sad", "sad"])
+
+    def test_unknown_detector(self):
+        with self.assertRaises(KeyError):
+            DetectorRegistry().get("missing")
+
+    def test_resolve_modes(self):
+        self.assertEqual(resolve_detector("fast"), "haar-fast")
+        self.assertEqual(resolve_detector("Balanced"), "fer-cascade")
+        self.assertEqual(resolve_detector("accurate"), "fer-mtcnn")
+        self.assertEqual(resolve_detector(None), "fer-mtcnn")
+        with self.assertRaises(ValueError):
+            resolve_detector("turbo")
+
+    def test_haar_face_finding_without_classifier(self):
+        built = []
+        detector = HaarEmotionDetector(classifier_factory=lambda: built.append(1), detect_edge=320)
+        self.assertEqual(detector.find_faces(np.zeros((960, 1280, 3), dtype=np.uint8)), [])
+        self.assertEqual(built, [])
+
+
+class MicroBatcherTests(SimpleTestCase):
+    """
+    Test suite for the micro-batching inference queue
+    Verifies concurrent callers share batches and get their own results back
+    """
+
+    def test_concurrent_calls_are_batched(self):
+        sizes = []
+
+        def run_batch(items):
+            sizes.append(len(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher("test", run_batch, max_batch_size=4, max_wait_ms=200)
+        results = {}
+
+        def call(value):
+            results[value] = batcher.submit(value, timeout=5)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {0: 0, 1: 2, 2: 4, 3: 6})
+        self.assertLess(len(sizes), 4)
+
+    def test_batch_errors_reach_callers(self):
+        def run_batch(items):
+            raise ValueError("boom")
+
+        batcher = MicroBatcher("failing", run_batch, max_batch_size=2, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.submit(1, timeout=5)
+
+    def test_fer_style_detector_classifies_all_faces_at_once(self):
+        class FakeFER:
+            classify_calls = []
+
+            def find_faces(self, img, bgr=True):
+                return [(5, 5, 20, 20), (30, 10, 20, 20)]
+
+            def _classify_emotions(self, faces):
+                self.classify_calls.append(faces.shape)
+                scores = np.zeros((len(faces), 7))
+                scores[:, 3] = 1.0
+                return scores
+
+        detector = FakeFER()
+        images = [np.zeros((60, 80, 3), dtype=np.uint8) for _ in range(3)]
+        results = batch_detect_emotions(detector, images)
+
+        self.assertEqual(detector.classify_calls, [(6, 64, 64)])
+        self.assertEqual([len(faces) for faces in results], [2, 2, 2])
+        self.assertEqual(results[0][0]["emotions"]["happy"], 1.0)
+
+
+class ImagePreprocessingTests(SimpleTestCase):
+    """
+    Test suite for the reduced-resolution decode pipeline
+    Verifies large uploads are capped and boxes map back to original pixels
+    """
+
+    def test_large_jpeg_is_downscaled(self):
+        data = make_image_upload(width=2000, height=1500).read()
+        decoded = decode_image(data, max_edge=400)
+        self.assertLessEqual(max(decoded.image.shape[:2]), 400)
+        self.assertEqual(decoded.original_size, (2000, 1500))
+        self.assertAlmostEqual(decoded.scale, 2000 / decoded.image.shape[1], places=3)
+
+    def test_small_image_untouched(self):
+        data = make_image_upload(width=64, height=48, ext=".png").read()
+        decoded = decode_image(data, max_edge=400)
+        self.assertEqual(decoded.image.shape[:2], (48, 64))
+        self.assertFalse(decoded.downscaled)
+
+    def test_invalid_data(self):
+        self.assertIsNone(decode_image(b"not an image", max_edge=400))
+
+    def test_decodes_from_memoryview(self):
+        data = bytearray(make_image_upload(width=64, height=48).read())
+        with memoryview(data) as view:
+            decoded = decode_image(view, max_edge=400)
+        self.assertEqual(decoded.image.shape[:2], (48, 64))
+
+    def test_remap_boxes(self):
+        results = remap_boxes([{"box": [10, 20, 30, 40], "emotions": {}}], 2.5)
+        self.assertEqual(results[0]["box"], [25, 50, 75, 100])
+
+    def test_dhash_stable_across_reencode(self):
+        rng = np.random.default_rng(1)
+        img = cv2.GaussianBlur(rng.integers(0, 255, (120, 160, 3), dtype=np.uint8), (15, 15), 0)
+        ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        reencoded = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        flipped = cv2.flip(img, 1)
+        self.assertLessEqual(bin(dhash(img) ^ dhash(reencoded)).count("1"), 10)
+        self.assertGreater(bin(dhash(img) ^ dhash(flipped)).count("1"), 10)
+
+
+class LRUCacheTests(SimpleTestCase):
+    """
+    Test suite for the in-process LRU/TTL cache
+    Verifies eviction order, expiry and hit/miss accounting
+    """
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache("test-lru", maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_match_finds_similar_key(self):
+        cache = LRUCache("test-match", maxsize=4)
+        cache.set(0b1011, "near")
+        self.assertEqual(cache.get(0b1010, match=lambda key: bin(key ^ 0b1010).count("1") <= 1), "near")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_ttl_expiry(self):
+        cache = LRUCache("test-ttl", maxsize=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+class DetectImageEmotionTests(APITestCase):
+    """
+    Test suite for the image emotion endpoint
+    Uses a fake detector registered in place of FER
+    """
+
+    def setUp(self):
+        self.detector = FakeDetector("happy")
+        detector_registry.register("fer-mtcnn", lambda: self.detector)
+        cache = image_result_cache()
+        if cache is not None:
+            cache.clear()
+
+    def tearDown(self):
+        from .inference import _build_fer_mtcnn
+        detector_registry.register("fer-mtcnn", _build_fer_mtcnn)
+
+    @override_settings(EMOTION_UPLOAD_MAX_BYTES=1024)
+    def test_oversized_upload_rejected(self):
+        upload = SimpleUploadedFile("big.bin", b"\xff" * 200_000, content_type="image/jpeg")
+        response = self.client.post(reverse("detect_mood_from_image"), {"image": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(self.detector.calls, 0)
+
+    def test_empty_upload_rejected(self):
+        upload = SimpleUploadedFile("empty.jpg", b"", content_type="image/jpeg")
+        response = self.client.post(reverse("detect_mood_from_image"), {"image": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Invalid image file.")
+        self.assertEqual(self.detector.calls, 0)
+
+    @override_settings(EMOTION_UPLOAD_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected_before_decode(self):
+        upload = make_image_upload(width=64, height=48)
+        response = self.client.post(reverse("detect_mood_from_image"), {"image": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_stream_stops_at_byte_limit(self):
+        handler = BoundedMemoryUploadHandler(max_bytes=10)
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file("image", "face.jpg", "image/jpeg", None)
+        handler.receive_data_chunk(b"x" * 8, 0)
+        with self.assertRaises(UploadTooLarge):
+            handler.receive_data_chunk(b"x" * 8, 8)
+
+    def test_mode_selects_detector(self):
+        fast = FakeDetector("neutral")
+        detector_registry.register("haar-fast", lambda: fast)
+        try:
+            url = reverse("detect_mood_from_image") + "?mode=fast"
+            response = self.client.post(url, {"image": make_image_upload()}, format="multipart")
+        finally:
+            from .inference import _build_haar_fast
+            detector_registry.register("haar-fast", _build_haar_fast)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["emotion"], "neutral")
+        self.assertEqual(self.detector.calls, 0)
+
+    def test_unknown_mode(self):
+        response = self.client.post(reverse("detect_mood_from_image"),
+                                    {"image": make_image_upload(), "mode": "turbo"}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_group_photo_returns_every_face(self):
+        self.detector.faces = 3
+        response = self.client.post(reverse("detect_mood_from_image"),
+                                    {"image": make_image_upload(), "faces": "all"}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["face_count"], 3)
+        self.assertEqual(len(response.data["faces"]), 3)
+        self.assertEqual(response.data["group_emotion"], "happy")
+        self.assertEqual(self.detector.calls, 1)
+
+    def test_missing_image(self):
+        response = self.client.post(reverse("detect_mood_from_image"), {}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(EMOTION_RESULT_CACHE_SIZE=0)
+    def test_detector_reused_between_requests(self):
+        url = reverse("detect_mood_from_image")
+        for _ in range(2):
+            response = self.client.post(url, {"image": make_image_upload()}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["emotion"], "happy")
+        self.assertEqual(self.detector.calls, 2)
+        self.assertEqual(detector_registry.stats()["fer-mtcnn"]["loads"], 1)
+
+    def test_repeated_upload_served_from_cache(self):
+        url = reverse("detect_mood_from_image")
+        before = image_result_cache().stats()
+        for _ in range(3):
+            response = self.client.post(url, {"image": make_image_upload()}, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.detector.calls, 1)
+        stats = image_result_cache().stats()
+        self.assertEqual(stats["hits"] - before["hits"], 2)
+        self.assertEqual(stats["misses"] - before["misses"], 1)
+
+    @override_settings(EMOTION_BATCH_MAX_SIZE=4, EMOTION_BATCH_MAX_WAIT_MS=1, EMOTION_RESULT_CACHE_SIZE=0)
+    def test_batched_detection(self):
+        url = reverse("detect_mood_from_image")
+        response = self.client.post(url, {"image": make_image_upload()}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["emotion"], "happy")
+
+    def test_metrics_endpoint_reports_detectors(self):
+        response = self.client.get(reverse("get_metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("fer-mtcnn", response.data["detectors"])
+
+
+class ImageJobTests(APITestCase):
+    """
+    Test suite for async=1 image jobs and their worker
+    Jobs are queued through the API and drained in-process
+    """
+
+    def setUp(self):
+        self.detector = FakeDetector("sad", faces=2)
+        detector_registry.register("fer-mtcnn", lambda: self.detector)
+        cache = image_result_cache()
+        if cache is not None:
+            cache.clear()
+
+    def tearDown(self):
+        from .inference import _build_fer_mtcnn
+        detector_registry.register("fer-mtcnn", _build_fer_mtcnn)
+
+    def test_async_upload_queues_job_and_result_is_polled(self):
+        response = self.client.post(reverse("detect_mood_from_image"),
+                                    {"image": make_image_upload(), "async": "1", "faces": "all"},
+                                    format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], ImageJob.STATUS_PENDING)
+        self.assertEqual(self.detector.calls, 0)
+
+        status_url = response.data["status_url"]
+        self.assertEqual(self.client.get(status_url).data["status"], ImageJob.STATUS_PENDING)
+
+        self.assertEqual(jobs.work(once=True), 1)
+        polled = self.client.get(status_url)
+        self.assertEqual(polled.status_code, status.HTTP_200_OK)
+        self.assertEqual(polled.data["status"], ImageJob.STATUS_DONE)
+        self.assertEqual(polled.data["result"]["emotion"], "sad")
+        self.assertEqual(polled.data["result"]["face_count"], 2)
+        self.assertIsNone(ImageJob.objects.get(id=response.data["job_id"]).image)
+
+    def test_invalid_image_job_fails(self):
+        upload = SimpleUploadedFile("face.jpg", b"not an image", content_type="image/jpeg")
+        response = self.client.post(reverse("detect_mood_from_image"),
+                                    {"image": upload, "async": "1"}, format="multipart")
+        jobs.work(once=True)
+        polled = self.client.get(response.data["status_url"])
+        self.assertEqual(polled.data["status"], ImageJob.STATUS_FAILED)
+        self.assertEqual(polled.data["error"], "Invalid image file.")
+
+    def test_empty_image_job_fails(self):
+        upload = SimpleUploadedFile("empty.jpg", b"", content_type="image/jpeg")
+        response = self.client.post(reverse("detect_mood_from_image"),
+                                    {"image": upload, "async": "1"}, format="multipart")
+        jobs.work(once=True)
+        polled = self.client.get(response.data["status_url"])
+        self.assertEqual(polled.data["status"], ImageJob.STATUS_FAILED)
+        self.assertEqual(polled.data["error"], "Invalid image file.")
+
+    def test_job_claimed_once(self):
+        ImageJob.objects.create(detector="fer-mtcnn", image=b"")
+        first = jobs.claim_next_job()
+        self.assertEqual(first.status, ImageJob.STATUS_RUNNING)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_stale_running_job_requeued(self):
+        job = ImageJob.objects.create(detector="fer-mtcnn", image=b"", status=ImageJob.STATUS_RUNNING,
+                                      started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale_jobs(60), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.STATUS_PENDING)
+
+    def test_unknown_job(self):
+        response = self.client.get(reverse("get_image_job", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class InferenceSidecarTests(SimpleTestCase):
+    """
+    Test suite for the shared inference daemon
+    Runs the Unix socket server in a thread with a fake detector
+    """
+
+    def setUp(self):
+        self.detector = FakeDetector("sad")
+        detector_registry.register("fer-mtcnn", lambda: self.detector)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "inference.sock")
+
+    def tearDown(self):
+        from .inference import _build_fer_mtcnn
+        detector_registry.register("fer-mtcnn", _build_fer_mtcnn)
+        self.tmpdir.cleanup()
+
+    def test_round_trip_through_daemon(self):
+        server = InferenceServer(self.socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            img = np.zeros((20, 30, 3), dtype=np.uint8)
+            with override_settings(EMOTION_SIDECAR_SOCKET=self.socket_path):
+                results = detect_emotions(img)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(results[0]["emotions"]["sad"], 0.9)
+        self.assertEqual(self.detector.calls, 1)
+
+    def test_falls_back_when_daemon_absent(self):
+        img = np.zeros((20, 30, 3), dtype=np.uint8)
+        with self.assertRaises(SidecarUnavailable):
+            remote_detect_emotions(img, socket_path=self.socket_path)
+        with override_settings(EMOTION_SIDECAR_SOCKET=self.socket_path):
+            results = detect_emotions(img)
+        self.assertEqual(results[0]["emotions"]["sad"], 0.9)
+
+
+    def serve_broken(self, respond):
+        """Accept one connection on the socket path and hand it to `respond`"""
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(1)
+
+        def run():
+            connection, _ = listener.accept()
+            with connection:
+                respond(connection)
+            listener.close()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_falls_back_when_daemon_drops_connection(self):
+        # Reads part of the request, then dies
+        thread = self.serve_broken(lambda connection: connection.recv(16))
+        img = np.zeros((20, 30, 3), dtype=np.uint8)
+        with override_settings(EMOTION_SIDECAR_SOCKET=self.socket_path):
+            results = detect_emotions(img)
+        thread.join(5)
+        self.assertEqual(results[0]["emotions"]["sad"], 0.9)
+        self.assertEqual(self.detector.calls, 1)
+
+    def test_falls_back_when_daemon_hangs(self):
+        release = threading.Event()
+        thread = self.serve_broken(lambda connection: release.wait(5))
+        img = np.zeros((20, 30, 3), dtype=np.uint8)
+        try:
+            with override_settings(EMOTION_SIDECAR_TIMEOUT=0.2):
+                with self.assertRaisesMessage(SidecarUnavailable, "exchange failed"):
+                    remote_detect_emotions(img, socket_path=self.socket_path)
+        finally:
+            release.set()
+            thread.join(5)
+
+
+class EmotionEngineTests(SimpleTestCase):
+    """
+    Test suite for the pluggable emotion classifier engines
+    Verifies the ONNX engine matches FER's labels and scores
+    """
+
+    def test_haar_detector_with_onnx_style_classifier(self):
+        scores = np.zeros(7, dtype=np.float32)
+        scores[4] = 1.0  # "sad" in FER label order
+        classifier = OnnxEmotionClassifier(runner=lambda batch: np.tile(scores, (len(batch), 1)))
+        detector = HaarEmotionDetector(classifier_factory=lambda: classifier)
+        detector.find_faces = lambda img, bgr=True: [[10, 10, 40, 40]]
+
+        results = detector.detect_emotions(np.zeros((100, 120, 3), dtype=np.uint8))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(max(results[0]["emotions"], key=results[0]["emotions"].get), "sad")
+        self.assertEqual(set(results[0]["emotions"]), {"angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"})
+
+    def test_missing_onnx_model(self):
+        with override_settings(EMOTION_ONNX_MODEL="/nonexistent/emotion_model.onnx"):
+            with self.assertRaises(ImportError):
+                build_emotion_classifier("onnx")
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            build_emotion_classifier("tpu")
+
+    def assert_matches_recorded_fer(self, classifier):
+        from .management.commands.export_emotion_model import fer_input
+
+        # Recorded with FER 22.5.1 by: manage.py export_emotion_model --parity-fixture <path>
+        recorded = np.load(PARITY_FIXTURE)
+        onnx_scores = classifier.classify(fer_input(recorded["crops"]))
+        self.assertEqual(onnx_scores.shape, recorded["fer_scores"].shape)
+        np.testing.assert_allclose(onnx_scores, recorded["fer_scores"], atol=1e-4)
+        np.testing.assert_array_equal(onnx_scores.argmax(axis=1), recorded["fer_scores"].argmax(axis=1))
+
+    def test_onnx_matches_recorded_fer(self):
+        self.assert_matches_recorded_fer(OnnxEmotionClassifier(onnx_model_path()))
+
+    def test_opencv_dnn_matches_recorded_fer(self):
+        with unittest.mock.patch.dict("sys.modules", {"onnxruntime": None}):
+            classifier = OnnxEmotionClassifier(onnx_model_path())
+        self.assertEqual(classifier.backend, "opencv-dnn")
+        self.assert_matches_recorded_fer(classifier)
+
+    @unittest.skipUnless(importlib.util.find_spec("fer"), "needs fer (and TensorFlow)")
+    def test_onnx_matches_fer(self):
+        faces = np.random.default_rng(0).uniform(-1, 1, (16, 64, 64)).astype(np.float32)
+        fer_scores = np.asarray(build_emotion_classifier("fer")._classify_emotions(faces))
+        onnx_scores = build_emotion_classifier("onnx").classify(faces)
+        self.assertLess(np.abs(fer_scores - onnx_scores).max(), 1e-4)
+        np.testing.assert_array_equal(fer_scores.argmax(axis=1), onnx_scores.argmax(axis=1))
+
+
+class WarmupTests(APITestCase):
+    """
+    Test suite for startup warm-up and the readiness endpoint
+    Verifies not-ready is reported until every step has finished
+    """
+
+    def setUp(self):
+        warmup.state.reset()
+
+    def tearDown(self):
+        warmup.state.reset()
+
+    def test_ready_without_warmup(self):
+        response = self.client.get(reverse("health_ready"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["ready"])
+
+    def test_not_ready_until_steps_finish(self):
+        release = threading.Event()
+        warmup.state.start([("slow", release.wait), ("quick", lambda: None)])
+
+        response = self.client.get(reverse("health_ready"))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["steps"]["quick"]["status"], "pending")
+
+        release.set()
+        warmup.state.thread.join(timeout=5)
+        response = self.client.get(reverse("health_ready"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data["steps"]["slow"]["seconds"])
+
+    def test_failed_step_keeps_not_ready(self):
+        def broken():
+            raise RuntimeError("model missing")
+
+        warmup.state.start([("broken", broken)], background=False)
+        response = self.client.get(reverse("health_ready"))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["steps"]["broken"]["error"], "model missing")
+
+    def test_forked_worker_runs_its_own_warmup(self):
+        steps = [("quick", lambda: None)]
+        warmup.state.start(steps, background=False)
+        warmup.state.pid = -1  # As seen in a worker forked from a --preload master
+
+        with unittest.mock.patch.object(warmup, "default_steps", return_value=steps):
+            warmup.warm_on_request()
+        warmup.state.thread.join(timeout=5)
+        self.assertEqual(warmup.state.pid, os.getpid())
+        self.assertTrue(warmup.state.report()["ready"])
+
+    def test_only_server_programs_warm_up(self):
+        cases = [
+            (["/venv/bin/gunicorn", "music_backend.wsgi"], {}, True),
+            (["/venv/lib/python3.11/site-packages/uvicorn/__main__.py", "music_backend.asgi:application"], {}, True),
+            (["manage.py", "runserver"], {"RUN_MAIN": "true"}, True),
+            (["manage.py", "runserver"], {}, False),
+            (["/venv/lib/python3.11/site-packages/django/__main__.py", "migrate"], {}, False),
+            (["manage.py", "test"], {}, False),
+            (["/venv/bin/pytest", "music/tests.py"], {}, False),
+            (["populate_db.py"], {}, False),
+        ]
+        base = {key: value for key, value in os.environ.items() if key != "RUN_MAIN"}
+        for argv, environ, expected in cases:
+            with self.subTest(argv=argv), unittest.mock.patch("sys.argv", argv), \
+                    unittest.mock.patch.dict(os.environ, {**base, **environ}, clear=True):
+                self.assertIs(serves_requests(), expected)
+
+
+class AdmissionControlTests(APITestCase):
+    """
+    Test suite for detection endpoint concurrency limits
+    Slots are held directly on the controller to simulate saturation
+    """
+
+    def test_queue_then_shed(self):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=2.0)
+        self.assertTrue(controller.acquire())
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(controller.acquire()))
+        waiter.start()
+        while controller.waiting == 0:
+            time.sleep(0.001)
+        # Slot busy and queue full: shed immediately
+        self.assertFalse(controller.acquire())
+        controller.release()
+        waiter.join()
+        self.assertEqual(admitted, [True])
+        self.assertEqual(controller.stats()["in_flight"], 1)
+
+    def test_queue_timeout(self):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout=0.01)
+        controller.acquire()
+        self.assertFalse(controller.acquire())
+        self.assertEqual(controller.stats()["waiting"], 0)
+
+    async def test_cancelled_async_waiter_returns_its_slot(self):
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=2.0)
+        self.assertTrue(controller.acquire())
+
+        async def request():
+            async with controller.admit_async():
+                await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(request())
+        while controller.waiting == 0:
+            await asyncio.sleep(0.001)
+        # Client disconnects while its thread is still queued
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        controller.release()  # The queued thread now takes the slot for nobody
+        for _ in range(1000):
+            if controller.stats()["in_flight"] == 0 and controller.waiting == 0:
+                break
+            await asyncio.sleep(0.002)
+        self.assertEqual(controller.stats()["in_flight"], 0)
+        self.assertTrue(controller.acquire(wait=False))
+
+    @override_settings(TEXT_MAX_CONCURRENT=1, TEXT_MAX_QUEUE=0, TEXT_RETRY_AFTER=3)
+    def test_saturated_endpoint_returns_429(self):
+        controller = admission_controller("text")
+        before = metrics.snapshot()["counters"].get("admission.text.rejected", 0)
+        with controller.admit():
+            response = self.client.post(reverse("detect_text_mood"), {"text": "I am happy"}, format="json")
+            # Catalog endpoints are not limited
+            self.assertEqual(self.client.get(reverse("get_moods")).status_code, status.HTTP_200_OK)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertEqual(metrics.snapshot()["counters"]["admission.text.rejected"], before + 1)
+
+        response = self.client.post(reverse("detect_text_mood"), {"text": "I am happy"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(metrics.snapshot()["admission"]["text"]["in_flight"], 0)
+
+    @override_settings(EMOTION_MAX_CONCURRENT=1, EMOTION_MAX_QUEUE=0)
+    def test_text_lane_ignores_image_limits(self):
+        with admission_controller("image").admit():
+            response = self.client.post(reverse("detect_text_mood"), {"text": "I am happy"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(admission_controller("text").max_concurrent, 16)
+
+
+class AsyncViewTests(APITestCase):
+    """
+    Test suite for the native async (ASGI) views
+    Responses are compared with the DRF views serving the same data
+    """
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        happy = Mood.objects.create(name="Happy")
+        Song.objects.create(title="Happy Song", artist="Artist1", mood=happy)
+        self.detector = FakeDetector("surprise", faces=2)
+        detector_registry.register("fer-mtcnn", lambda: self.detector)
+        cache = image_result_cache()
+        if cache is not None:
+            cache.clear()
+
+    def tearDown(self):
+        from .inference import _build_fer_mtcnn
+        detector_registry.register("fer-mtcnn", _build_fer_mtcnn)
+
+    async def test_catalog_views_match_sync_views(self):
+        moods = await async_views.get_moods(self.factory.get("/api/moods/"))
+        sync_moods = await sync_to_async(self.client.get)(reverse("get_moods"))
+        self.assertEqual(json.loads(moods.content), json.loads(sync_moods.content))
+
+        songs = await async_views.get_songs_by_mood(self.factory.get("/api/songs/", {"mood": "happy"}))
+        sync_songs = await sync_to_async(self.client.get)(reverse("get_songs_by_mood"), {"mood": "happy"})
+        self.assertEqual(songs.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(songs.content), json.loads(sync_songs.content))
+        self.assertEqual(json.loads(songs.content)[0]["mood"], "Happy")
+
+        missing = await async_views.get_songs_by_mood(self.factory.get("/api/songs/", {"mood": "angry"}))
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_text_mood(self):
+        request = self.factory.post("/api/detect-text-mood/", {"text": "I am feeling awesome today!"},
+                                    content_type="application/json")
+        response = await async_views.detect_mood_from_text(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("mood", json.loads(response.content))
+
+        wrong_method = await async_views.detect_mood_from_text(self.factory.get("/api/detect-text-mood/"))
+        self.assertEqual(wrong_method.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @override_settings(TEXT_CHUNK_SIZE=20)
+    async def test_text_mood_chunks(self):
+        request = self.factory.post("/api/detect-text-mood/?chunks=1", {"text": "I am happy. It is a sad day."},
+                                    content_type="application/json")
+        payload = json.loads((await async_views.detect_mood_from_text(request)).content)
+        self.assertEqual([(c["start"], c["end"]) for c in payload["chunks"]], [(0, 11), (12, 28)])
+
+    async def test_image_mood_runs_in_executor(self):
+        request = self.factory.post("/api/detect-image-emotion/",
+                                    {"image": make_image_upload(), "faces": "all"})
+        response = await async_views.detect_mood_from_image(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(data["emotion"], "surprise")
+        self.assertEqual(data["face_count"], 2)
+
+    @override_settings(EMOTION_MAX_CONCURRENT=1, EMOTION_MAX_QUEUE=0, EMOTION_RETRY_AFTER=5)
+    async def test_saturated_async_endpoint_returns_429(self):
+        with admission_controller("image").admit():
+            request = self.factory.post("/api/detect-image-emotion/", {"image": make_image_upload()})
+            response = await async_views.detect_mood_from_image(request)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertEqual(self.detector.calls, 0)
+
+
+class BatchTextMoodTests(APITestCase):
+    """
+    Test suite for the batch text mood endpoint
+    Results must match the single-text endpoint item by item
+    """
+
+    texts = ["I am feeling awesome today!", "This is a terrible, sad day.", "The bus was on time."]
+
+    def test_json_list_matches_single_endpoint(self):
+        response = self.client.post(reverse("detect_text_mood_batch"), self.texts, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        for text, result in zip(self.texts, response.data["results"]):
+            single = self.client.post(reverse("detect_text_mood"), {"text": text}, format="json").data
+            self.assertEqual(result, single)
+            self.assertEqual(result["polarity"], TextBlob(text).sentiment.polarity)
+
+    def test_ndjson_with_ids_and_blank_items(self):
+        body = '{"id": 7, "text": "I love this song"}\n\n"so happy"\n{"id": 8, "text": "  "}\n'
+        response = self.client.post(reverse("detect_text_mood_batch"), body,
+                                    content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["id"], 7)
+        self.assertEqual(results[1]["mood"], "Happy")
+        self.assertEqual(results[2], {"id": 8, "error": "No text provided."})
+
+    def test_invalid_ndjson_line(self):
+        response = self.client.post(reverse("detect_text_mood_batch"), '"ok"\n{broken\n',
+                                    content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TEXT_BATCH_MAX_ITEMS=2)
+    def test_batch_size_limit(self):
+        response = self.client.post(reverse("detect_text_mood_batch"), {"texts": self.texts}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    @override_settings(TEXT_BATCH_PARALLEL_MIN=2, TEXT_BATCH_WORKERS=2)
+    def test_large_batch_scored_in_worker_processes(self):
+        texts = self.texts * 5
+        self.assertEqual(score_texts(texts), [TextBlob(text).sentiment.polarity for text in texts])
+
+
+class LexiconSentimentTests(SimpleTestCase):
+    """
+    Test suite for the precompiled lexicon sentiment engine
+    Polarity must stay within tolerance of TextBlob on a mixed corpus
+    """
+
+    tolerance = 0.01
+    corpus = [
+        "I am feeling awesome today!",
+        "Feeling tired and a bit sad after work, not great.",
+        "What a terrible, horrible day :( Nothing went right.",
+        "I don't like this at all.",
+        "It's not bad, really not bad!!",
+        "Really not good (!) at all",
+        "Mr. Smith was very happy... e.g. so happy :-D",
+        "I love it <3",
+        "This is \"quite\" good, isn't it?",
+        "NEVER again. Worst. Day. Ever.",
+        "meh :/",
+        "She's extremely, incredibly happy!",
+        "“Amazing” — she said ’twas wonderful",
+        "The U.S. economy is terribly bad.",
+        "The bus was on time.",
+        "",
+    ]
+
+    def random_corpus(self, size=500):
+        from textblob.en import sentiment
+
+        vocab = sorted(dict.keys(sentiment))[::7] + [
+            "not", "never", "no", "very", "really", "!", "(!)", ":)", ":(", ",", ".", "the", "is", "don't",
+        ]
+        rng = np.random.default_rng(0)
+        return [" ".join(rng.choice(vocab, size=rng.integers(1, 20))) for _ in range(size)]
+
+    def test_matches_textblob_within_tolerance(self):
+        engine = lexicon()
+        for text in self.corpus + self.random_corpus():
+            with self.subTest(text=text):
+                self.assertAlmostEqual(engine.polarity(text), TextBlob(text).sentiment.polarity,
+                                       delta=self.tolerance)
+
+    @override_settings(TEXT_SENTIMENT_ENGINE="lexicon")
+    def test_engine_selected_in_settings(self):
+        text = "What a wonderful, happy day!"
+        self.assertEqual(sentiment_engine(), "lexicon")
+        self.assertAlmostEqual(text_polarity(text), text_polarity(text, engine="textblob"), delta=self.tolerance)
+        self.assertEqual(score_texts([text]), [text_polarity(text)])
+
+    @override_settings(TEXT_SENTIMENT_ENGINE="vader")
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            text_polarity("hello")
+
+
+class TextPolarityCacheTests(APITestCase):
+    """
+    Test suite for the normalized-text polarity cache
+    Local LRU in front of sentiment scoring, optionally backed by Django's cache
+    """
+
+    def setUp(self):
+        cache = polarity_cache()
+        if cache is not None:
+            cache.clear()
+        django_cache.clear()
+
+    def test_normalization_folds_case_whitespace_and_punctuation(self):
+        self.assertEqual(normalize_text("  I'm   HAPPY. "), "i'm happy")
+        self.assertEqual(normalize_text('"feeling tired," ok?'), "feeling tired ok")
+        # Marks that change the polarity are kept
+        self.assertNotEqual(normalize_text("happy!"), normalize_text("happy"))
+        self.assertNotEqual(normalize_text("very... good"), normalize_text("very good"))
+        # Abbreviations tokenize by case, so text with inner periods keeps its case and marks
+        self.assertEqual(normalize_text("very Mr. nice"), "very Mr. nice")
+        self.assertEqual(normalize_text("Dr. Smith was great."), "Dr. Smith was great")
+
+    def test_normalized_text_scores_the_same(self):
+        samples = ["  I'm   HAPPY. ", '"feeling tired," ok?', "very Mr. nice", "NOT bad, Dr. Good.",
+                   "“really” e.g. awful", "Very good; not great?", "It was fine. Mr. Brown was SAD."]
+        for engine in ("textblob", "lexicon"):
+            for text in samples:
+                with self.subTest(engine=engine, text=text):
+                    self.assertAlmostEqual(text_polarity(normalize_text(text), engine),
+                                           text_polarity(text, engine), places=9)
+
+    def test_repeated_phrases_served_from_cache(self):
+        url = reverse("detect_text_mood")
+        before = polarity_cache().stats()
+        first = self.client.post(url, {"text": "I'm happy"}, format="json").data
+        for variant in ("i'm HAPPY.", "  I'm happy  "):
+            self.assertEqual(self.client.post(url, {"text": variant}, format="json").data, first)
+        stats = polarity_cache().stats()
+        self.assertEqual(stats["hits"] - before["hits"], 2)
+        self.assertEqual(stats["misses"] - before["misses"], 1)
+        self.assertIn("text_polarity", metrics.snapshot()["caches"])
+
+    @override_settings(TEXT_POLARITY_SHARED_CACHE="default")
+    def test_shared_backend_used_across_workers(self):
+        polarity = cached_text_polarity("feeling tired")
+        # Another worker: empty local cache, same shared backend
+        polarity_cache().clear()
+        with unittest.mock.patch("music.sentiment.text_polarity") as scorer:
+            self.assertEqual(cached_text_polarity("Feeling tired."), polarity)
+            scorer.assert_not_called()
+
+
+class LongTextMoodTests(APITestCase):
+    """
+    Test suite for chunked scoring of long texts
+    Sentence chunks combined by length, with a hard input length limit
+    """
+
+    diary = ("Woke up late and missed the bus. The rain did not help at all. "
+             "Lunch with Sam was wonderful though, we laughed for an hour! "
+             "The afternoon meeting dragged on forever.\n"
+             "Tonight I feel calm and grateful for a good friend. ") * 6
+
+    def test_chunks_follow_sentences_and_cover_text(self):
+        spans = split_chunks(self.diary.strip(), 120)
+        self.assertGreater(len(spans), 1)
+        text = self.diary.strip()
+        for start, end in spans:
+            self.assertLessEqual(end - start, 120)
+            self.assertIn(text[end - 1], ".!")
+        # Only whitespace lies between consecutive chunks
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            self.assertEqual(text[end:start].strip(), "")
+
+    def test_overlong_sentence_split_at_spaces(self):
+        text = " ".join(["word"] * 100)
+        spans = split_chunks(text, 48)
+        self.assertTrue(all(end - start <= 48 for start, end in spans))
+        self.assertEqual(" ".join(text[start:end] for start, end in spans), text)
+
+    @override_settings(TEXT_CHUNK_SIZE=120)
+    def test_polarity_weighted_by_chunk_length(self):
+        text = self.diary.strip()
+        result = analyze_text(text, include_chunks=True)
+        chunks = result["chunks"]
+        self.assertEqual(len(chunks), len(split_chunks(text, 120)))
+        for chunk in chunks:
+            self.assertEqual(chunk["polarity"], text_polarity(text[chunk["start"]:chunk["end"]]))
+        weighted = sum((c["end"] - c["start"]) * c["polarity"] for c in chunks)
+        self.assertAlmostEqual(result["polarity"], weighted / sum(c["end"] - c["start"] for c in chunks))
+
+    @override_settings(TEXT_CHUNK_SIZE=120)
+    def test_endpoint_returns_chunks_on_request(self):
+        url = reverse("detect_text_mood")
+        plain = self.client.post(url, {"text": self.diary}, format="json")
+        self.assertEqual(plain.status_code, status.HTTP_200_OK)
+        self.assertNotIn("chunks", plain.data)
+        detailed = self.client.post(url + "?chunks=1", {"text": self.diary}, format="json")
+        self.assertEqual(detailed.data["polarity"], plain.data["polarity"])
+        self.assertGreater(len(detailed.data["chunks"]), 1)
+        # Short texts are a single chunk scored whole
+        short = self.client.post(url, {"text": "I am happy", "chunks": "1"}, format="json").data
+        self.assertEqual(short["chunks"], [{"start": 0, "end": 10, "mood": short["mood"],
+                                            "polarity": short["polarity"]}])
+
+    @override_settings(TEXT_CHUNK_SIZE=120, TEXT_CHUNK_PARALLEL_MIN=2, TEXT_BATCH_WORKERS=2)
+    def test_many_chunks_scored_in_worker_processes(self):
+        with override_settings(TEXT_CHUNK_PARALLEL_MIN=10 ** 6):
+            serial = analyze_text(self.diary.strip())
+        self.assertEqual(analyze_text(self.diary.strip()), serial)
+
+    @override_settings(TEXT_MAX_LENGTH=100)
+    def test_max_length_enforced(self):
+        response = self.client.post(reverse("detect_text_mood"), {"text": "happy " * 30}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        batch = self.client.post(reverse("detect_text_mood_batch"), ["happy " * 30, "happy"], format="json")
+        self.assertEqual(batch.data["results"][0], {"error": "Text is longer than 100 characters."})
+        self.assertEqual(batch.data["results"][1]["mood"], "Happy")
+
+
+class TagTextMoodsCommandTests(SimpleTestCase):
+    """
+    Test suite for the tag_text_moods management command
+    Streams JSONL/CSV/stdin through the mood pipeline with checkpoints
+    """
+
+    texts = ["I love this song", "What a terrible, sad day", "The bus was on time", ""]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.tmpdir.name, "notes.jsonl")
+        with open(self.input, "w") as handle:
+            for index, text in enumerate(self.texts):
+                handle.write(json.dumps({"id": f"n{index}", "text": text}) + "\n")
+            handle.write("{broken\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def tag(self, *args, **options):
+        stdout = io.StringIO()
+        call_command("tag_text_moods", *args, stdout=stdout, stderr=io.StringIO(), **options)
+        return stdout.getvalue()
+
+    def expected(self, text):
+        polarity = text_polarity(text)
+        return {"mood": polarity_to_mood(polarity), "polarity": polarity}
+
+    def test_jsonl_to_stdout(self):
+        results = [json.loads(line) for line in self.tag(self.input, workers=1).splitlines()]
+        self.assertEqual(len(results), 5)
+        for index, text in enumerate(self.texts[:3]):
+            self.assertEqual(results[index], {"id": f"n{index}", **self.expected(text)})
+        self.assertEqual(results[3], {"id": "n3", "error": "No text provided."})
+        self.assertTrue(results[4]["error"].startswith("Invalid JSON"))
+
+    def test_csv_from_stdin(self):
+        body = "note,text\n1,\"I love it, really\"\n2,so sad\n"
+        with unittest.mock.patch("sys.stdin", io.StringIO(body)):
+            output = self.tag("-", format="csv", workers=1)
+        rows = list(csv.DictReader(io.StringIO(output)))
+        self.assertEqual([row["id"] for row in rows], ["1", "2"])  # Record numbers: no "id" column
+        self.assertEqual(rows[0]["mood"], self.expected("I love it, really")["mood"])
+
+    def test_resume_from_checkpoint(self):
+        output = os.path.join(self.tmpdir.name, "moods.jsonl")
+        checkpoint = os.path.join(self.tmpdir.name, "moods.ckpt")
+        self.tag(self.input, output=output, checkpoint=checkpoint, offset=0, chunk_size=2, workers=1)
+        with open(checkpoint) as handle:
+            self.assertEqual(json.load(handle), {"offset": 5})
+        with open(output) as handle:
+            complete = handle.read()
+
+        # Interrupted after the first chunk: the rerun appends only the rest
+        with open(output, "w") as handle:
+            handle.writelines(complete.splitlines(keepends=True)[:2])
+        with open(checkpoint, "w") as handle:
+            json.dump({"offset": 2}, handle)
+        self.tag(self.input, output=output, checkpoint=checkpoint, chunk_size=2, workers=1)
+        with open(output) as handle:
+            self.assertEqual(handle.read(), complete)
+
+    def test_worker_processes_keep_input_order(self):
+        serial = self.tag(self.input, workers=1, chunk_size=1)
+        self.assertEqual(self.tag(self.input, workers=2, chunk_size=1), serial)
+
+
+class ScoreImagesCommandTests(SimpleTestCase):
+    """
+    Test suite for the score_images management command
+    Runs the in-process path with a fake detector
+    """
+
+    def setUp(self):
+        self.detector = FakeDetector("sad", faces=2)
+        detector_registry.register("fer-mtcnn", lambda: self.detector)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        os.makedirs(os.path.join(self.root, "album"))
+        for name, width in (("a.jpg", 64), ("album/b.png", 2048)):
+            cv2.imwrite(os.path.join(self.root, name), np.full((48, width, 3), 127, dtype=np.uint8))
+        with open(os.path.join(self.root, "broken.jpg"), "wb") as handle:
+            handle.write(b"not an image")
+        with open(os.path.join(self.root, "notes.txt"), "w") as handle:
+            handle.write("skipped")
+
+    def tearDown(self):
+        from .inference import _build_fer_mtcnn
+        detector_registry.register("fer-mtcnn", _build_fer_mtcnn)
+        self.tmpdir.cleanup()
+
+    def score(self, *args, **options):
+        stdout = io.StringIO()
+        call_command("score_images", *args, mode="accurate", workers=1, stdout=stdout,
+                     stderr=io.StringIO(), **options)
+        return stdout.getvalue()
+
+    def test_unreadable_files_are_row_errors(self):
+        _, encoded = cv2.imencode(".jpg", np.random.default_rng(0).integers(0, 255, (96, 128, 3), dtype=np.uint8))
+        with open(os.path.join(self.root, "album", "cut.jpg"), "wb") as handle:
+            handle.write(encoded.tobytes()[:len(encoded) // 2])  # Interrupted download
+        open(os.path.join(self.root, "album", "empty.jpg"), "wb").close()
+
+        rows = {os.path.relpath(row["path"], self.root): row
+                for row in map(json.loads, self.score(self.root).splitlines())}
+        self.assertEqual(len(rows), 5)
+        for name in ("cut.jpg", "empty.jpg"):
+            self.assertEqual(rows[os.path.join("album", name)]["error"], "Invalid image file.")
+        self.assertEqual(rows["a.jpg"]["emotion"], "sad")
+
+    def test_directory_to_jsonl_in_order(self):
+        rows = [json.loads(line) for line in self.score(self.root, all_faces=True, batch_size=2).splitlines()]
+        self.assertEqual([os.path.relpath(row["path"], self.root) for row in rows],
+                         ["a.jpg", "broken.jpg", os.path.join("album", "b.png")])
+        self.assertEqual(rows[0]["emotion"], "sad")
+        self.assertEqual(rows[0]["face_count"], 2)
+        self.assertEqual(rows[1]["error"], "Invalid image file.")
+        # Detected on the downscaled frame, reported in original pixels
+        self.assertEqual(rows[2]["width"], 2048)
+        self.assertEqual(rows[2]["faces"][0]["box"], [0, 0, 20, 20])
+        self.assertEqual(rows[2]["group_emotion"], "sad")
+
+    def test_manifest_to_csv(self):
+        manifest = os.path.join(self.root, "manifest.txt")
+        with open(manifest, "w") as handle:
+            handle.write("# evaluation set\nalbum/b.png\n\nmissing.jpg\n")
+        output = os.path.join(self.root, "emotions.csv")
+        self.score(manifest, manifest=True, output=output)
+        with open(output) as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual((rows[0]["emotion"], rows[0]["face_count"]), ("sad", "2"))
+        self.assertIn("No such file", rows[1]["error"])
+
+
+class StartupProfileTests(SimpleTestCase):
+    """
+    Test suite for lazy startup imports
+    The URLconf must load without the inference and sentiment libraries
+    """
+
+    def profile(self, *args):
+        stdout = io.StringIO()
+        call_command("startup_profile", "--json", *args, stdout=stdout)
+        return json.loads(stdout.getvalue())
+
+    def test_urlconf_imports_no_heavy_modules(self):
+        report = self.profile("--fail-on-heavy")
+        self.assertEqual(report["heavy_modules"], [])
+        self.assertIn("music", report["packages_ms"])
+        self.assertIn("import music_backend.urls", report["phases_ms"])
+
+    def test_heavy_import_detected(self):
+        with self.assertRaisesMessage(CommandError, "numpy"):
+            self.profile("--module", "music.imaging", "--fail-on-heavy")
+
+    def test_parse_importtime_depth(self):
+        from .management.commands.startup_profile import parse_importtime
+
+        output = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       100 |        150 |   child\n"
+                  "import time:        50 |        200 | parent\n")
+        self.assertEqual(parse_importtime(output), [("child", 100, 150, 1), ("parent", 50, 200, 0)])
+
+
+class SongPaginationTests(APITestCase):
+    """
+    Test suite for keyset pagination of /api/songs/
+    Pages follow (title, id) with a constant number of queries
+    """
+
+    def setUp(self):
+        self.mood = Mood.objects.create(name="Happy")
+        other = Mood.objects.create(name="Sad")
+        # Repeated titles make the id tie-breaker matter
+        for index in range(30):
+            Song.objects.create(title=f"Song {index % 12:02d}", artist=f"Artist {index}", mood=self.mood)
+        Song.objects.create(title="Song 00", artist="Elsewhere", mood=other)
+        self.url = reverse("get_songs_by_mood")
+
+    def walk(self, limit):
+        """Follow rel="next" links from the first page; returns the pages' song ids"""
+        pages = []
+        response = self.client.get(self.url, {"mood": "happy", "limit": limit})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([song["id"] for song in response.json()])
+            link = response.headers.get("Link")
+            if not link:
+                return pages
+            next_url = link[link.index("<") + 1:link.index(">")]
+            self.assertTrue(next_url.startswith("http://testserver/api/songs/?"))
+            response = self.client.get(next_url)
+
+    def test_pages_cover_the_mood_in_order(self):
+        expected = list(Song.objects.filter(mood=self.mood).order_by("title", "id").values_list("id", flat=True))
+        pages = self.walk(7)
+        self.assertEqual([len(page) for page in pages], [7, 7, 7, 7, 2])
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_constant_query_count(self):
+        # Mood lookup + one page query, whatever the page size
+        for limit in (1, 5, 30):
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, {"mood": "happy", "limit": limit})
+            self.assertEqual(len(response.json()), limit)
+            self.assertEqual({song["mood"] for song in response.json()}, {"Happy"})
+
+    @override_settings(SONGS_PAGE_SIZE=10, SONGS_MAX_PAGE_SIZE=12)
+    def test_page_size_default_and_cap(self):
+        self.assertEqual(len(self.client.get(self.url, {"mood": "happy"}).json()), 10)
+        self.assertEqual(len(self.client.get(self.url, {"mood": "happy", "limit": 1000}).json()), 12)
+
+    def test_cursor_seeks_the_title_index(self):
+        plan = song_page_queryset(self.mood, encode_cursor("Song 05", 0), 10).explain()
+        self.assertIn("title>?", plan)
+
+    def test_invalid_cursor_and_limit(self):
+        for params in ({"cursor": "not-a-cursor"}, {"limit": "0"}, {"limit": "ten"}):
+            response = self.client.get(self.url, {"mood": "happy", **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_view_pages_like_sync_view(self):
+        factory = AsyncRequestFactory()
+        first = await async_views.get_songs_by_mood(factory.get("/api/songs/", {"mood": "happy", "limit": 20}))
+        sync_first = await sync_to_async(self.client.get)(self.url, {"mood": "happy", "limit": 20})
+        self.assertEqual(json.loads(first.content), json.loads(sync_first.content))
+        self.assertEqual(first.headers["Link"], sync_first.headers["Link"])
+
+
+class CatalogCacheTests(APITestCase):
+    """
+    Test suite for the catalog response cache
+    Rendered listings are reused until a Mood or Song signal retires them
+    """
+
+    def setUp(self):
+        clear_catalog_cache()
+        django_cache.clear()
+        self.happy = Mood.objects.create(name="Happy")
+        self.sad = Mood.objects.create(name="Sad")
+        self.song = Song.objects.create(title="Sunshine", artist="A", mood=self.happy)
+        Song.objects.create(title="Rain", artist="B", mood=self.sad)
+        self.songs_url = reverse("get_songs_by_mood")
+
+    def titles(self, mood):
+        return [song["title"] for song in self.client.get(self.songs_url, {"mood": mood}).json()]
+
+    def test_repeat_requests_skip_the_database(self):
+        first = self.client.get(self.songs_url, {"mood": "happy"})
+        self.client.get(reverse("get_moods"))
+        before = catalog.catalog_cache().stats()["hits"]
+        with self.assertNumQueries(0):
+            again = self.client.get(self.songs_url, {"mood": "HAPPY"})
+            moods = self.client.get(reverse("get_moods"))
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(again["Content-Type"], "application/json")
+        self.assertEqual([mood["name"] for mood in moods.json()], ["Happy", "Sad"])
+        self.assertEqual(catalog.catalog_cache().stats()["hits"] - before, 2)
+        self.assertIn("catalog", metrics.snapshot()["caches"])
+
+    def test_song_changes_retire_only_their_moods(self):
+        self.titles("happy"), self.titles("sad")
+        with self.captureOnCommitCallbacks(execute=True):
+            Song.objects.create(title="Daylight", artist="C", mood=self.happy)
+        self.assertEqual(self.titles("happy"), ["Daylight", "Sunshine"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles("sad"), ["Rain"])
+
+        # Moving a song retires the listings of both moods
+        self.song.mood = self.sad
+        with self.captureOnCommitCallbacks(execute=True):
+            self.song.save()
+        self.assertEqual(self.titles("happy"), ["Daylight"])
+        self.assertEqual(self.titles("sad"), ["Rain", "Sunshine"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.song.delete()
+        self.assertEqual(self.titles("sad"), ["Rain"])
+
+    def test_mood_changes_retire_mood_list_and_listings(self):
+        self.client.get(reverse("get_moods"))
+        self.titles("happy")
+        self.happy.name = "Joyful"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.happy.save()
+        self.assertEqual([mood["name"] for mood in self.client.get(reverse("get_moods")).json()],
+                         ["Joyful", "Sad"])
+        self.assertEqual(self.client.get(self.songs_url, {"mood": "happy"}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.songs_url, {"mood": "joyful"}).json()[0]["mood"], "Joyful")
+
+    def test_invalidation_waits_for_commit(self):
+        self.titles("happy")
+        with self.captureOnCommitCallbacks() as callbacks:
+            Song.objects.create(title="Daylight", artist="C", mood=self.happy)
+            # Before the commit a reader still gets (and may re-cache) the old version
+            with self.assertNumQueries(0):
+                self.assertEqual(self.titles("happy"), ["Sunshine"])
+        self.assertEqual(len(callbacks), 2)  # The mood's listings and the mood list
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.titles("happy"), ["Daylight", "Sunshine"])
+
+    @override_settings(CATALOG_SHARED_CACHE="default")
+    def test_shared_cache_serves_other_workers(self):
+        first = self.client.get(self.songs_url, {"mood": "happy"}).content
+        # Another worker: empty local cache, same shared backend and version counters
+        catalog.catalog_cache().clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.songs_url, {"mood": "happy"}).content, first)
+        self.assertGreaterEqual(metrics.snapshot()["counters"]["cache.catalog.shared_hits"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Song.objects.create(title="Daylight", artist="C", mood=self.happy)
+        self.assertEqual(self.titles("happy"), ["Daylight", "Sunshine"])
+
+    @override_settings(CATALOG_CACHE_SIZE=0)
+    def test_disabled_cache_always_queries(self):
+        self.titles("happy")
+        with self.assertNumQueries(2):
+            self.titles("happy")
+
+
+class ConditionalCatalogTests(APITestCase):
+    """
+    Test suite for conditional GETs on the catalog endpoints
+    ETags come from mood revisions, so revalidation never runs the song query
+    """
+
+    def setUp(self):
+        clear_catalog_cache()
+        self.happy = Mood.objects.create(name="Happy")
+        self.song = Song.objects.create(title="Sunshine", artist="A", mood=self.happy)
+        self.songs_url = reverse("get_songs_by_mood")
+
+    def revalidate(self, url, params, response):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_songs_revalidate_without_song_query(self):
+        first = self.client.get(self.songs_url, {"mood": "happy"})
+        self.assertIn("ETag", first)
+        self.assertIn("Last-Modified", first)
+
+        catalog.catalog_cache().clear()
+        with self.assertNumQueries(1):  # The mood lookup only
+            again = self.revalidate(self.songs_url, {"mood": "happy"}, first)
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(again["ETag"], first["ETag"])
+        self.assertEqual(again.content, b"")
+
+        # Served from the cache entry, the 304 needs no query at all
+        self.client.get(self.songs_url, {"mood": "happy"})
+        with self.assertNumQueries(0):
+            cached = self.revalidate(self.songs_url, {"mood": "happy"}, first)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_pages_have_their_own_etags(self):
+        Song.objects.create(title="Daylight", artist="B", mood=self.happy)
+        first = self.client.get(self.songs_url, {"mood": "happy", "limit": 1})
+        second_params = {"mood": "happy", "limit": 1, "cursor": encode_cursor("Daylight", 0)}
+        second = self.client.get(self.songs_url, second_params)
+        third = self.client.get(self.songs_url, {**second_params, "cursor": encode_cursor("Sunshine", 0)})
+        self.assertEqual(len({first["ETag"], second["ETag"], third["ETag"]}), 3)
+
+        catalog.catalog_cache().clear()
+        # Page 1's validator does not revalidate page 2
+        again = self.revalidate(self.songs_url, second_params, first)
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.revalidate(self.songs_url, second_params, second).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        bad = self.revalidate(self.songs_url, {"mood": "happy", "cursor": "!!"}, first)
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_song_and_mood_writes_change_the_etag(self):
+        first = self.client.get(self.songs_url, {"mood": "happy"})
+        revision = Mood.objects.get(pk=self.happy.pk).revision
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Song.objects.create(title="Daylight", artist="B", mood=self.happy)
+        self.assertEqual(Mood.objects.get(pk=self.happy.pk).revision, revision + 1)
+        changed = self.revalidate(self.songs_url, {"mood": "happy"}, first)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+        # A stale in-memory instance saved back still yields a new ETag
+        self.happy.description = "Bright"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.happy.save()
+        renamed = self.revalidate(self.songs_url, {"mood": "happy"}, changed)
+        self.assertEqual(renamed.status_code, status.HTTP_200_OK)
+
+    def test_moods_revalidate_with_one_aggregate_query(self):
+        first = self.client.get(reverse("get_moods"))
+        self.assertEqual(list(first.json()[0]), ["id", "name", "description"])
+        catalog.catalog_cache().clear()
+        with self.assertNumQueries(1):
+            again = self.revalidate(reverse("get_moods"), {}, first)
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Mood.objects.create(name="Sad")
+        self.assertEqual(self.revalidate(reverse("get_moods"), {}, first).status_code, status.HTTP_200_OK)
+
+    def test_cached_mood_list_etag_follows_song_writes(self):
+        self.client.get(reverse("get_moods"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Song.objects.create(title="Daylight", artist="B", mood=self.happy)
+        cached = self.client.get(reverse("get_moods"))["ETag"]
+        self.assertEqual(cached, catalog.mood_list_validators()[0])
+
+    def test_if_modified_since(self):
+        first = self.client.get(self.songs_url, {"mood": "happy"})
+        again = self.client.get(self.songs_url, {"mood": "happy"}, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_views_share_validators(self):
+        first = await sync_to_async(self.client.get)(self.songs_url, {"mood": "happy"})
+        await sync_to_async(catalog.catalog_cache().clear)()
+        request = AsyncRequestFactory().get("/api/songs/", {"mood": "happy"},
+                                              headers={"If-None-Match": first["ETag"]})
+        response = await async_views.get_songs_by_mood(request)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        moods = await async_views.get_moods(AsyncRequestFactory().get("/api/moods/"))
+        request = AsyncRequestFactory().get("/api/moods/", headers={"If-None-Match": moods["ETag"]})
+        self.assertEqual((await async_views.get_moods(request)).status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class HotQueryPlanTests(APITestCase):
+    """
+    Test suite for the hot lookup indexes
+    Mood-by-name, song pages and mood history must be index searches
+    """
+
+    def test_case_insensitive_mood_lookup(self):
+        happy = Mood.objects.create(name="Happy")
+        self.assertEqual(list(Mood.objects.by_name(" hAPPY ")), [happy])
+        self.assertIn("music_mood_name_ci_idx", Mood.objects.by_name("happy").explain())
+
+    def test_explain_hot_queries_finds_no_full_scans(self):
+        Mood.objects.create(name="Happy")
+        stdout = io.StringIO()
+        call_command("explain_hot_queries", "--fail-on-scan", stdout=stdout)
+        output = stdout.getvalue()
+        for index in ("music_mood_name_ci_idx", "music_song_mood_title_idx", "music_usermood_user_ts_idx"):
+            self.assertIn(index, output)
+        self.assertIn("all hot queries use their index seeks", output)
+
+    def test_keyset_page_requires_title_seek(self):
+        from .management.commands.explain_hot_queries import hot_queries, missing_seek
+
+        expected = dict((label, seek) for label, _, seek in hot_queries("Happy", 1))["song listing, next page"]
+        # The unbounded OR filter planned as a search on mood_id alone
+        mood_only = "10 0 0 SEARCH music_song USING INDEX music_song_mood_title_idx (mood_id=?)"
+        self.assertIsNotNone(missing_seek(mood_only, expected, "sqlite"))
+        self.assertIsNone(missing_seek(mood_only.replace("(mood_id=?)", "(mood_id=? AND title>?)"),
+                                       expected, "sqlite"))
+        postgres = ("Limit\n  ->  Index Scan using music_song_mood_title_idx on music_song\n"
+                    "        Index Cond: ((mood_id = 1) AND ((title)::text >= 'M'::text))")
+        self.assertIsNone(missing_seek(postgres, expected, "postgresql"))
+        self.assertIsNotNone(missing_seek(postgres.replace(" AND ((title)::text >= 'M'::text)", ""),
+                                          expected, "postgresql"))
+
+        with unittest.mock.patch("music.pagination.song_page_queryset",
+                                 lambda mood, cursor, limit: Song.objects.filter(mood=mood).order_by("title", "id")):
+            with self.assertRaisesMessage(CommandError, "song listing, next page (no index seek"):
+                call_command("explain_hot_queries", "--fail-on-scan", stdout=io.StringIO())
+
+    def test_full_scan_detection(self):
+        from .management.commands.explain_hot_queries import full_scans
+
+        self.assertEqual(full_scans("2 0 0 SCAN music_song\n5 0 0 SEARCH music_mood USING INDEX x (id=?)"),
+                         ["music_song"])
+        self.assertEqual(full_scans("SCAN music_song USING COVERING INDEX music_song_mood_title_idx"), [])
+        self.assertEqual(full_scans("Limit\n  ->  Seq Scan on music_usermood  (cost=0.00..1.01 rows=1)"),
+                         ["music_usermood"])
+        self.assertEqual(full_scans("Index Scan using music_usermood_user_ts_idx on music_usermood"), [])
+
+
+class ImportSongsCommandTests(APITestCase):
+    """
+    Test suite for the import_songs management command
+    Batched upserts on (title, artist) that keep the catalog caches coherent
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.happy = Mood.objects.create(name="Happy")
+        Song.objects.create(title="Sunshine", artist="A", album="Old", mood=self.happy)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_csv(self, rows):
+        path = os.path.join(self.tmpdir.name, "catalog.csv")
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["title", "artist", "album", "mood"])
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, path, *args):
+        stderr = io.StringIO()
+        call_command("import_songs", path, *args, stdout=io.StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def test_upserts_in_batches(self):
+        path = self.write_csv([(f"Track {index}", "B", "", "happy") for index in range(25)]
+                              + [("Sunshine", "A", "New", "Happy"), ("Track 3", "B", "Again", "HAPPY")])
+        # Mood map, then per chunk a savepoint pair, one upsert per 8 rows of each column set
+        # (mood only / album and mood) and one revision bump
+        with self.assertNumQueries(1 + (2 + 3 + 1) + (2 + 2 + 1)):
+            output = self.run_import(path, "--batch-size", "8", "--chunk-size", "20", "--progress-every", "0")
+        self.assertIn("27 rows read, 27 songs upserted", output)
+        self.assertEqual(Song.objects.count(), 26)
+        self.assertEqual(Song.objects.get(title="Sunshine").album, "New")
+        self.assertEqual(Song.objects.get(title="Track 3").album, "Again")
+
+    def test_invalidates_catalog_and_revisions(self):
+        songs_url = reverse("get_songs_by_mood")
+        before = self.client.get(songs_url, {"mood": "happy"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import(self.write_csv([("Daylight", "C", "", "Happy")]))
+        after = self.client.get(songs_url, {"mood": "happy"}, HTTP_IF_NONE_MATCH=before["ETag"])
+        self.assertEqual(after.status_code, status.HTTP_200_OK)
+        self.assertEqual([song["title"] for song in after.json()], ["Daylight", "Sunshine"])
+
+    def test_errors_moods_and_dry_run(self):
+        path = self.write_csv([("Rain", "D", "", "Sad"), ("", "E", "", "Happy"), ("x" * 101, "F", "", "")])
+        output = self.run_import(path, "--dry-run", "--create-moods")
+        self.assertIn("1 songs validated", output)
+        self.assertIn("2 errors, 1 moods to create", output)
+        self.assertFalse(Mood.objects.filter(name="Sad").exists())
+        self.assertEqual(Song.objects.count(), 1)
+
+        output = self.run_import(path)
+        self.assertIn("Unknown mood: 'Sad' (use --create-moods)", output)
+        self.run_import(path, "--create-moods")
+        self.assertEqual(Song.objects.get(title="Rain").mood.name, "Sad")
+
+    def test_partial_rows_keep_existing_values(self):
+        Song.objects.filter(title="Sunshine").update(spotify_url="https://open.spotify.com/track/1")
+        path = os.path.join(self.tmpdir.name, "names.csv")
+        with open(path, "w", newline="") as handle:
+            handle.write("title,artist\nSunshine,A\nMoonlight,A\n")
+        self.run_import(path)
+        self.run_import(self.write_csv([("Sunshine", "A", "", "")]))
+
+        song = Song.objects.get(title="Sunshine")
+        self.assertEqual((song.mood, song.album, song.spotify_url),
+                         (self.happy, "Old", "https://open.spotify.com/track/1"))
+        self.assertIsNone(Song.objects.get(title="Moonlight").mood)
+
+    def test_failed_chunk_rolls_back_its_moods(self):
+        path = self.write_csv([("Rain", "D", "", "Sad")])
+        with unittest.mock.patch.object(Song.objects, "bulk_create", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, "--create-moods")
+        self.assertFalse(Mood.objects.filter(name="Sad").exists())
+
+    def test_populate_db_keeps_existing_songs(self):
+        sad = Mood.objects.create(name="Sad")
+        Song.objects.create(title="Happy Song", artist="Artist1", mood=sad)
+        call_command("populate_db", stdout=io.StringIO())
+        call_command("populate_db", stdout=io.StringIO())
+        self.assertEqual(Song.objects.get(title="Happy Song", artist="Artist1").mood, sad)
+        self.assertEqual(Song.objects.filter(artist__startswith="Artist").count(), 4)
+
+    def test_jsonl_input(self):
+        path = os.path.join(self.tmpdir.name, "catalog.jsonl")
+        with open(path, "w") as handle:
+            handle.write(json.dumps({"title": "Sunshine", "artist": "A", "mood": "Happy", "album": None}) + "\n")
+            handle.write("[1, 2]\n")
+        output = self.run_import(path)
+        self.assertIn("record 2: Expected a JSON object.", output)
+        # null keeps the stored album
+        self.assertEqual(Song.objects.get(title="Sunshine").album, "Old")
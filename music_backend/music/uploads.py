@@ -0,0 +1,114 @@
+"""
+Bounded Upload Handling for Moodify Music Application
+
+The image endpoint reads uploads through a dedicated multipart parser: oversized
+requests are refused from the Content-Length header or as soon as the streamed
+file crosses the byte limit, and the accepted file is kept in one in-memory
+buffer that is decoded without further copies.
+"""
+
+from __future__ import annotations
+
+import io
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+# Allowance for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    """Raised when an upload exceeds EMOTION_UPLOAD_MAX_BYTES"""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Uploaded file is too large.'
+    default_code = 'upload_too_large'
+
+
+def max_upload_bytes() -> int:
+    return int(getattr(settings, "EMOTION_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+
+
+class BoundedMemoryUploadHandler(FileUploadHandler):
+    """
+    Keeps each uploaded file in a single BytesIO and stops at `max_bytes`.
+
+    Takes over from Django's default handlers, so no temporary file or second
+    in-memory copy is created.
+    """
+
+    def __init__(self, request=None, max_bytes: int | None = None) -> None:
+        super().__init__(request)
+        self.max_bytes = max_upload_bytes() if max_bytes is None else max_bytes
+        self.buffer: io.BytesIO | None = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Refuse before reading any of the body when the client declares its size
+        if content_length and content_length > self.max_bytes + MULTIPART_OVERHEAD_BYTES:
+            raise UploadTooLarge()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.buffer = io.BytesIO()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_bytes:
+            raise UploadTooLarge()
+        self.buffer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.buffer.seek(0)
+        return InMemoryUploadedFile(
+            file=self.buffer,
+            field_name=self.field_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+
+class BoundedImageMultiPartParser(MultiPartParser):
+    """Multipart parser that only uses BoundedMemoryUploadHandler"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        handlers = [BoundedMemoryUploadHandler(request)]
+
+        try:
+            parser = DjangoMultiPartParser(meta, stream, handlers, encoding)
+            data, files = parser.parse()
+            return DataAndFiles(data, files)
+        except MultiPartParserError as exc:
+            raise ParseError('Multipart form parse error - %s' % str(exc))
+
+
+@contextmanager
+def upload_buffer(uploaded_file) -> Iterator[memoryview | bytes]:
+    """Yield the upload's bytes, as a zero-copy view when it is held in memory"""
+    file = getattr(uploaded_file, 'file', None)
+    if not isinstance(file, io.BytesIO):
+        yield uploaded_file.read()
+        return
+    view = file.getbuffer()
+    try:
+        yield view
+    finally:
+        # The BytesIO cannot be closed at the end of the request while a view is exported
+        view.release()
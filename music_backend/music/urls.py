@@ -3,6 +3,7 @@ URL Configuration for Moodify Music API
 Defines API endpoints for authentication and music recommendation features
 """
 
+from django.conf import settings
 from django.urls import path
 from .views import (
     # Authentication views
@@ -14,9 +15,23 @@ from .views import (
     get_moods,
     get_songs_by_mood,
     detect_mood_from_text,
+    detect_mood_from_text_batch,
     detect_mood_from_image,
+    get_image_job,
+    # Operational views
+    health_ready,
+    get_metrics,
 )
 
+# Native async implementations for ASGI deployments (ASYNC_VIEWS=True)
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        get_moods,
+        get_songs_by_mood,
+        detect_mood_from_text,
+        detect_mood_from_image,
+    )
+
 urlpatterns = [
     # User authentication endpoints
     path('api/auth/register/', register_user, name='register_user'),
@@ -28,5 +43,11 @@ urlpatterns = [
     path('api/moods/', get_moods, name='get_moods'),
     path('api/songs/', get_songs_by_mood, name='get_songs_by_mood'),
     path('api/detect-text-mood/', detect_mood_from_text, name='detect_text_mood'),
+    path('api/detect-text-mood/batch/', detect_mood_from_text_batch, name='detect_text_mood_batch'),
     path('api/detect-image-emotion/', detect_mood_from_image, name='detect_mood_from_image'),
+    path('api/image-jobs/<uuid:job_id>/', get_image_job, name='get_image_job'),
+
+    # Operational endpoints
+    path('api/health/ready/', health_ready, name='health_ready'),
+    path('api/metrics/', get_metrics, name='get_metrics'),
 ]
\ No newline at end of file
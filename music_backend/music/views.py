@@ -5,24 +5,32 @@ Handles user authentication, mood detection, and music recommendations
 
 from __future__ import annotations
 
-from django.http import HttpRequest
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.urls import reverse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import FormParser, JSONParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from textblob import TextBlob
 
-import numpy as np
-import cv2
 import traceback
 import logging
 
-from .models import Song, Mood, Profile, UserMood
-from .serializers import MoodSerializer, SongSerializer
+from . import catalog, metrics, warmup
+from .admission import admission_controlled
+from .analysis import ImageAnalysisError, analyze_image
+from .models import ImageJob, Mood, Profile, UserMood
+from .pagination import InvalidPageRequest, next_page_headers, page_size, song_page_queryset, split_page
+from .parsers import NDJSONParser
+from .sentiment import TextTooLong, analyze_text, check_text_length, polarity_to_mood, score_texts
+from .serializers import MoodSerializer, SongListSerializer
+from .uploads import BoundedImageMultiPartParser, UploadTooLarge, upload_buffer
 
 # Configure logging for debugging
 logger = logging.getLogger(__name__)
@@ -218,50 +226,72 @@ def check_auth(request):
 # 🎵 Music API Views (Existing functionality preserved)
 # ---------------------------------------------------------------------------
 
-MOOD_MAP: list[tuple[float, str]] = [
-    (0.3, "Happy"),
-    (0.1, "Energetic"),
-    (0.0, "Calm"),
-    (-0.1, "Sad"),
-]
-
-def polarity_to_mood(polarity: float) -> str:
-    for threshold, label in MOOD_MAP:
-        if polarity >= threshold:
-            return label
-    return "Party"
+def _request_param(request: HttpRequest, name: str) -> str:
+    """Read an option from the form/JSON body or, failing that, the query string"""
+    value = request.data.get(name) or request.query_params.get(name) or ""
+    return str(value).strip().lower()
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])  # Keep existing endpoints accessible without auth
-def get_moods(_: HttpRequest) -> Response:
+def get_moods(request: HttpRequest) -> HttpResponse:
     """Return all available mood labels"""
-    moods = Mood.objects.all()
-    serializer = MoodSerializer(moods, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Rendered JSON and its validators come from the catalog cache until a Mood changes
+    entry, slot = catalog.lookup((catalog.MOODS, catalog.MOOD_LIST), ("moods",))
+    if entry is None:
+        if catalog.is_conditional(request):
+            # Revalidating costs one aggregate query instead of a render
+            unchanged = catalog.not_modified(request, *catalog.mood_list_validators())
+            if unchanged is not None:
+                return unchanged
+        moods = list(Mood.objects.all())
+        entry = (JSONRenderer().render(MoodSerializer(moods, many=True).data), *catalog.mood_list_validators(moods))
+        catalog.store(slot, entry)
+
+    body, etag, modified = entry
+    return catalog.not_modified(request, etag, modified) or catalog.json_response(body, etag, modified)
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])  # Keep existing endpoints accessible without auth
-def get_songs_by_mood(request: HttpRequest) -> Response:
+def get_songs_by_mood(request: HttpRequest) -> HttpResponse:
     """Return corresponding song list based on mood name"""
     mood_name = request.GET.get("mood", "").strip()
     if not mood_name:
         return Response({"error": "Missing 'mood' query parameter."},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    mood = Mood.objects.filter(name__iexact=mood_name).first()
-    if not mood:
-        return Response({"error": "Mood not found."},
-                        status=status.HTTP_404_NOT_FOUND)
-
-    songs = Song.objects.filter(mood=mood)
-    serializer = SongSerializer(songs, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        limit = page_size(request)
+        entry, slot = catalog.lookup(
+            (catalog.MOODS, catalog.songs_scope(mood_name)),
+            ("songs", mood_name.lower(), request.GET.get("cursor", ""), limit),
+        )
+        if entry is None:
+            mood = Mood.objects.by_name(mood_name).first()
+            if not mood:
+                return Response({"error": "Mood not found."},
+                                status=status.HTTP_404_NOT_FOUND)
+            # Validators come from the mood's revision: a match skips the song query
+            etag, modified = catalog.song_list_validators(mood, request.GET.get("cursor"), limit)
+            unchanged = catalog.not_modified(request, etag, modified)
+            if unchanged is not None:
+                return unchanged
+            # Keyset pages on (title, id); the next page's URL goes in the Link header
+            songs, cursor = split_page(list(song_page_queryset(mood, request.GET.get("cursor"), limit)), limit)
+            entry = (JSONRenderer().render(SongListSerializer(songs, many=True).data), cursor, etag, modified)
+            catalog.store(slot, entry)
+    except InvalidPageRequest as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    body, cursor, etag, modified = entry
+    return (catalog.not_modified(request, etag, modified)
+            or catalog.json_response(body, etag, modified, next_page_headers(request, cursor)))
 
 
 @api_view(["POST"])
 @permission_classes([AllowAny])  # Keep existing endpoints accessible without auth
+@admission_controlled("text")
 def detect_mood_from_text(request: HttpRequest) -> Response:
     """Use TextBlob to analyze text sentiment"""
     user_text: str = request.data.get("text", "").strip()
@@ -270,45 +300,134 @@ def detect_mood_from_text(request: HttpRequest) -> Response:
                         status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        polarity = TextBlob(user_text).sentiment.polarity
-        detected_mood = polarity_to_mood(polarity)
-        return Response({"mood": detected_mood, "polarity": polarity},
-                        status=status.HTTP_200_OK)
+        payload = analyze_text(user_text, include_chunks=_request_param(request, "chunks") in ("1", "true"))
+        return Response(payload, status=status.HTTP_200_OK)
+    except TextTooLong as exc:
+        return Response({"error": str(exc)},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
     except Exception as exc:
         return Response({"error": str(exc)},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser, NDJSONParser])
+@admission_controlled("text-batch")
+def detect_mood_from_text_batch(request: HttpRequest) -> Response:
+    """Score many texts in one request (JSON list, {"texts": [...]} or NDJSON)"""
+    items = request.data.get("texts") if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({"error": "Provide a non-empty list of texts."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    max_items = int(getattr(settings, "TEXT_BATCH_MAX_ITEMS", 10000))
+    if len(items) > max_items:
+        return Response({"error": f"At most {max_items} texts per batch."},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    # Items are strings or {"id": ..., "text": ...}; ids are echoed back
+    results: list[dict] = []
+    scored: list[tuple[dict, str]] = []
+    for item in items:
+        text = item.get("text") if isinstance(item, dict) else item
+        result = {"id": item["id"]} if isinstance(item, dict) and "id" in item else {}
+        results.append(result)
+        if not isinstance(text, str) or not text.strip():
+            result["error"] = "No text provided."
+            continue
+        try:
+            check_text_length(text.strip())
+        except TextTooLong as exc:
+            result["error"] = str(exc)
+            continue
+        scored.append((result, text.strip()))
+
+    for (result, _), polarity in zip(scored, score_texts(text for _, text in scored)):
+        result.update(mood=polarity_to_mood(polarity), polarity=polarity)
+    return Response({"count": len(results), "results": results}, status=status.HTTP_200_OK)
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])  # Keep existing endpoints accessible without auth
+@parser_classes([BoundedImageMultiPartParser, FormParser, JSONParser])
+@admission_controlled("image")  # Checked before the upload is read
 def detect_mood_from_image(request: HttpRequest) -> Response:
     """Use FER to analyze emotions in uploaded images"""
-    if 'image' not in request.FILES:
+    try:
+        # Parsing streams the upload and stops as soon as it crosses the byte limit
+        has_image = 'image' in request.FILES
+    except UploadTooLarge as exc:
+        return Response({'error': str(exc.detail)},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if not has_image:
         return Response({'error': 'No image uploaded.'},
                         status=status.HTTP_400_BAD_REQUEST)
 
+    # Optional latency/accuracy trade-off: fast, balanced or accurate
+    from .inference import resolve_detector  # Delayed import: loads OpenCV and NumPy
+
+    try:
+        detector_name = resolve_detector(_request_param(request, 'mode'))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    all_faces = _request_param(request, 'faces') in ('all', '1', 'true')
+    image_file = request.FILES['image']
+
+    # async=1: queue the work for the job workers and answer immediately
+    if _request_param(request, 'async') in ('1', 'true'):
+        job = ImageJob.objects.create(
+            detector=detector_name,
+            all_faces=all_faces,
+            image=image_file.read(),
+        )
+        return Response({
+            'job_id': str(job.id),
+            'status': job.status,
+            'status_url': reverse('get_image_job', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
     try:
-        from fer import FER  # ✅ Delayed import to avoid startup errors
+        # Decode straight from the upload buffer at reduced resolution;
+        # faces=all adds every face and the group mood from the same pass
+        with upload_buffer(image_file) as data:
+            payload = analyze_image(data, detector_name, all_faces)
+        return Response(payload, status=status.HTTP_200_OK)
+    except ImageAnalysisError as e:
+        return Response({'error': str(e)}, status=e.status_code)
+    except Exception as e:
+        traceback.print_exc()  # ✅ Print complete exception info to terminal
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        image_file = request.FILES['image']
-        img_array = np.frombuffer(image_file.read(), np.uint8)
-        img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
 
-        if img is None:
-            return Response({'error': 'Invalid image file.'},
-                            status=status.HTTP_400_BAD_REQUEST)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def get_image_job(_: HttpRequest, job_id) -> Response:
+    """Poll an asynchronous image analysis job"""
+    job = ImageJob.objects.filter(id=job_id).defer('image').first()
+    if job is None:
+        return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        detector = FER(mtcnn=True)
-        results = detector.detect_emotions(img)
+    data = {"job_id": str(job.id), "status": job.status}
+    if job.status == ImageJob.STATUS_DONE:
+        data["result"] = job.result
+    elif job.status == ImageJob.STATUS_FAILED:
+        data["error"] = job.error
+    return Response(data, status=status.HTTP_200_OK)
 
-        if not results:
-            return Response({'error': 'No face or emotion detected.'},
-                            status=status.HTTP_400_BAD_REQUEST)
 
-        top_emotions = results[0]["emotions"]
-        dominant_emotion = max(top_emotions, key=top_emotions.get)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def health_ready(_: HttpRequest) -> Response:
+    """Report readiness: 503 until every warm-up step has finished, with per-step timings"""
+    report = warmup.state.report()
+    code = status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return Response(report, status=code)
 
-        return Response({"emotion": dominant_emotion}, status=status.HTTP_200_OK)
-    except Exception as e:
-        traceback.print_exc()  # ✅ Print complete exception info to terminal
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def get_metrics(_: HttpRequest) -> Response:
+    """Return in-process counters, timing summaries and detector stats"""
+    return Response(metrics.snapshot(), status=status.HTTP_200_OK)
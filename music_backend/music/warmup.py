@@ -0,0 +1,146 @@
+"""
+Startup Warm-up for Moodify Music Application
+
+Loads the configured emotion detectors and the TextBlob sentiment lexicon in a
+background thread of each server process, started by the process's first
+request (usually a readiness probe), so real traffic does not pay for imports
+and model loading. Progress is reported by the readiness endpoint
+(/api/health/ready/).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = tuple[str, Callable[[], Any]]
+
+
+class WarmupState:
+    """
+    Thread-safe record of each warm-up step's status and duration.
+
+    A warm-up belongs to the process that started it: threads do not survive
+    fork(), so a child forked after start() (gunicorn --preload) runs its own.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.steps: dict[str, dict[str, Any]] = {}
+        self.started = False
+        self.pid: int | None = None
+        self.thread: threading.Thread | None = None
+
+    def is_running_here(self) -> bool:
+        return self.started and self.pid == os.getpid()
+
+    def run(self, steps: list[WarmupStep]) -> None:
+        for name, step in steps:
+            with self._lock:
+                self.steps[name]["status"] = "running"
+            started = time.perf_counter()
+            try:
+                step()
+                status, error = "done", None
+            except Exception as exc:  # Keep warming the remaining steps
+                logger.exception("Warm-up step %s failed", name)
+                status, error = "failed", str(exc)
+            elapsed = time.perf_counter() - started
+            metrics.observe(f"warmup.{name}.seconds", elapsed)
+            with self._lock:
+                self.steps[name].update(status=status, seconds=round(elapsed, 3))
+                if error:
+                    self.steps[name]["error"] = error
+            logger.info("Warm-up step %s %s in %.2fs", name, status, elapsed)
+
+    def start(self, steps: list[WarmupStep], background: bool = True) -> None:
+        with self._lock:
+            if self.started and self.pid == os.getpid():
+                return
+            self.started = True
+            self.pid = os.getpid()
+            self.steps.clear()
+            for name, _ in steps:
+                self.steps[name] = {"status": "pending", "seconds": None}
+        if not background:
+            self.run(steps)
+            return
+        self.thread = threading.Thread(target=self.run, args=(steps,), name="moodify-warmup", daemon=True)
+        self.thread.start()
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            steps = {name: dict(info) for name, info in self.steps.items()}
+        ready = all(info["status"] == "done" for info in steps.values())
+        return {"ready": ready, "warmup_enabled": self.started, "steps": steps}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.steps.clear()
+            self.started = False
+            self.pid = None
+            self.thread = None
+
+
+state = WarmupState()
+
+
+def warmup_detector_names() -> list[str]:
+    from .inference import default_detector_name, resolve_detector
+
+    configured = getattr(settings, "EMOTION_WARMUP_DETECTORS", []) or [default_detector_name()]
+    return [resolve_detector(name) for name in configured]
+
+
+def warm_detector(name: str) -> None:
+    """
+    Load detector `name` and run it once, so its graphs and lazy classifier exist.
+
+    Raises whatever loading raises (ImportError for a missing model or backend);
+    callers outside the warm-up thread use that to fail fast.
+    """
+    import numpy as np
+
+    from .engines import classify_faces
+    from .inference import detector_registry
+
+    with detector_registry.use(name) as detector:
+        # Haar detectors build their emotion classifier lazily; force it now
+        classifier = getattr(detector, "classifier", None)
+        if classifier is not None:
+            classify_faces(classifier, np.zeros((1, 64, 64), dtype=np.float32))
+        # One pass on a blank frame builds the face finder's graphs as well
+        detector.detect_emotions(np.zeros((64, 64, 3), dtype=np.uint8))
+
+
+def _warm_textblob() -> None:
+    from .sentiment import text_polarity
+
+    text_polarity("Warming up the sentiment lexicon")
+
+
+def default_steps() -> list[WarmupStep]:
+    steps: list[WarmupStep] = [("textblob", _warm_textblob)]
+    for name in warmup_detector_names():
+        steps.append((f"detector:{name}", lambda name=name: warm_detector(name)))
+    return steps
+
+
+def start_warmup(background: bool = True) -> None:
+    """Run the configured warm-up steps once per process"""
+    state.start(default_steps(), background=background)
+
+
+def warm_on_request(**_: Any) -> None:
+    """request_started receiver: start this process's warm-up with its first request"""
+    if not state.is_running_here():
+        start_warmup()
@@ -5,6 +5,7 @@ Includes security settings, CORS configuration, and database setup
 """
 
 import os
+import warnings
 from pathlib import Path
 from django.core.management.utils import get_random_secret_key
 
@@ -102,10 +103,16 @@ else:
     DATABASES = {
         "default": DEFAULT_DB
     }
-    if not database_url:
-        print("Using SQLite database for development")
-    else:
-        print("dj_database_url not available, falling back to SQLite")
+    if database_url:
+        # Worth a warning (stderr); the plain SQLite default stays silent
+        warnings.warn("DATABASE_URL is set but dj_database_url is not installed; falling back to SQLite")
+
+# Django cache; set REDIS_URL to share it between worker processes and hosts
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 # Password Validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -165,3 +172,92 @@ REST_FRAMEWORK = {
 # Authentication Configuration
 LOGIN_URL = '/api/auth/login/'
 LOGIN_REDIRECT_URL = '/'
+
+# Emotion Detection Configuration
+# Default image detector: a mode (fast, balanced, accurate) or a name in music.inference.detector_registry
+EMOTION_DETECTOR = os.getenv("EMOTION_DETECTOR", "fer-mtcnn")
+
+# Emotion classifier engine for the Haar modes: "fer" (TensorFlow) or "onnx" (onnxruntime / OpenCV DNN)
+EMOTION_ENGINE = os.getenv("EMOTION_ENGINE", "fer")
+EMOTION_ONNX_MODEL = os.getenv("EMOTION_ONNX_MODEL", str(BASE_DIR / "music" / "ml_models" / "emotion_model.onnx"))
+EMOTION_ENGINE_THREADS = int(os.getenv("EMOTION_ENGINE_THREADS", "1"))
+
+# Micro-batching of concurrent image requests (1 disables batching)
+EMOTION_BATCH_MAX_SIZE = int(os.getenv("EMOTION_BATCH_MAX_SIZE", "1"))
+EMOTION_BATCH_MAX_WAIT_MS = float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "5"))
+EMOTION_BATCH_TIMEOUT = float(os.getenv("EMOTION_BATCH_TIMEOUT", "30"))
+
+# Shared inference daemon (python manage.py inference_server); empty keeps inference in-process
+EMOTION_SIDECAR_SOCKET = os.getenv("EMOTION_SIDECAR_SOCKET", "")
+EMOTION_SIDECAR_TIMEOUT = float(os.getenv("EMOTION_SIDECAR_TIMEOUT", "30"))
+
+# Longest edge (pixels) uploads are decoded/downscaled to before face detection (0 = full size)
+EMOTION_MAX_IMAGE_EDGE = int(os.getenv("EMOTION_MAX_IMAGE_EDGE", "1024"))
+
+# Perceptual-hash cache of image results for repeated uploads (size 0 disables)
+EMOTION_RESULT_CACHE_SIZE = int(os.getenv("EMOTION_RESULT_CACHE_SIZE", "512"))
+EMOTION_RESULT_CACHE_TTL = float(os.getenv("EMOTION_RESULT_CACHE_TTL", "300"))
+EMOTION_RESULT_CACHE_MAX_DISTANCE = int(os.getenv("EMOTION_RESULT_CACHE_MAX_DISTANCE", "10"))  # dHash bits
+
+# Admission control per detection endpoint (and per worker process): requests past
+# MAX_CONCURRENT wait in a queue of MAX_QUEUE for up to QUEUE_TIMEOUT seconds, then get 429.
+# Keep MAX_CONCURRENT + MAX_QUEUE below the server's threads so catalog requests stay served.
+EMOTION_MAX_CONCURRENT = int(os.getenv("EMOTION_MAX_CONCURRENT", "4"))  # 0 disables the limit
+EMOTION_MAX_QUEUE = int(os.getenv("EMOTION_MAX_QUEUE", "8"))
+EMOTION_QUEUE_TIMEOUT = float(os.getenv("EMOTION_QUEUE_TIMEOUT", "5"))
+EMOTION_RETRY_AFTER = int(os.getenv("EMOTION_RETRY_AFTER", "2"))  # Seconds, sent as Retry-After
+# The text endpoints (single and batch) have their own, looser limits: scoring a text costs
+# milliseconds, so they should not be shed at image-inference concurrency
+TEXT_MAX_CONCURRENT = int(os.getenv("TEXT_MAX_CONCURRENT", "16"))  # 0 disables the limit
+TEXT_MAX_QUEUE = int(os.getenv("TEXT_MAX_QUEUE", "32"))
+TEXT_QUEUE_TIMEOUT = float(os.getenv("TEXT_QUEUE_TIMEOUT", "2"))
+TEXT_RETRY_AFTER = int(os.getenv("TEXT_RETRY_AFTER", "1"))
+
+# Serve the catalog and detection endpoints with native async views (music.async_views);
+# only worthwhile under an ASGI server such as uvicorn. CPU-bound work runs in a thread pool.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
+ASYNC_INFERENCE_WORKERS = int(os.getenv("ASYNC_INFERENCE_WORKERS", "4"))
+
+# /api/songs/ keyset pagination: default page size (?limit=) and the largest page served
+SONGS_PAGE_SIZE = int(os.getenv("SONGS_PAGE_SIZE", "50"))
+SONGS_MAX_PAGE_SIZE = int(os.getenv("SONGS_MAX_PAGE_SIZE", "200"))
+
+# Rendered-response cache for /api/moods/ and /api/songs/ (size 0 disables the in-process LRU);
+# CATALOG_SHARED_CACHE names a CACHES alias shared across workers, which also carries the
+# invalidation counters. Without it, other workers may lag a write by up to the TTL (seconds)
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "256"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+CATALOG_SHARED_CACHE = os.getenv("CATALOG_SHARED_CACHE", "")
+
+# Text sentiment engine: "textblob" (TextBlob's pattern analyzer) or "lexicon" (precompiled
+# copy of the same lexicon in music.lexicon, ~7x faster, same polarity within tested tolerance)
+TEXT_SENTIMENT_ENGINE = os.getenv("TEXT_SENTIMENT_ENGINE", "textblob")
+
+# Polarity cache for /api/detect-text-mood/, keyed on normalized text (size 0 disables the
+# in-process LRU); TEXT_POLARITY_SHARED_CACHE names a CACHES alias shared across workers
+TEXT_POLARITY_CACHE_SIZE = int(os.getenv("TEXT_POLARITY_CACHE_SIZE", "4096"))
+TEXT_POLARITY_CACHE_TTL = float(os.getenv("TEXT_POLARITY_CACHE_TTL", "3600"))
+TEXT_POLARITY_SHARED_CACHE = os.getenv("TEXT_POLARITY_SHARED_CACHE", "")
+
+# Text length limit (characters, 0 = none; 413 beyond) and chunking of long texts: inputs longer
+# than TEXT_CHUNK_SIZE are split at sentence boundaries, scored per chunk (in the batch worker
+# pool from TEXT_CHUNK_PARALLEL_MIN chunks) and combined weighted by chunk length
+TEXT_MAX_LENGTH = int(os.getenv("TEXT_MAX_LENGTH", "20000"))
+TEXT_CHUNK_SIZE = int(os.getenv("TEXT_CHUNK_SIZE", "1000"))
+TEXT_CHUNK_PARALLEL_MIN = int(os.getenv("TEXT_CHUNK_PARALLEL_MIN", "8"))
+
+# Batch text mood endpoint (/api/detect-text-mood/batch/): item limit, and the batch size from
+# which texts are scored in a pool of worker processes (0 workers = one per CPU core)
+TEXT_BATCH_MAX_ITEMS = int(os.getenv("TEXT_BATCH_MAX_ITEMS", "10000"))
+TEXT_BATCH_PARALLEL_MIN = int(os.getenv("TEXT_BATCH_PARALLEL_MIN", "2000"))
+TEXT_BATCH_WORKERS = int(os.getenv("TEXT_BATCH_WORKERS", "0"))
+
+# Upload limits for the image endpoint, enforced while streaming and before decoding
+EMOTION_UPLOAD_MAX_BYTES = int(os.getenv("EMOTION_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+EMOTION_UPLOAD_MAX_PIXELS = int(os.getenv("EMOTION_UPLOAD_MAX_PIXELS", "64000000"))
+
+# Background warm-up of models in each server worker, from its first request; /api/health/ready/ reports 503 until it finishes
+EMOTION_WARMUP = os.getenv("EMOTION_WARMUP", "False") == "True"
+EMOTION_WARMUP_DETECTORS: list[str] = [
+    name for name in os.getenv("EMOTION_WARMUP_DETECTORS", "").split(",") if name
+]  # Modes or detector names; empty warms EMOTION_DETECTOR